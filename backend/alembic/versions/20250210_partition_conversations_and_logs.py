@@ -0,0 +1,69 @@
+"""partition conversation and operation log tables by month
+
+Revision ID: partition_conversations_and_logs
+Revises: enhance_building_and_simulation
+Create Date: 2025-02-10
+
+"""
+from datetime import date
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'partition_conversations_and_logs'
+down_revision = 'enhance_building_and_simulation'
+
+# 按月分区的表及其原外键名称（MySQL分区表不支持外键）
+PARTITIONED_TABLES = {
+    'tb_ai_conversations': ('tb_ai_conversations_ibfk_1', 'CASCADE'),
+    'tb_operation_logs': ('tb_operation_logs_ibfk_1', 'SET NULL'),
+}
+
+# 预建分区范围：起始月份 ~ 结束月份（之后的数据落入 pmax，由运维定期 REORGANIZE 拆分）
+PARTITION_START = date(2025, 1, 1)
+PARTITION_END = date(2027, 1, 1)
+
+
+def _monthly_partitions() -> str:
+    """生成按月的 RANGE 分区定义"""
+    partitions = []
+    year, month = PARTITION_START.year, PARTITION_START.month
+    while date(year, month, 1) < PARTITION_END:
+        next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+        partitions.append(
+            f"PARTITION p{year}{month:02d} "
+            f"VALUES LESS THAN (TO_DAYS('{next_year}-{next_month:02d}-01'))"
+        )
+        year, month = next_year, next_month
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ",\n    ".join(partitions)
+
+
+def upgrade():
+    """Upgrade: 对话记录表和操作日志表按 created_at 月度分区"""
+
+    for table, (fk_name, _) in PARTITIONED_TABLES.items():
+        # 分区键必须包含在主键中，且分区表不支持外键
+        op.execute(f"ALTER TABLE {table} DROP FOREIGN KEY {fk_name}")
+        op.execute(
+            f"ALTER TABLE {table} "
+            f"MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间'"
+        )
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+        op.execute(
+            f"ALTER TABLE {table} PARTITION BY RANGE (TO_DAYS(created_at)) (\n"
+            f"    {_monthly_partitions()}\n"
+            f")"
+        )
+
+
+def downgrade():
+    """Downgrade: 回滚分区"""
+
+    for table, (fk_name, ondelete) in PARTITIONED_TABLES.items():
+        op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {fk_name} "
+            f"FOREIGN KEY (user_id) REFERENCES tb_users(id) ON DELETE {ondelete}"
+        )
@@ -0,0 +1,31 @@
+"""add generated api_key_masked column to ai providers
+
+Revision ID: add_api_key_masked
+Revises: partition_conversations_and_logs
+Create Date: 2025-02-12
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_api_key_masked'
+down_revision = 'partition_conversations_and_logs'
+
+
+def upgrade():
+    """Upgrade: 新增API Key掩码生成列"""
+    op.add_column(
+        'tb_ai_providers',
+        sa.Column(
+            'api_key_masked',
+            sa.String(12),
+            sa.Computed("CONCAT(LEFT(api_key_encrypted, 4), '****', RIGHT(api_key_encrypted, 4))", persisted=True),
+            comment='API Key掩码'
+        )
+    )
+
+
+def downgrade():
+    """Downgrade: 删除API Key掩码生成列"""
+    op.drop_column('tb_ai_providers', 'api_key_masked')
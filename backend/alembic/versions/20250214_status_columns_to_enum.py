@@ -0,0 +1,50 @@
+"""convert low-cardinality status columns to native ENUM
+
+Revision ID: status_columns_to_enum
+Revises: add_api_key_masked
+Create Date: 2025-02-14
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'status_columns_to_enum'
+down_revision = 'add_api_key_masked'
+
+# (表名, 列名, 取值, 默认值, 是否可空)
+ENUM_COLUMNS = [
+    ('tb_user_configs', 'persona', ('admin', 'planner', 'geek'), 'admin', True),
+    ('tb_buildings', 'status', ('normal', 'abnormal', 'high_risk'), 'normal', True),
+    ('tb_ai_conversations', 'role', ('system', 'user', 'assistant'), None, False),
+    ('tb_operation_logs', 'status', ('success', 'failed'), 'success', True),
+    ('tb_simulation_records', 'status', ('pending', 'completed', 'failed'), 'pending', True),
+    ('tb_city_events', 'status', ('active', 'monitoring', 'resolved'), 'active', True),
+    ('tb_execution_configs', 'execution_mode', ('auto', 'confirm', 'manual'), 'auto', True),
+]
+
+
+def upgrade():
+    """Upgrade: VARCHAR(20) 状态字段改为原生 ENUM（1字节存储）"""
+    for table, column, values, default, nullable in ENUM_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.String(20),
+            type_=sa.Enum(*values, name=column),
+            existing_nullable=nullable,
+            server_default=default,
+        )
+
+
+def downgrade():
+    """Downgrade: 还原为 VARCHAR(20)"""
+    for table, column, values, default, nullable in ENUM_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            existing_type=sa.Enum(*values, name=column),
+            type_=sa.String(20),
+            existing_nullable=nullable,
+            server_default=default,
+        )
@@ -0,0 +1,27 @@
+"""add rate limit settings to ai providers
+
+Revision ID: add_provider_rate_limits
+Revises: status_columns_to_enum
+Create Date: 2025-02-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_provider_rate_limits'
+down_revision = 'status_columns_to_enum'
+
+
+def upgrade():
+    """Upgrade: 新增Provider限流配置列"""
+    op.add_column('tb_ai_providers', sa.Column('rate_limit_rps', sa.DECIMAL(8, 2), comment='每秒请求数上限（为空使用默认值）'))
+    op.add_column('tb_ai_providers', sa.Column('rate_limit_burst', sa.Integer, comment='突发请求数上限'))
+    op.add_column('tb_ai_providers', sa.Column('max_concurrency', sa.Integer, comment='最大并发请求数'))
+
+
+def downgrade():
+    """Downgrade: 删除Provider限流配置列"""
+    op.drop_column('tb_ai_providers', 'max_concurrency')
+    op.drop_column('tb_ai_providers', 'rate_limit_burst')
+    op.drop_column('tb_ai_providers', 'rate_limit_rps')
@@ -0,0 +1,35 @@
+"""add composite and fulltext indexes for building search
+
+Revision ID: add_building_search_indexes
+Revises: add_provider_rate_limits
+Create Date: 2025-02-18
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_building_search_indexes'
+down_revision = 'add_provider_rate_limits'
+
+
+def upgrade():
+    """Upgrade: 建筑检索复合索引 + 关键词全文索引"""
+    # 城市/区县/类型等值过滤 + 高度范围，最左前缀同时覆盖原 idx_city_district
+    op.create_index(
+        'idx_city_district_category_height',
+        'tb_buildings',
+        ['city', 'district', 'category', 'height']
+    )
+    op.drop_index('idx_city_district', table_name='tb_buildings')
+    # 中文关键词检索使用 ngram 分词的全文索引
+    op.execute(
+        "ALTER TABLE tb_buildings "
+        "ADD FULLTEXT INDEX ft_building_text (name, address, description) WITH PARSER ngram"
+    )
+
+
+def downgrade():
+    """Downgrade: 恢复原索引"""
+    op.execute("ALTER TABLE tb_buildings DROP INDEX ft_building_text")
+    op.create_index('idx_city_district', 'tb_buildings', ['city', 'district'])
+    op.drop_index('idx_city_district_category_height', table_name='tb_buildings')
@@ -0,0 +1,31 @@
+"""add spatial point column for building radius search
+
+Revision ID: add_building_geom
+Revises: add_building_search_indexes
+Create Date: 2025-02-20
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'add_building_geom'
+down_revision = 'add_building_search_indexes'
+
+
+def upgrade():
+    """Upgrade: 由经纬度生成 POINT 列并建立空间索引"""
+    op.execute(
+        "ALTER TABLE tb_buildings "
+        "ADD COLUMN geom POINT SRID 4326 "
+        # SRID 4326 在MySQL中默认为纬度在前，显式指定经度在前的轴顺序
+        "GENERATED ALWAYS AS ("
+        "ST_PointFromText(CONCAT('POINT(', longitude, ' ', latitude, ')'), 4326, 'axis-order=long-lat')"
+        ") STORED NOT NULL "
+        "COMMENT '坐标点(空间索引)', "
+        "ADD SPATIAL INDEX idx_geom (geom)"
+    )
+
+
+def downgrade():
+    """Downgrade: 删除空间列及索引"""
+    op.execute("ALTER TABLE tb_buildings DROP INDEX idx_geom, DROP COLUMN geom")
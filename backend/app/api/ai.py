@@ -8,8 +8,9 @@ from sqlalchemy import select, update, delete
 from app.database import get_db
 from app.core.deps import get_current_user
 from app.core.security import encrypt_api_key
-from app.models import AIProvider
+from app.models import AIProvider, AIUsageStats
 from app.schemas import AIProviderCreate
+from app.services.ai_service import AIService, invalidate_default_provider_cache
 
 router = APIRouter(prefix="/ai", tags=["AI管理"])
 
@@ -25,7 +26,7 @@ async def list_providers(
     )
     providers = result.scalars().all()
 
-    # 隐藏API Key的完整内容
+    # 只返回数据库生成的API Key掩码
     return {
         "code": 200,
         "data": [
@@ -33,7 +34,7 @@ async def list_providers(
                 "id": p.id,
                 "provider_code": p.provider_code,
                 "provider_name": p.provider_name,
-                "api_key_encrypted": p.api_key_encrypted[-4:] if p.api_key_encrypted else "",
+                "api_key_masked": p.api_key_masked or "",
                 "is_enabled": p.is_enabled,
                 "is_default": p.is_default,
                 "priority": p.priority
@@ -77,6 +78,7 @@ async def add_provider(
 
     db.add(new_provider)
     await db.commit()
+    await invalidate_default_provider_cache(current_user.id)
     await db.refresh(new_provider)
 
     return {
@@ -115,6 +117,7 @@ async def set_default_provider(
     )
 
     await db.commit()
+    await invalidate_default_provider_cache(current_user.id)
 
     return {
         "code": 200,
@@ -137,6 +140,7 @@ async def delete_provider(
         )
     )
     await db.commit()
+    await invalidate_default_provider_cache(current_user.id)
 
     if result.rowcount == 0:
         raise HTTPException(
@@ -157,8 +161,6 @@ async def list_models(
     db: AsyncSession = Depends(get_db)
 ):
     """列出可用模型"""
-    from app.services.ai_service import AIService
-
     ai_service = AIService(db)
     models = await ai_service.list_available_models(
         user_id=current_user.id,
@@ -177,8 +179,6 @@ async def get_usage_stats(
     db: AsyncSession = Depends(get_db)
 ):
     """获取使用统计"""
-    from app.models import AIUsageStats
-
     result = await db.execute(
         select(AIUsageStats).where(AIUsageStats.user_id == current_user.id)
     )
@@ -3,7 +3,8 @@
 
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_, or_, delete as sql_delete
+import json
 import uuid
 from datetime import datetime
 import logging
@@ -12,9 +13,9 @@ logger = logging.getLogger(__name__)
 
 from app.database import get_db
 from app.core.deps import get_current_user
-from app.models import AIConversation, User, UserConfig
+from app.models import AIConversation, Building, User
 from app.services.ai_service import AIService
-from app.services.ai.providers import Message
+from app.services.ai.providers import ChatCompletionResponse, TokenUsage
 from app.services.mcp import get_mcp_manager, DataEnhancementClient
 from app.services.weather_scene_service import execute_weather_scene_action
 
@@ -40,11 +41,8 @@ async def chat_completion(
     )
     db.add(user_message)
 
-    # 获取用户配置
-    result = await db.execute(
-        select(UserConfig).where(UserConfig.user_id == current_user.id)
-    )
-    config = result.scalar_one_or_none()
+    # 获取用户配置（已随当前用户一并加载）
+    config = current_user.config
 
     # 构建对话历史
     history_result = await db.execute(
@@ -59,19 +57,19 @@ async def chat_completion(
     history = list(history_result.scalars().all())
 
     # 构建消息列表（排除最后一条，那是刚刚保存的当前用户消息）
+    # 直接构建OpenAI兼容的消息字典，Provider层无需再转换
     messages = []
     prev_messages = history[:-1]
 
     # 如果有之前的对话历史，添加system提示
     if prev_messages:
-        messages.append(Message(role="system", content="你是智慧城市控制大脑，负责理解用户自然语言指令并控制系统动作。"))
+        messages.append({"role": "system", "content": "你是智慧城市控制大脑，负责理解用户自然语言指令并控制系统动作。"})
 
     # 添加之前的对话消息
-    for msg in prev_messages:
-        messages.append(Message(role=msg.role, content=msg.content))
+    messages.extend({"role": msg.role, "content": msg.content} for msg in prev_messages)
 
     # 添加当前用户消息
-    messages.append(Message(role="user", content=message_content))
+    messages.append({"role": "user", "content": message_content})
 
     # 获取Function Calling工具定义
     tools = get_function_tools()
@@ -113,11 +111,10 @@ async def chat_completion(
                         break
 
                 # 模拟AI响应
-                from app.services.ai.providers import ChatCompletionResponse
                 response = ChatCompletionResponse(
                     content=f"好的，正在为您执行相关操作。",
                     model="rule-based",
-                    tokens_used={"total_tokens": 0},
+                    tokens_used=TokenUsage(0, 0, 0),
                     finish_reason="stop",
                     tool_calls=None
                 )
@@ -136,7 +133,7 @@ async def chat_completion(
             role="assistant",
             content=response.content,
             model_name=config.model_name if config else "glm-4-flash",
-            tokens_used=response.tokens_used.get("total_tokens", 0)
+            tokens_used=response.tokens_used.total_tokens
         )
         db.add(assistant_message)
         await db.commit()
@@ -151,7 +148,6 @@ async def chat_completion(
 
                 # 解析函数参数
                 try:
-                    import json
                     parameters = json.loads(function_args) if isinstance(function_args, str) else function_args
                 except:
                     parameters = {}
@@ -195,7 +191,7 @@ async def chat_completion(
                     "content": response.content
                 },
                 "actions": actions,  # 总是返回actions列表，即使为空
-                "tokens_used": response.tokens_used
+                "tokens_used": response.tokens_used.to_dict()
             }
         }
 
@@ -231,9 +227,6 @@ async def query_with_database_fallback(
     Returns:
         查询结果
     """
-    from app.models import Building
-    from sqlalchemy import and_, or_
-
     logger.info(f"🔍 数据库优先查询: {query_params}")
 
     try:
@@ -588,8 +581,6 @@ async def clear_chat_history(
     db: AsyncSession = Depends(get_db)
 ):
     """清空对话历史"""
-    from sqlalchemy import delete as sql_delete
-
     await db.execute(
         sql_delete(AIConversation)
         .where(
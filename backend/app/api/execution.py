@@ -3,11 +3,11 @@
 """
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 from app.database import get_db
-from app.models import ExecutionConfig, User
+from app.models import EXECUTION_MODES, ExecutionConfig, User
 from app.core.deps import get_current_user
 
 router = APIRouter(prefix="/api/v1/execution", tags=["执行配置"])
@@ -15,7 +15,7 @@ router = APIRouter(prefix="/api/v1/execution", tags=["执行配置"])
 
 class ExecutionConfigUpdate(BaseModel):
     """执行配置更新模型"""
-    execution_mode: Optional[str] = None  # auto, confirm, manual
+    execution_mode: Optional[Literal[EXECUTION_MODES]] = None  # auto, confirm, manual
     confirm_required_actions: Optional[list] = None
     auto_approve_actions: Optional[list] = None
     show_geek_mode: Optional[bool] = None
@@ -2,7 +2,7 @@
 地图瓦片API
 提供高德地图街道地图瓦片服务
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request, Response
 from typing import Optional
 import logging
 
@@ -12,16 +12,27 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/map", tags=["地图瓦片"])
 
+# 瓦片配置的浏览器缓存时间（秒），配置只随部署变化，过期后用ETag协商
+TILE_CONFIG_MAX_AGE = 86400
+
 
 @router.get("/tile-config")
-async def get_tile_config():
+async def get_tile_config(request: Request, response: Response):
     """
     获取地图瓦片配置
-    返回Cesium ImageryLayer所需的配置信息
+    返回Cesium ImageryLayer所需的配置信息（支持ETag协商缓存）
     """
     try:
         client = await get_amap_tile_client()
+        cache_headers = {
+            "ETag": client.provider_info_etag,
+            "Cache-Control": f"public, max-age={TILE_CONFIG_MAX_AGE}"
+        }
+        if request.headers.get("if-none-match") == client.provider_info_etag:
+            return Response(status_code=304, headers=cache_headers)
+
         provider_info = client.get_tile_provider_info()
+        response.headers.update(cache_headers)
 
         return {
             "status": "success",
@@ -55,7 +66,7 @@ async def reverse_geocode(
 
         return result
     except Exception as e:
-        logger.error(f"逆地理编码失败: {e}")
+        logger.exception(f"逆地理编码失败: {e}")
         return {
             "status": "error",
             "error": str(e)
@@ -78,7 +89,7 @@ async def search_nearby(
 
         return result
     except Exception as e:
-        logger.error(f"周边搜索失败: {e}")
+        logger.exception(f"周边搜索失败: {e}")
         return {
             "status": "error",
             "error": str(e)
@@ -10,7 +10,7 @@ from pathlib import Path
 
 from app.database import get_db
 from app.core.deps import get_current_user
-from app.models import User, UserConfig
+from app.models import PERSONAS, User, UserConfig
 from app.schemas import UserConfigResponse, UserUpdate, PasswordUpdate
 from app.core.security import verify_password, hash_password
 
@@ -196,10 +196,7 @@ async def get_user_config(
     db: AsyncSession = Depends(get_db)
 ):
     """获取用户配置"""
-    result = await db.execute(
-        select(UserConfig).where(UserConfig.user_id == current_user.id)
-    )
-    config = result.scalar_one_or_none()
+    config = current_user.config
 
     if not config:
         # 创建默认配置
@@ -229,10 +226,7 @@ async def update_user_config(
     db: AsyncSession = Depends(get_db)
 ):
     """更新用户配置"""
-    result = await db.execute(
-        select(UserConfig).where(UserConfig.user_id == current_user.id)
-    )
-    config = result.scalar_one_or_none()
+    config = current_user.config
 
     if not config:
         config = UserConfig(user_id=current_user.id)
@@ -244,6 +238,11 @@ async def update_user_config(
     if "model_name" in config_data:
         config.model_name = config_data["model_name"]
     if "persona" in config_data:
+        if config_data["persona"] not in PERSONAS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"无效的角色，可选值: {', '.join(PERSONAS)}"
+            )
         config.persona = config_data["persona"]
     if "temperature" in config_data:
         config.temperature = config_data["temperature"]
@@ -31,6 +31,9 @@ class Settings(BaseSettings):
     # API限流配置
     RATE_LIMIT_PER_MINUTE: int = 60
 
+    # LLM快速路径（无工具短对话直接POST，不经过SDK重试），默认关闭
+    LLM_FAST_PATH: bool = False
+
     # 加密配置 - 必须在.env中配置（32字节）
     ENCRYPTION_KEY: str
 
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Redis客户端（可选）
+
+配置了 REDIS_URL 时返回进程内共享的异步客户端，否则返回None，
+调用方据此退化为进程内实现。
+"""
+
+from typing import Optional
+
+from app.core.config import settings
+
+_redis_client = None
+
+
+def get_redis() -> Optional["redis.asyncio.Redis"]:
+    """获取共享的Redis客户端（未配置时返回None）"""
+    global _redis_client
+    if _redis_client is None and settings.REDIS_URL:
+        import redis.asyncio as redis
+        _redis_client = redis.from_url(settings.REDIS_URL)
+    return _redis_client
+
+
+async def close_redis():
+    """关闭Redis连接池"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.close()
+        _redis_client = None
@@ -4,8 +4,15 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import create_engine
+import orjson
 from app.core.config import settings
 
+
+def _orjson_serializer(value) -> str:
+    """JSON列序列化（orjson）"""
+    return orjson.dumps(value).decode()
+
+
 # 创建异步引擎
 engine = create_async_engine(
     settings.DATABASE_URL.replace("mysql+pymysql://", "mysql+aiomysql://"),
@@ -14,6 +21,10 @@ engine = create_async_engine(
     max_overflow=40,
     pool_pre_ping=True,
     pool_recycle=3600,
+    query_cache_size=1200,
+    insertmanyvalues_page_size=5000,
+    json_serializer=_orjson_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # 创建会话工厂
@@ -33,6 +44,10 @@ sync_engine = create_engine(
     max_overflow=40,
     pool_pre_ping=True,
     pool_recycle=3600,
+    query_cache_size=1200,
+    insertmanyvalues_page_size=5000,
+    json_serializer=_orjson_serializer,
+    json_deserializer=orjson.loads,
 )
 
 # 创建同步会话工厂
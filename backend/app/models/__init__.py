@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 """数据库模型"""
 
-from sqlalchemy import Column, String, Boolean, Integer, Text, DECIMAL, DateTime, Index, ForeignKey, JSON, Date, BigInteger
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, Integer, Text, DECIMAL, DateTime, Index, ForeignKey, JSON, Date, BigInteger, Computed, Enum
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.dialects.mysql import BOOLEAN
 import uuid
 import json
+from datetime import datetime
 
 from app.database import Base
 
@@ -15,6 +16,16 @@ def generate_uuid():
     return str(uuid.uuid4())
 
 
+# 低基数状态字段的取值（MySQL原生ENUM，按1字节存储）
+PERSONAS = ("admin", "planner", "geek")
+BUILDING_STATUSES = ("normal", "abnormal", "high_risk")
+CONVERSATION_ROLES = ("system", "user", "assistant")
+OPERATION_STATUSES = ("success", "failed")
+SIMULATION_STATUSES = ("pending", "completed", "failed")
+EVENT_STATUSES = ("active", "monitoring", "resolved")
+EXECUTION_MODES = ("auto", "confirm", "manual")
+
+
 class User(Base):
     """用户表"""
     __tablename__ = "tb_users"
@@ -31,9 +42,9 @@ class User(Base):
     created_at = Column(DateTime, nullable=False, comment="创建时间")
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
-    # 关系
-    config = relationship("UserConfig", back_populates="user", uselist=False)
-    ai_providers = relationship("AIProvider", back_populates="user")
+    # 关系（config为一对一，随用户一并JOIN加载；集合关系需显式selectinload）
+    config = relationship("UserConfig", back_populates="user", uselist=False, lazy="joined")
+    ai_providers = relationship("AIProvider", back_populates="user", lazy="raise")
 
 
 class UserConfig(Base):
@@ -44,7 +55,7 @@ class UserConfig(Base):
     user_id = Column(String(36), ForeignKey("tb_users.id", ondelete="CASCADE"), unique=True, nullable=False, comment="用户ID")
     provider = Column(String(50), default="zhipu", comment="AI提供商")
     model_name = Column(String(50), default="glm-4-flash", comment="AI模型名称")
-    persona = Column(String(20), default="admin", comment="角色: admin-管理员, planner-规划师, geek-极客")
+    persona = Column(Enum(*PERSONAS, name="persona", validate_strings=True), default="admin", comment="角色: admin-管理员, planner-规划师, geek-极客")
     temperature = Column(DECIMAL(3, 2), default=0.7, comment="温度参数")
     top_p = Column(DECIMAL(3, 2), default=0.9, comment="Top-P参数")
     auto_execute = Column(BOOLEAN, default=False, comment="是否自动执行指令")
@@ -54,7 +65,7 @@ class UserConfig(Base):
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
     # 关系
-    user = relationship("User", back_populates="config")
+    user = relationship("User", back_populates="config", lazy="raise")
 
 
 class AIProvider(Base):
@@ -65,17 +76,26 @@ class AIProvider(Base):
     user_id = Column(String(36), ForeignKey("tb_users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
     provider_code = Column(String(50), nullable=False, comment="提供商代码")
     provider_name = Column(String(100), nullable=False, comment="提供商名称")
-    api_key_encrypted = Column(Text, comment="加密的API Key")
-    api_secret_encrypted = Column(Text, comment="加密的API Secret")
+    # 密文仅在创建Provider客户端时需要，默认延迟加载（查询时用undefer显式加载）
+    api_key_encrypted = deferred(Column(Text, comment="加密的API Key"))
+    api_secret_encrypted = deferred(Column(Text, comment="加密的API Secret"))
+    api_key_masked = Column(
+        String(12),
+        Computed("CONCAT(LEFT(api_key_encrypted, 4), '****', RIGHT(api_key_encrypted, 4))", persisted=True),
+        comment="API Key掩码（数据库生成列）"
+    )
     base_url = Column(String(500), comment="自定义API地址")
     is_enabled = Column(BOOLEAN, default=True, comment="是否启用")
     is_default = Column(BOOLEAN, default=False, comment="是否为默认提供商")
     priority = Column(Integer, default=0, comment="优先级")
+    rate_limit_rps = Column(DECIMAL(8, 2), comment="每秒请求数上限（为空使用默认值）")
+    rate_limit_burst = Column(Integer, comment="突发请求数上限")
+    max_concurrency = Column(Integer, comment="最大并发请求数")
     created_at = Column(DateTime, nullable=False, comment="创建时间")
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
     # 关系
-    user = relationship("User", back_populates="ai_providers")
+    user = relationship("User", back_populates="ai_providers", lazy="raise")
 
     # 索引
     __table_args__ = (
@@ -120,10 +140,11 @@ class Building(Base):
     height = Column(DECIMAL(10, 2), comment="建筑高度(米)")
     longitude = Column(DECIMAL(11, 8), nullable=False, comment="经度")
     latitude = Column(DECIMAL(11, 8), nullable=False, comment="纬度")
+    # 空间列 geom 由数据库根据经纬度生成（带SPATIAL索引），ORM不映射
     address = Column(String(500), comment="详细地址")
     district = Column(String(100), comment="所属区县")
     city = Column(String(50), comment="所属城市")
-    status = Column(String(20), default="normal", comment="状态")
+    status = Column(Enum(*BUILDING_STATUSES, name="building_status"), default="normal", comment="状态")
     risk_level = Column(Integer, default=0, comment="风险等级")
     floors = Column(Integer, comment="楼层数")
     build_year = Column(Integer, comment="建成年份")
@@ -133,34 +154,42 @@ class Building(Base):
     created_at = Column(DateTime, nullable=False, comment="创建时间")
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
+    __table_args__ = (
+        Index('idx_city_district_category_height', 'city', 'district', 'category', 'height'),
+        Index('ft_building_text', 'name', 'address', 'description',
+              mysql_prefix='FULLTEXT', mysql_with_parser='ngram'),
+    )
+
 
 class AIConversation(Base):
     """AI对话记录表"""
     __tablename__ = "tb_ai_conversations"
 
+    # 按 created_at 月度分区：分区键需并入主键，分区表不支持外键
     id = Column(String(36), primary_key=True, default=generate_uuid, comment="对话ID")
-    user_id = Column(String(36), ForeignKey("tb_users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
+    user_id = Column(String(36), nullable=False, comment="用户ID")
     session_id = Column(String(36), nullable=False, comment="会话ID")
-    role = Column(String(20), nullable=False, comment="角色")
+    role = Column(Enum(*CONVERSATION_ROLES, name="conversation_role"), nullable=False, comment="角色")
     content = Column(Text, nullable=False, comment="对话内容")
     model_name = Column(String(50), comment="使用的模型")
     tokens_used = Column(Integer, comment="Token消耗量")
-    created_at = Column(DateTime, nullable=False, comment="创建时间")
+    created_at = Column(DateTime, primary_key=True, default=datetime.now, comment="创建时间")
 
 
 class OperationLog(Base):
     """操作日志表"""
     __tablename__ = "tb_operation_logs"
 
+    # 按 created_at 月度分区：分区键需并入主键，分区表不支持外键
     id = Column(String(36), primary_key=True, default=generate_uuid, comment="日志ID")
-    user_id = Column(String(36), ForeignKey("tb_users.id", ondelete="SET NULL"), comment="用户ID")
+    user_id = Column(String(36), comment="用户ID")
     operation_type = Column(String(50), nullable=False, comment="操作类型")
     operation_data = Column(Text, comment="操作数据(JSON格式)")
     ip_address = Column(String(50), comment="IP地址")
     user_agent = Column(Text, comment="用户代理")
-    status = Column(String(20), default="success", comment="状态")
+    status = Column(Enum(*OPERATION_STATUSES, name="operation_status"), default="success", comment="状态")
     error_message = Column(Text, comment="错误信息")
-    created_at = Column(DateTime, nullable=False, comment="创建时间")
+    created_at = Column(DateTime, primary_key=True, default=datetime.now, comment="创建时间")
 
 
 class AIUsageStats(Base):
@@ -180,6 +209,11 @@ class AIUsageStats(Base):
     created_at = Column(DateTime, nullable=False, comment="创建时间")
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
+    # 索引
+    __table_args__ = (
+        Index('uk_user_model_date', 'user_id', 'provider_code', 'model_code', 'date', unique=True),
+    )
+
 
 class SimulationRecord(Base):
     """空间模拟记录表"""
@@ -193,7 +227,7 @@ class SimulationRecord(Base):
     radius = Column(DECIMAL(10, 2), comment="半径(米)")
     affected_building_ids = Column(JSON, comment="受影响建筑ID列表")
     impact_summary = Column(JSON, comment="影响摘要")
-    status = Column(String(20), default="pending", comment="状态")
+    status = Column(Enum(*SIMULATION_STATUSES, name="simulation_status"), default="pending", comment="状态")
     created_at = Column(DateTime, nullable=False, comment="创建时间")
     updated_at = Column(DateTime, nullable=False, comment="更新时间")
 
@@ -210,7 +244,7 @@ class CityEvent(Base):
     latitude = Column(DECIMAL(11, 8), comment="纬度")
     radius = Column(DECIMAL(10, 2), comment="影响半径")
     severity = Column(Integer, comment="严重程度 1-5")
-    status = Column(String(20), default="active", comment="状态")
+    status = Column(Enum(*EVENT_STATUSES, name="event_status"), default="active", comment="状态")
     description = Column(Text, comment="描述")
     affected_areas = Column(JSON, comment="受影响区域")
     response_actions = Column(JSON, comment="响应措施")
@@ -240,7 +274,7 @@ class ExecutionConfig(Base):
 
     id = Column(String(36), primary_key=True, default=generate_uuid, comment="配置ID")
     user_id = Column(String(36), ForeignKey("tb_users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
-    execution_mode = Column(String(20), default="auto", comment="执行模式")
+    execution_mode = Column(Enum(*EXECUTION_MODES, name="execution_mode", validate_strings=True), default="auto", comment="执行模式")
     confirm_required_actions = Column(JSON, comment="需要确认的动作")
     auto_approve_actions = Column(JSON, comment="自动批准的动作")
     log_all_actions = Column(BOOLEAN, default=True, comment="记录所有动作")
@@ -2,9 +2,11 @@
 """Pydantic schemas for data validation"""
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
+from typing import Any, Literal, Optional
 from datetime import datetime
 
+from app.models import PERSONAS
+
 
 # 用户相关
 class UserBase(BaseModel):
@@ -27,15 +29,14 @@ class UserLogin(BaseModel):
 
 class UserResponse(UserBase):
     """用户响应"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     phone: Optional[str] = None
     avatar_url: Optional[str] = None
     status: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
-
 
 class UserUpdate(BaseModel):
     """更新用户信息"""
@@ -71,21 +72,22 @@ class AIProviderCreate(BaseModel):
 
 class AIProviderResponse(BaseModel):
     """AI Provider响应"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     provider_code: str
     provider_name: str
-    api_key_encrypted: str  # 只返回部分掩码
+    api_key_masked: Optional[str] = None  # 数据库生成的掩码
     is_enabled: bool
     is_default: bool
     priority: int
 
-    class Config:
-        from_attributes = True
-
 
 # AI模型相关
 class ModelInfoResponse(BaseModel):
     """模型信息响应"""
+    model_config = ConfigDict(from_attributes=True)
+
     code: str
     name: str
     description: str
@@ -97,9 +99,6 @@ class ModelInfoResponse(BaseModel):
     supports_vision: bool
     max_tokens: int
 
-    class Config:
-        from_attributes = True
-
 
 # 用户配置相关
 class UserConfigUpdate(BaseModel):
@@ -108,7 +107,7 @@ class UserConfigUpdate(BaseModel):
 
     provider: Optional[str] = None
     model_name: Optional[str] = None
-    persona: Optional[str] = None
+    persona: Optional[Literal[PERSONAS]] = None
     temperature: Optional[float] = None
     top_p: Optional[float] = None
     auto_execute: Optional[bool] = None
@@ -131,6 +130,8 @@ class UserConfigResponse(BaseModel):
 # 建筑相关
 class BuildingResponse(BaseModel):
     """建筑响应"""
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     name: str
     category: Optional[str]
@@ -142,9 +143,6 @@ class BuildingResponse(BaseModel):
     city: Optional[str]
     status: str
 
-    class Config:
-        from_attributes = True
-
 
 # AI对话相关
 class ChatMessage(BaseModel):
@@ -182,5 +180,19 @@ class ApiResponse(BaseModel):
     """API统一响应"""
     code: int
     message: str
-    data: Optional[dict] = None
+    data: Optional[Any] = None
     timestamp: str
+
+
+# 导入时预先构建响应模型的校验器，避免首个请求时再构建
+for _schema in (
+    UserResponse,
+    AIProviderResponse,
+    ModelInfoResponse,
+    UserConfigResponse,
+    BuildingResponse,
+    ChatResponse,
+    PaginatedResponse,
+    ApiResponse,
+):
+    _schema.model_rebuild()
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""基于aiohttp的OpenAI兼容客户端
+
+高并发下openai-python默认的httpx传输存在吞吐瓶颈，这里提供一个只实现
+chat.completions.create 的轻量客户端，直接POST到 {base_url}/chat/completions，
+并把响应解析回openai-python的数据模型，Provider代码无需感知差异。
+"""
+
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+from contextlib import contextmanager
+import asyncio
+
+import aiohttp
+import httpx
+import openai
+import orjson
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+
+# 进程内共享的aiohttp会话（需在事件循环中创建，首次请求时懒加载）
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    """获取共享的aiohttp会话"""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=200, limit_per_host=100, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=60, connect=10)
+        )
+    return _session
+
+
+async def close_aiohttp_session():
+    """关闭共享的aiohttp会话"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+# HTTP状态码 → openai-python异常类型（与SDK的映射一致，调用方按同一套异常处理）
+_STATUS_ERRORS = {
+    400: openai.BadRequestError,
+    401: openai.AuthenticationError,
+    403: openai.PermissionDeniedError,
+    404: openai.NotFoundError,
+    409: openai.ConflictError,
+    422: openai.UnprocessableEntityError,
+    429: openai.RateLimitError,
+}
+
+
+def _status_error(url: str, status: int, content: bytes) -> openai.APIStatusError:
+    """把上游错误响应转换为openai-python的APIStatusError子类"""
+    response = httpx.Response(status, request=httpx.Request("POST", url), content=content)
+    try:
+        body = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        body = content.decode("utf-8", "replace") or None
+    if status >= 500:
+        error_class = openai.InternalServerError
+    else:
+        error_class = _STATUS_ERRORS.get(status, openai.APIStatusError)
+    return error_class(f"Error code: {status} - {body}", response=response, body=body)
+
+
+@contextmanager
+def _translate_errors(url: str) -> Iterator[None]:
+    """把aiohttp的超时和连接错误转换为openai-python的异常"""
+    try:
+        yield
+    except asyncio.TimeoutError as e:
+        raise openai.APITimeoutError(request=httpx.Request("POST", url)) from e
+    except aiohttp.ClientError as e:
+        raise openai.APIConnectionError(request=httpx.Request("POST", url)) from e
+
+
+async def _post(url: str, body: Dict[str, Any], headers: Dict[str, str]) -> bytes:
+    """POST请求并返回响应体；HTTP错误、超时和连接错误转换为openai-python的异常"""
+    session = _get_session()
+    with _translate_errors(url):
+        async with session.post(url, data=orjson.dumps(body), headers=headers) as response:
+            content = await response.read()
+            if response.status >= 400:
+                raise _status_error(url, response.status, content)
+            return content
+
+
+async def post_chat_completion_raw(base_url: str, api_key: str, body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    直接POST聊天补全请求，返回orjson解析的原始字典（跳过pydantic模型校验）
+
+    不经过SDK，因此没有自动重试；错误以openai-python的异常类型抛出。
+    部分网关出错时仍返回200和错误体，缺少choices时抛出APIResponseValidationError
+    """
+    url = f"{base_url.rstrip('/')}/chat/completions"
+    content = await _post(url, body, {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    })
+    data = orjson.loads(content)
+    if not isinstance(data, dict) or not data.get("choices"):
+        raise openai.APIResponseValidationError(
+            response=httpx.Response(200, request=httpx.Request("POST", url), content=content),
+            body=data,
+            message=f"上游响应缺少choices: {data}"
+        )
+    return data
+
+
+class _Completions:
+    """chat.completions 命名空间"""
+
+    def __init__(self, url: str, headers: Dict[str, str]):
+        self._url = url
+        self._headers = headers
+
+    async def create(self, **params: Any):
+        """创建聊天补全，stream=True 时返回异步迭代器"""
+        # 与openai-python一致：不发送值为None的参数
+        body = {k: v for k, v in params.items() if v is not None}
+        if body.get("stream"):
+            return self._stream(body)
+
+        content = await _post(self._url, body, self._headers)
+        return ChatCompletion.model_validate(orjson.loads(content))
+
+    async def _stream(self, body: Dict[str, Any]) -> AsyncIterator[ChatCompletionChunk]:
+        """解析SSE流（错误转换与非流式请求一致）"""
+        session = _get_session()
+        with _translate_errors(self._url):
+            async with session.post(self._url, data=orjson.dumps(body), headers=self._headers) as response:
+                if response.status >= 400:
+                    raise _status_error(self._url, response.status, await response.read())
+                async for raw_line in response.content:
+                    line = raw_line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == b"[DONE]":
+                        break
+                    yield ChatCompletionChunk.model_validate(orjson.loads(payload))
+
+
+class _Chat:
+    """chat 命名空间"""
+
+    def __init__(self, completions: _Completions):
+        self.completions = completions
+
+
+class AiohttpOpenAIClient:
+    """只包含 chat.completions.create 的OpenAI兼容客户端"""
+
+    def __init__(self, api_key: str, base_url: str):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        self.chat = _Chat(_Completions(f"{self.base_url}/chat/completions", headers))
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""LLM响应缓存
+
+对确定性请求（temperature≈0、非流式、不带工具）按请求内容做SHA-256精确匹配，
+命中时直接返回缓存的响应，跳过上游LLM调用。
+配置了 REDIS_URL 时使用Redis，否则退化为进程内LRU。
+精确缓存未命中时，再按提示词向量的余弦相似度查找语义缓存。
+流式响应按分片缓存，重复请求直接回放。
+"""
+
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Protocol, Sequence, Tuple
+)
+from collections import OrderedDict
+import functools
+import hashlib
+import json
+import math
+import time
+
+import orjson
+
+from app.core.redis import get_redis
+
+
+# 低于该温度视为确定性请求
+CACHEABLE_MAX_TEMPERATURE = 0.01
+# 默认缓存时长（秒）
+DEFAULT_TTL = 3600
+# 语义缓存命中阈值（余弦相似度）
+SEMANTIC_THRESHOLD = 0.97
+
+
+class CacheBackend(Protocol):
+    """缓存后端协议"""
+
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+class MemoryLRUBackend:
+    """进程内LRU缓存（带过期时间）"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Redis缓存"""
+
+    def __init__(self, client):
+        self.redis = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.redis.set(key, value, ex=ttl)
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(key)
+
+    async def get_list(self, key: str) -> Optional[List[bytes]]:
+        items = await self.redis.lrange(key, 0, -1)
+        return items or None
+
+    async def set_list(self, key: str, values: List[bytes], ttl: int) -> None:
+        # RPUSH + EXPIRE 原子执行，避免留下无过期时间的列表
+        await self.redis.eval(_RPUSH_EXPIRE_SCRIPT, 1, key, ttl, *values)
+
+
+# 先删除旧列表再写入分片并设置过期时间
+_RPUSH_EXPIRE_SCRIPT = """
+redis.call('DEL', KEYS[1])
+redis.call('RPUSH', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class LLMCache:
+    """LLM响应缓存"""
+
+    KEY_PREFIX = "llm:resp:"
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def make_key(
+        cls,
+        provider_code: str,
+        model: str,
+        messages: Sequence[Mapping[str, str]],
+        temperature: float,
+        tools: Optional[List[dict]] = None,
+        stream: bool = False,
+        max_tokens: Optional[int] = None,
+        **params: Any
+    ) -> Optional[str]:
+        """生成缓存键，不可缓存的请求返回None
+
+        max_tokens 及其他影响生成结果的参数（top_p、stop等）一并参与哈希
+        """
+        if temperature > CACHEABLE_MAX_TEMPERATURE or stream or tools:
+            return None
+        payload = json.dumps(
+            {
+                "provider": provider_code,
+                "model": model,
+                "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+                "tools": tools,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "params": {k: v for k, v in sorted(params.items()) if v is not None},
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str
+        )
+        return cls.KEY_PREFIX + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存（后端异常时按未命中处理）"""
+        try:
+            raw = await self.backend.get(key)
+        except Exception:
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return orjson.loads(raw)
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: int = DEFAULT_TTL) -> None:
+        """写入缓存（写入失败不影响主流程）"""
+        try:
+            await self.backend.set(key, orjson.dumps(value), ttl)
+        except Exception:
+            pass
+
+    async def delete(self, key: str) -> None:
+        """删除缓存"""
+        await self.backend.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def _normalize(vector: Sequence[float]) -> Tuple[float, ...]:
+    """L2归一化，之后余弦相似度即点积"""
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return tuple(x / norm for x in vector)
+
+
+class SemanticCache:
+    """语义缓存（进程内向量表，线性扫描）
+
+    按 提供商+模型 分桶，桶内保存 (归一化向量, 响应字典, 过期时间)，
+    超过容量时淘汰最早写入的条目。
+    只处理单轮请求：多轮对话的回答依赖历史消息，仅按最后一问匹配会串答。
+    """
+
+    def __init__(self, maxsize: int = 512, threshold: float = SEMANTIC_THRESHOLD):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self._buckets: Dict[Tuple[str, str], List[tuple]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def is_single_turn(messages: Sequence[Mapping[str, str]]) -> bool:
+        """只有system提示和恰好一条用户消息"""
+        roles = [m["role"] for m in messages]
+        return roles.count("user") == 1 and all(role in ("system", "user") for role in roles)
+
+    @staticmethod
+    def prompt_text(messages: Sequence[Mapping[str, str]]) -> str:
+        """取 system提示 + 用户输入 作为语义匹配文本"""
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user = next((m["content"] for m in messages if m["role"] == "user"), "")
+        return f"{system}\n{user}" if system else user
+
+    async def get(
+        self,
+        scope: Tuple[str, str],
+        embed: Callable[[str], Awaitable[List[float]]],
+        messages: Sequence[Mapping[str, str]]
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[float, ...]]]:
+        """查找相似请求的缓存响应，同时返回查询向量供写入复用
+
+        多轮请求不查询也不返回向量，调用方因此也不会写入
+        """
+        if not self.is_single_turn(messages):
+            return None, None
+        try:
+            query = _normalize(await embed(self.prompt_text(messages)))
+        except Exception:
+            return None, None
+
+        now = time.monotonic()
+        bucket = self._buckets.get(scope, [])
+        bucket[:] = [entry for entry in bucket if entry[2] >= now]
+
+        best_score, best_value = 0.0, None
+        for vector, value, _ in bucket:
+            score = sum(a * b for a, b in zip(query, vector))
+            if score > best_score:
+                best_score, best_value = score, value
+
+        if best_value is not None and best_score >= self.threshold:
+            self.hits += 1
+            return best_value, query
+        self.misses += 1
+        return None, query
+
+    def set(
+        self,
+        scope: Tuple[str, str],
+        vector: Tuple[float, ...],
+        value: Dict[str, Any],
+        ttl: int = DEFAULT_TTL
+    ) -> None:
+        """写入语义缓存"""
+        bucket = self._buckets.setdefault(scope, [])
+        bucket.append((vector, value, time.monotonic() + ttl))
+        if len(bucket) > self.maxsize:
+            del bucket[:len(bucket) - self.maxsize]
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+STREAM_KEY_PREFIX = "llm:stream:"
+
+
+def generate_streaming_cache_key(
+    provider_code: str,
+    model: str,
+    messages: Sequence[Mapping[str, str]],
+    temperature: float,
+    max_tokens: Optional[int] = None,
+    tools: Optional[List[dict]] = None,
+    **params: Any
+) -> Optional[str]:
+    """生成流式缓存键（与精确缓存同一哈希，仅前缀不同）"""
+    key = LLMCache.make_key(
+        provider_code, model, messages, temperature,
+        tools=tools, max_tokens=max_tokens, **params
+    )
+    if key is None:
+        return None
+    return STREAM_KEY_PREFIX + key[len(LLMCache.KEY_PREFIX):]
+
+
+async def get_streaming_cache(key: str) -> Optional[List[str]]:
+    """读取缓存的流式分片"""
+    backend = get_llm_cache().backend
+    try:
+        if isinstance(backend, RedisBackend):
+            items = await backend.get_list(key)
+            return [item.decode("utf-8") for item in items] if items else None
+        raw = await backend.get(key)
+        return orjson.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+async def set_streaming_cache(key: str, chunks: List[str], ttl: int = DEFAULT_TTL) -> None:
+    """写入流式分片"""
+    if not chunks:
+        return
+    backend = get_llm_cache().backend
+    try:
+        if isinstance(backend, RedisBackend):
+            await backend.set_list(key, [chunk.encode("utf-8") for chunk in chunks], ttl)
+        else:
+            await backend.set(key, orjson.dumps(chunks), ttl)
+    except Exception:
+        pass
+
+
+def streaming_cache(func: Callable[..., AsyncIterator[str]]) -> Callable[..., AsyncIterator[str]]:
+    """流式聊天缓存装饰器
+
+    命中时回放缓存分片；未命中时边转发边记录，上游正常结束后写入缓存
+    （中途异常或客户端断开不写入，避免缓存残缺响应）。
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, messages, model, temperature=0.7, max_tokens=2000, **kwargs):
+        key = generate_streaming_cache_key(
+            self.provider_code, model, messages, temperature, max_tokens, **kwargs
+        )
+        if key is None:
+            async for chunk in func(self, messages, model, temperature, max_tokens, **kwargs):
+                yield chunk
+            return
+
+        cached = await get_streaming_cache(key)
+        if cached:
+            for chunk in cached:
+                yield chunk
+            return
+
+        chunks: List[str] = []
+        async for chunk in func(self, messages, model, temperature, max_tokens, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        await set_streaming_cache(key, chunks)
+
+    return wrapper
+
+
+# 全局缓存实例（首次使用时创建）
+_llm_cache: Optional[LLMCache] = None
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    """获取LLM响应缓存实例"""
+    global _llm_cache
+    if _llm_cache is None:
+        client = get_redis()
+        backend = RedisBackend(client) if client is not None else MemoryLRUBackend()
+        _llm_cache = LLMCache(backend)
+    return _llm_cache
+
+
+def get_semantic_cache() -> SemanticCache:
+    """获取语义缓存实例"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
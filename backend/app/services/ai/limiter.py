@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""AI Provider调用限流
+
+按 (提供商, API Key) 维度限制上游请求：令牌桶平滑请求速率，
+信号量限制同时在途的请求数，避免突发流量触发上游429和连接池超时。
+配置了Redis时限流状态保存在Redis中，多个后端实例共享同一配额。
+"""
+
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitConfig:
+    """限流配置"""
+    requests_per_second: float = 10.0  # 平均每秒请求数
+    burst: int = 20                    # 令牌桶容量（允许的突发请求数）
+    max_concurrency: int = 50          # 最大并发请求数
+
+    @classmethod
+    def from_values(
+        cls,
+        requests_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ) -> "RateLimitConfig":
+        """由可能为空的配置值构建（为空时使用默认值）"""
+        default = cls()
+        return cls(
+            requests_per_second=requests_per_second or default.requests_per_second,
+            burst=burst or default.burst,
+            max_concurrency=max_concurrency or default.max_concurrency
+        )
+
+
+class AsyncRateLimiter:
+    """令牌桶 + 信号量限流器"""
+
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self._tokens = float(config.burst)
+        self._updated_at = time.monotonic()
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+
+    async def _take_token(self):
+        """获取一个令牌，不足时等待补充"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(
+                self.config.burst,
+                self._tokens + (now - self._updated_at) * self.config.requests_per_second
+            )
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.config.requests_per_second)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """占用一个并发名额并消耗一个令牌"""
+        async with self._semaphore:
+            await self._take_token()
+            yield
+
+
+# 原子地检查并发名额和令牌：成功返回0，否则返回建议等待的毫秒数
+# KEYS[1]: 令牌桶(hash)  KEYS[2]: 并发租约(zset)
+# ARGV: 每秒请求数, 桶容量, 最大并发, 租约毫秒, 租约ID
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = t[1] * 1000 + math.floor(t[2] / 1000)
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local lease = tonumber(ARGV[4])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+if redis.call('ZCARD', KEYS[2]) >= capacity then
+    return 50
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate / 1000)
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    return math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+redis.call('ZADD', KEYS[2], now + lease, ARGV[5])
+redis.call('PEXPIRE', KEYS[2], lease)
+return 0
+"""
+
+
+class RedisRateLimiter:
+    """基于Redis的分布式令牌桶 + 信号量限流器
+
+    并发名额以带过期时间的租约保存在有序集合中，实例异常退出时租约自动过期；
+    Redis不可用时退化为进程内限流。
+    """
+
+    # 单个租约最长持有时间（毫秒），覆盖长时间的流式响应
+    LEASE_MS = 120_000
+    # 最长排队等待时间（秒）
+    MAX_WAIT = 30
+
+    def __init__(self, client, name: str, config: RateLimitConfig):
+        self.client = client
+        self.config = config
+        self._bucket_key = f"llm:ratelimit:{name}:bucket"
+        self._lease_key = f"llm:ratelimit:{name}:leases"
+        self._script = client.register_script(_ACQUIRE_SCRIPT)
+        self._fallback = AsyncRateLimiter(config)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[None]:
+        """获取分布式并发名额和令牌"""
+        lease_id = uuid.uuid4().hex
+        deadline = time.monotonic() + self.MAX_WAIT
+        try:
+            while True:
+                wait_ms = await self._script(
+                    keys=[self._bucket_key, self._lease_key],
+                    args=[
+                        self.config.requests_per_second,
+                        self.config.burst,
+                        self.config.max_concurrency,
+                        self.LEASE_MS,
+                        lease_id
+                    ]
+                )
+                if int(wait_ms) == 0:
+                    break
+                if time.monotonic() >= deadline:
+                    raise TimeoutError("AI Provider限流等待超时")
+                await asyncio.sleep(int(wait_ms) / 1000)
+        except TimeoutError:
+            raise
+        except Exception as e:
+            logger.warning(f"Redis限流不可用，使用进程内限流: {e}")
+            async with self._fallback.acquire():
+                yield
+            return
+
+        try:
+            yield
+        finally:
+            try:
+                await self.client.zrem(self._lease_key, lease_id)
+            except Exception:
+                pass
+
+
+# 按 (provider_code, api_key哈希) 共享的限流器
+_LIMITERS: Dict[Tuple[str, str], Union[AsyncRateLimiter, RedisRateLimiter]] = {}
+
+
+def get_rate_limiter(
+    provider_code: str,
+    api_key: str,
+    config: RateLimitConfig
+) -> Union[AsyncRateLimiter, RedisRateLimiter]:
+    """获取（或创建）指定Provider和API Key的限流器，配置变化时重建"""
+    key = (provider_code, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16])
+    limiter = _LIMITERS.get(key)
+    if limiter is None or limiter.config != config:
+        client = get_redis()
+        if client is not None:
+            limiter = RedisRateLimiter(client, f"{key[0]}:{key[1]}", config)
+        else:
+            limiter = AsyncRateLimiter(config)
+        _LIMITERS[key] = limiter
+    return limiter
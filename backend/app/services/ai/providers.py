@@ -2,29 +2,143 @@
 """AI服务 - 抽象基类和具体实现"""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, AsyncIterator
+from typing import List, Dict, Any, Optional, AsyncIterator, Sequence, ClassVar, Tuple, TypedDict
+from collections import OrderedDict
 from dataclasses import dataclass
+import hashlib
+import httpx
 from openai import AsyncOpenAI
 
+from app.services.ai.cache import streaming_cache
+from app.services.ai.limiter import RateLimitConfig, get_rate_limiter
+
+
+# 默认连接池配置（httpx默认值在并发下容易触发PoolTimeout）
+DEFAULT_HTTP_LIMITS = httpx.Limits(
+    max_connections=200,
+    max_keepalive_connections=100,
+    keepalive_expiry=30
+)
+DEFAULT_HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# 按base_url共享的HTTP客户端（HTTP/2多路复用 + 连接池）
+_shared_http_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_shared_http_client(
+    base_url: str,
+    limits: Optional[httpx.Limits] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    http2: bool = True
+) -> httpx.AsyncClient:
+    """获取指定base_url共享的HTTP客户端（连接池和协议配置在首次创建时生效）"""
+    client = _shared_http_clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=http2,
+            limits=limits or DEFAULT_HTTP_LIMITS,
+            timeout=timeout or DEFAULT_HTTP_TIMEOUT
+        )
+        _shared_http_clients[base_url] = client
+    return client
+
+
+# 按 (base_url, api_key哈希) 缓存的AsyncOpenAI客户端（LRU），避免每次请求重新创建
+# 淘汰时直接丢弃即可：连接池属于按base_url共享的httpx客户端，不能随单个客户端关闭
+OPENAI_CLIENT_CACHE_MAXSIZE = 256
+_openai_clients: "OrderedDict[Tuple[str, str], AsyncOpenAI]" = OrderedDict()
+
+
+def get_openai_client(
+    base_url: str,
+    api_key: str,
+    limits: Optional[httpx.Limits] = None,
+    timeout: Optional[httpx.Timeout] = None,
+    http2: bool = True
+) -> AsyncOpenAI:
+    """获取（或创建）指定base_url和api_key的AsyncOpenAI客户端"""
+    key = (base_url, hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16])
+    client = _openai_clients.get(key)
+    if client is None or client.is_closed():
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=get_shared_http_client(base_url, limits, timeout, http2)
+        )
+        _openai_clients[key] = client
+    _openai_clients.move_to_end(key)
+    while len(_openai_clients) > OPENAI_CLIENT_CACHE_MAXSIZE:
+        _openai_clients.popitem(last=False)
+    return client
 
-@dataclass
+
+async def close_shared_http_clients():
+    """关闭所有共享的HTTP客户端"""
+    _openai_clients.clear()
+    clients = list(_shared_http_clients.values())
+    _shared_http_clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+class ApiMessage(TypedDict):
+    """OpenAI兼容的消息字典，Provider直接透传给上游"""
+    role: str
+    content: str
+
+
+@dataclass(frozen=True)
 class Message:
     """消息数据类"""
+    __slots__ = ("role", "content")
     role: str
     content: str
 
+    def as_api_dict(self) -> ApiMessage:
+        """转换为OpenAI兼容的消息字典"""
+        return {"role": self.role, "content": self.content}
+
+
+@dataclass
+class TokenUsage:
+    """Token用量"""
+    __slots__ = ("input_tokens", "output_tokens", "total_tokens")
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+
+    @classmethod
+    def from_openai(cls, usage) -> "TokenUsage":
+        """由OpenAI响应的usage构建（部分Provider不返回usage）"""
+        if usage is None:
+            return cls(0, 0, 0)
+        return cls(usage.prompt_tokens, usage.completion_tokens, usage.total_tokens)
+
+    def to_dict(self) -> Dict[str, int]:
+        """转换为API响应字典"""
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "total_tokens": self.total_tokens
+        }
+
 
 @dataclass
 class ChatCompletionResponse:
     """聊天响应数据类"""
     content: str
     model: str
-    tokens_used: Dict[str, int]
+    tokens_used: TokenUsage
     finish_reason: str
     tool_calls: List[Dict[str, Any]] = None
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChatCompletionResponse":
+        """由 asdict() 的结果还原（用于响应缓存）"""
+        return cls(**{**data, "tokens_used": TokenUsage(**data["tokens_used"])})
 
-@dataclass
+
+@dataclass(frozen=True)
 class ModelInfo:
     """模型信息"""
     code: str
@@ -38,10 +152,50 @@ class ModelInfo:
     supports_vision: bool
     max_tokens: int
 
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为API响应字典"""
+        return {
+            "code": self.code,
+            "name": self.name,
+            "description": self.description,
+            "context_length": self.context_length,
+            "is_free": self.is_free,
+            "input_price": float(self.input_price) if self.input_price else 0,
+            "output_price": float(self.output_price) if self.output_price else 0,
+            "supports_function_calling": self.supports_function_calling,
+            "supports_vision": self.supports_vision,
+            "max_tokens": self.max_tokens
+        }
+
 
 class BaseAIProvider(ABC):
     """AI Provider抽象基类"""
 
+    # 子类必须以类属性声明的常量
+    provider_code: ClassVar[str]       # 提供商代码
+    provider_name: ClassVar[str]       # 提供商名称
+    default_base_url: ClassVar[str]    # 默认API地址
+
+    # 可用模型列表及其预构建的响应字典
+    _MODELS: ClassVar[Tuple[ModelInfo, ...]] = ()
+    _MODELS_JSON: ClassVar[Tuple[Dict[str, Any], ...]] = ()
+
+    # 向量模型（用于语义缓存），None 表示不支持
+    embedding_model: ClassVar[Optional[str]] = None
+
+    # 是否解析响应中的工具调用
+    supports_tool_calls_parsing: ClassVar[bool] = False
+
+    # 是否启用HTTP/2多路复用（部分国内网关仅支持HTTP/1.1，默认关闭）
+    supports_http2: ClassVar[bool] = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for attr in ("provider_code", "provider_name", "default_base_url"):
+            if not isinstance(getattr(cls, attr, None), str):
+                raise TypeError(f"{cls.__name__} 必须定义类属性 {attr}")
+        cls._MODELS_JSON = tuple(m.to_dict() for m in cls._MODELS)
+
     def __init__(
         self,
         api_key: str,
@@ -50,35 +204,49 @@ class BaseAIProvider(ABC):
     ):
         self.api_key = api_key
         self.base_url = base_url or self.default_base_url
+        # 连接池配置，可按Provider的SLA通过参数覆盖
+        self.http_limits = kwargs.get("http_limits") or DEFAULT_HTTP_LIMITS
+        self.http_timeout = kwargs.get("http_timeout") or DEFAULT_HTTP_TIMEOUT
+        self.http2 = kwargs.get("http2", self.supports_http2)
+        # 传输后端: httpx（openai-python默认）或 aiohttp（高并发场景）
+        self.transport_backend = kwargs.get("transport_backend", "httpx")
+        # 无工具短对话的快速路径（aiohttp直接POST，无SDK重试），需显式开启
+        self.fast_path = kwargs.get("fast_path", False)
         self.client = self._init_client()
+        # 按 (提供商, API Key) 共享的限流器
+        self._limiter = get_rate_limiter(
+            self.provider_code,
+            api_key or "",
+            RateLimitConfig.from_values(
+                requests_per_second=kwargs.get("rate_limit_rps"),
+                burst=kwargs.get("rate_limit_burst"),
+                max_concurrency=kwargs.get("max_concurrency")
+            )
+        )
 
-    @property
-    @abstractmethod
-    def provider_code(self) -> str:
-        """提供商代码"""
-        pass
-
-    @property
-    @abstractmethod
-    def provider_name(self) -> str:
-        """提供商名称"""
-        pass
-
-    @property
-    @abstractmethod
-    def default_base_url(self) -> str:
-        """默认API地址"""
-        pass
-
-    @abstractmethod
     def _init_client(self):
         """初始化客户端"""
-        pass
+        return self._build_client(self.base_url)
+
+    def _build_client(self, base_url: str):
+        """按传输后端创建客户端（httpx后端复用进程内缓存的AsyncOpenAI实例）"""
+        # 实际请求地址（Anthropic等Provider会覆盖base_url）
+        self.api_base_url = base_url
+        if self.transport_backend == "aiohttp":
+            from app.services.ai.aiohttp_transport import AiohttpOpenAIClient
+            return AiohttpOpenAIClient(api_key=self.api_key, base_url=base_url)
+        return get_openai_client(
+            base_url,
+            self.api_key,
+            self.http_limits,
+            self.http_timeout,
+            http2=self.http2
+        )
 
     @abstractmethod
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
@@ -90,7 +258,7 @@ class BaseAIProvider(ABC):
 
     async def stream_chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
@@ -100,61 +268,33 @@ class BaseAIProvider(ABC):
         # 默认不支持流式
         raise NotImplementedError("Streaming not supported")
 
-    async def list_models(self) -> List[ModelInfo]:
-        """列出可用模型"""
-        raise NotImplementedError("Model listing not supported")
-
-
-class ZhipuAIProvider(BaseAIProvider):
-    """智谱AI Provider"""
-
-    @property
-    def provider_code(self) -> str:
-        return "zhipu"
-
-    @property
-    def provider_name(self) -> str:
-        return "智谱AI"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://open.bigmodel.cn/api/paas/v4"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
-
-    async def chat_completion(
+    async def _openai_compat_chat(
         self,
-        messages: List[Message],
+        *,
+        messages: Sequence[ApiMessage],
         model: str,
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
+        temperature: float,
+        max_tokens: int,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        # 转换消息格式
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        # 调用API
-        response = await self.client.chat.completions.create(
-            model=model,
-            messages=api_messages,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            tools=tools,
-            **kwargs
-        )
+        """OpenAI兼容接口的聊天补全（各Provider共用）"""
+        async with self._limiter.acquire():
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                tools=tools,
+                **kwargs
+            )
 
-        # 解析响应
         choice = response.choices[0]
-        tool_calls = []
-        if choice.message.tool_calls:
+        message = choice.message
+
+        # 解析工具调用（无工具调用时不构建列表）
+        tool_calls = None
+        if self.supports_tool_calls_parsing and message.tool_calls:
             tool_calls = [
                 {
                     "id": tc.id,
@@ -164,660 +304,589 @@ class ZhipuAIProvider(BaseAIProvider):
                         "arguments": tc.function.arguments
                     }
                 }
-                for tc in choice.message.tool_calls
+                for tc in message.tool_calls
             ]
 
         return ChatCompletionResponse(
-            content=choice.message.content or "",
+            content=message.content or "",
             model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            },
+            tokens_used=TokenUsage.from_openai(response.usage),
             finish_reason=choice.finish_reason,
-            tool_calls=tool_calls if tool_calls else None
+            tool_calls=tool_calls
         )
 
-    async def stream_chat_completion(
+    async def chat_completion_fast(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         **kwargs
-    ):
-        """流式聊天"""
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+    ) -> ChatCompletionResponse:
+        """
+        无工具调用的简单请求快速路径：aiohttp直接POST，只解析需要的字段
+
+        仅在Provider或请求显式开启fast_path时使用；错误以与chat_completion相同的
+        openai-python异常抛出，但不经过SDK的自动重试
+        """
+        from app.services.ai.aiohttp_transport import post_chat_completion_raw
+
+        body = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **{k: v for k, v in kwargs.items() if v is not None}
+        }
+        async with self._limiter.acquire():
+            data = await post_chat_completion_raw(self.api_base_url, self.api_key, body)
+
+        choice = data["choices"][0]
+        usage = data.get("usage")
+        return ChatCompletionResponse(
+            content=choice["message"].get("content") or "",
+            model=data.get("model", model),
+            tokens_used=TokenUsage(
+                usage.get("prompt_tokens", 0),
+                usage.get("completion_tokens", 0),
+                usage.get("total_tokens", 0)
+            ) if usage else TokenUsage(0, 0, 0),
+            finish_reason=choice.get("finish_reason")
+        )
+
+    async def _openai_compat_stream(
+        self,
+        *,
+        messages: Sequence[ApiMessage],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """OpenAI兼容接口的流式聊天（各Provider共用，整个流期间占用并发名额）"""
+        async with self._limiter.acquire():
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                **kwargs
+            )
+
+            async for chunk in stream:
+                # 局部绑定，避免每个分片重复遍历pydantic属性；部分网关会发送无choices的分片
+                choices = chunk.choices
+                if not choices:
+                    continue
+                content = choices[0].delta.content
+                if content:
+                    yield content
+
+    async def create_embedding(self, text: str) -> List[float]:
+        """生成文本向量"""
+        if not self.embedding_model:
+            raise NotImplementedError("Embedding not supported")
+        response = await self.client.embeddings.create(
+            model=self.embedding_model,
+            input=text
+        )
+        return response.data[0].embedding
+
+    async def list_models(self) -> Sequence[ModelInfo]:
+        """列出可用模型（返回类级缓存，调用方不应修改）"""
+        return self._MODELS
+
+
+class ZhipuAIProvider(BaseAIProvider):
+    """智谱AI Provider"""
 
-        stream = await self.client.chat.completions.create(
+    provider_code = "zhipu"
+    provider_name = "智谱AI"
+    default_base_url = "https://open.bigmodel.cn/api/paas/v4"
+    embedding_model = "embedding-2"
+    supports_tool_calls_parsing = True
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="glm-4-flash",
+            name="GLM-4 Flash",
+            description="智谱AI免费模型，快速响应",
+            context_length=128000,
+            is_free=True,
+            input_price=0,
+            output_price=0,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=8000
+        ),
+        ModelInfo(
+            code="glm-4-plus",
+            name="GLM-4 Plus",
+            description="智谱AI增强模型，深度推理",
+            context_length=128000,
+            is_free=False,
+            input_price=0.01,
+            output_price=0.01,
+            supports_function_calling=True,
+            supports_vision=True,
+            max_tokens=8000
+        ),
+        ModelInfo(
+            code="glm-4-air",
+            name="GLM-4 Air",
+            description="智谱AI轻量模型",
+            context_length=128000,
+            is_free=False,
+            input_price=0.001,
+            output_price=0.001,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=8000
+        ),
+    )
+
+    async def chat_completion(
+        self,
+        messages: Sequence[ApiMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        tools: List[Dict[str, Any]] = None,
+        **kwargs
+    ) -> ChatCompletionResponse:
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
-            stream=True,
+            tools=tools,
             **kwargs
         )
 
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-
-    async def list_models(self) -> List[ModelInfo]:
-        """列出智谱AI可用模型"""
-        return [
-            ModelInfo(
-                code="glm-4-flash",
-                name="GLM-4 Flash",
-                description="智谱AI免费模型，快速响应",
-                context_length=128000,
-                is_free=True,
-                input_price=0,
-                output_price=0,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=8000
-            ),
-            ModelInfo(
-                code="glm-4-plus",
-                name="GLM-4 Plus",
-                description="智谱AI增强模型，深度推理",
-                context_length=128000,
-                is_free=False,
-                input_price=0.01,
-                output_price=0.01,
-                supports_function_calling=True,
-                supports_vision=True,
-                max_tokens=8000
-            ),
-            ModelInfo(
-                code="glm-4-air",
-                name="GLM-4 Air",
-                description="智谱AI轻量模型",
-                context_length=128000,
-                is_free=False,
-                input_price=0.001,
-                output_price=0.001,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=8000
-            )
-        ]
+    @streaming_cache
+    async def stream_chat_completion(
+        self,
+        messages: Sequence[ApiMessage],
+        model: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        **kwargs
+    ):
+        """流式聊天"""
+        async for content in self._openai_compat_stream(
+            messages=messages,
+            model=model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        ):
+            yield content
 
 
 class QwenAIProvider(BaseAIProvider):
     """通义千问 Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "qwen"
-
-    @property
-    def provider_name(self) -> str:
-        return "通义千问"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://dashscope.aliyuncs.com/compatible-mode/v1"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+    provider_code = "qwen"
+    provider_name = "通义千问"
+    default_base_url = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    embedding_model = "text-embedding-v2"
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="qwen-turbo",
+            name="Qwen Turbo",
+            description="通义千问超高速模型",
+            context_length=8000,
+            is_free=True,
+            input_price=0,
+            output_price=0,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=2000
+        ),
+        ModelInfo(
+            code="qwen-plus",
+            name="Qwen Plus",
+            description="通义千问增强版",
+            context_length=32000,
+            is_free=False,
+            input_price=0.008,
+            output_price=0.008,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=6000
+        ),
+    )
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            },
-            finish_reason=choice.finish_reason
-        )
-
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="qwen-turbo",
-                name="Qwen Turbo",
-                description="通义千问超高速模型",
-                context_length=8000,
-                is_free=True,
-                input_price=0,
-                output_price=0,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=2000
-            ),
-            ModelInfo(
-                code="qwen-plus",
-                name="Qwen Plus",
-                description="通义千问增强版",
-                context_length=32000,
-                is_free=False,
-                input_price=0.008,
-                output_price=0.008,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=6000
-            )
-        ]
-
 
 class DeepSeekAIProvider(BaseAIProvider):
     """DeepSeek Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "deepseek"
-
-    @property
-    def provider_name(self) -> str:
-        return "DeepSeek"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://api.deepseek.com/v1"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+    provider_code = "deepseek"
+    provider_name = "DeepSeek"
+    default_base_url = "https://api.deepseek.com/v1"
+    supports_http2 = True
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="deepseek-chat",
+            name="DeepSeek Chat",
+            description="DeepSeek对话模型",
+            context_length=16000,
+            is_free=True,
+            input_price=0.0001,
+            output_price=0.0002,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=4000
+        ),
+        ModelInfo(
+            code="deepseek-coder",
+            name="DeepSeek Coder",
+            description="DeepSeek代码模型",
+            context_length=16000,
+            is_free=True,
+            input_price=0.0001,
+            output_price=0.0002,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=4000
+        ),
+    )
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            },
-            finish_reason=choice.finish_reason
-        )
-
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="deepseek-chat",
-                name="DeepSeek Chat",
-                description="DeepSeek对话模型",
-                context_length=16000,
-                is_free=True,
-                input_price=0.0001,
-                output_price=0.0002,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=4000
-            ),
-            ModelInfo(
-                code="deepseek-coder",
-                name="DeepSeek Coder",
-                description="DeepSeek代码模型",
-                context_length=16000,
-                is_free=True,
-                input_price=0.0001,
-                output_price=0.0002,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=4000
-            )
-        ]
-
 
 class OpenAIProvider(BaseAIProvider):
     """OpenAI Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "openai"
-
-    @property
-    def provider_name(self) -> str:
-        return "OpenAI"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://api.openai.com/v1"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+    provider_code = "openai"
+    provider_name = "OpenAI"
+    default_base_url = "https://api.openai.com/v1"
+    embedding_model = "text-embedding-3-small"
+    supports_http2 = True
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="gpt-4o",
+            name="GPT-4o",
+            description="OpenAI最新多模态模型",
+            context_length=128000,
+            is_free=False,
+            input_price=0.005,
+            output_price=0.015,
+            supports_function_calling=True,
+            supports_vision=True,
+            max_tokens=4096
+        ),
+        ModelInfo(
+            code="gpt-4o-mini",
+            name="GPT-4o Mini",
+            description="OpenAI轻量级模型",
+            context_length=128000,
+            is_free=False,
+            input_price=0.00015,
+            output_price=0.0006,
+            supports_function_calling=True,
+            supports_vision=True,
+            max_tokens=16384
+        ),
+        ModelInfo(
+            code="gpt-3.5-turbo",
+            name="GPT-3.5 Turbo",
+            description="OpenAI经典模型",
+            context_length=16000,
+            is_free=False,
+            input_price=0.0005,
+            output_price=0.0015,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=4096
+        ),
+    )
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            },
-            finish_reason=choice.finish_reason
-        )
-
+    @streaming_cache
     async def stream_chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         **kwargs
     ):
         """流式聊天"""
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        stream = await self.client.chat.completions.create(
+        async for content in self._openai_compat_stream(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
-            stream=True,
             **kwargs
-        )
-
-        async for chunk in stream:
-            if chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
-
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="gpt-4o",
-                name="GPT-4o",
-                description="OpenAI最新多模态模型",
-                context_length=128000,
-                is_free=False,
-                input_price=0.005,
-                output_price=0.015,
-                supports_function_calling=True,
-                supports_vision=True,
-                max_tokens=4096
-            ),
-            ModelInfo(
-                code="gpt-4o-mini",
-                name="GPT-4o Mini",
-                description="OpenAI轻量级模型",
-                context_length=128000,
-                is_free=False,
-                input_price=0.00015,
-                output_price=0.0006,
-                supports_function_calling=True,
-                supports_vision=True,
-                max_tokens=16384
-            ),
-            ModelInfo(
-                code="gpt-3.5-turbo",
-                name="GPT-3.5 Turbo",
-                description="OpenAI经典模型",
-                context_length=16000,
-                is_free=False,
-                input_price=0.0005,
-                output_price=0.0015,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=4096
-            )
-        ]
+        ):
+            yield content
 
 
 class AnthropicProvider(BaseAIProvider):
     """Anthropic Claude Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "anthropic"
-
-    @property
-    def provider_name(self) -> str:
-        return "Anthropic"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://api.anthropic.com/v1"
+    provider_code = "anthropic"
+    provider_name = "Anthropic"
+    default_base_url = "https://api.anthropic.com/v1"
+    supports_http2 = True
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="claude-3-5-sonnet-20241022",
+            name="Claude 3.5 Sonnet",
+            description="Anthropic最强模型",
+            context_length=200000,
+            is_free=False,
+            input_price=0.003,
+            output_price=0.015,
+            supports_function_calling=True,
+            supports_vision=True,
+            max_tokens=8192
+        ),
+        ModelInfo(
+            code="claude-3-haiku-20240307",
+            name="Claude 3 Haiku",
+            description="Anthropic快速模型",
+            context_length=200000,
+            is_free=False,
+            input_price=0.00025,
+            output_price=0.00125,
+            supports_function_calling=True,
+            supports_vision=True,
+            max_tokens=4096
+        ),
+    )
 
     def _init_client(self):
         # Anthropic使用不同的SDK，这里使用OpenAI兼容的base_url
         # 实际使用时需要anthropic SDK或自定义HTTP客户端
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url="https://api.anthropic.com/v1"  # 代理地址
-        )
+        return self._build_client("https://api.anthropic.com/v1")  # 代理地址
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens,
-                "output_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            },
-            finish_reason=choice.finish_reason
-        )
-
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="claude-3-5-sonnet-20241022",
-                name="Claude 3.5 Sonnet",
-                description="Anthropic最强模型",
-                context_length=200000,
-                is_free=False,
-                input_price=0.003,
-                output_price=0.015,
-                supports_function_calling=True,
-                supports_vision=True,
-                max_tokens=8192
-            ),
-            ModelInfo(
-                code="claude-3-haiku-20240307",
-                name="Claude 3 Haiku",
-                description="Anthropic快速模型",
-                context_length=200000,
-                is_free=False,
-                input_price=0.00025,
-                output_price=0.00125,
-                supports_function_calling=True,
-                supports_vision=True,
-                max_tokens=4096
-            )
-        ]
-
 
 class ErnieProvider(BaseAIProvider):
     """百度文心一言 Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "ernie"
-
-    @property
-    def provider_name(self) -> str:
-        return "文心一言"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+    provider_code = "ernie"
+    provider_name = "文心一言"
+    default_base_url = "https://aip.baidubce.com/rpc/2.0/ai_custom/v1/wenxinworkshop/chat"
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="ernie-4.0-8k",
+            name="ERNIE 4.0",
+            description="百度文心大模型4.0",
+            context_length=8000,
+            is_free=False,
+            input_price=0.012,
+            output_price=0.012,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=2048
+        ),
+        ModelInfo(
+            code="ernie-3.5-8k",
+            name="ERNIE 3.5",
+            description="百度文心大模型3.5",
+            context_length=8000,
+            is_free=False,
+            input_price=0.008,
+            output_price=0.008,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=2048
+        ),
+        ModelInfo(
+            code="ernie-speed-8k",
+            name="ERNIE Speed",
+            description="百度文心快速模型",
+            context_length=8000,
+            is_free=True,
+            input_price=0,
+            output_price=0,
+            supports_function_calling=False,
+            supports_vision=False,
+            max_tokens=2048
+        ),
+    )
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "output_tokens": response.usage.completion_tokens if response.usage else 0,
-                "total_tokens": response.usage.total_tokens if response.usage else 0
-            },
-            finish_reason=choice.finish_reason
-        )
-
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="ernie-4.0-8k",
-                name="ERNIE 4.0",
-                description="百度文心大模型4.0",
-                context_length=8000,
-                is_free=False,
-                input_price=0.012,
-                output_price=0.012,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=2048
-            ),
-            ModelInfo(
-                code="ernie-3.5-8k",
-                name="ERNIE 3.5",
-                description="百度文心大模型3.5",
-                context_length=8000,
-                is_free=False,
-                input_price=0.008,
-                output_price=0.008,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=2048
-            ),
-            ModelInfo(
-                code="ernie-speed-8k",
-                name="ERNIE Speed",
-                description="百度文心快速模型",
-                context_length=8000,
-                is_free=True,
-                input_price=0,
-                output_price=0,
-                supports_function_calling=False,
-                supports_vision=False,
-                max_tokens=2048
-            )
-        ]
-
 
 class XingHuoProvider(BaseAIProvider):
     """讯飞星火 Provider"""
 
-    @property
-    def provider_code(self) -> str:
-        return "xinghuo"
-
-    @property
-    def provider_name(self) -> str:
-        return "讯飞星火"
-
-    @property
-    def default_base_url(self) -> str:
-        return "https://spark-api.xf-yun.com/v1"
-
-    def _init_client(self):
-        return AsyncOpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+    provider_code = "xinghuo"
+    provider_name = "讯飞星火"
+    default_base_url = "https://spark-api.xf-yun.com/v1"
+
+    # 可用模型列表（导入时构建一次）
+    _MODELS = (
+        ModelInfo(
+            code="spark-4.0",
+            name="讯飞星火 4.0",
+            description="讯飞星火认知大模型V4.0",
+            context_length=128000,
+            is_free=False,
+            input_price=0.018,
+            output_price=0.018,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=4096
+        ),
+        ModelInfo(
+            code="spark-3.5",
+            name="讯飞星火 3.5",
+            description="讯飞星火认知大模型V3.5",
+            context_length=28000,
+            is_free=False,
+            input_price=0.009,
+            output_price=0.009,
+            supports_function_calling=True,
+            supports_vision=False,
+            max_tokens=4096
+        ),
+        ModelInfo(
+            code="spark-lite",
+            name="讯飞星火 Lite",
+            description="讯飞星火轻量版",
+            context_length=8000,
+            is_free=True,
+            input_price=0,
+            output_price=0,
+            supports_function_calling=False,
+            supports_vision=False,
+            max_tokens=2048
+        ),
+    )
 
     async def chat_completion(
         self,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str,
         temperature: float = 0.7,
         max_tokens: int = 2000,
         tools: List[Dict[str, Any]] = None,
         **kwargs
     ) -> ChatCompletionResponse:
-        api_messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
-
-        response = await self.client.chat.completions.create(
+        return await self._openai_compat_chat(
+            messages=messages,
             model=model,
-            messages=api_messages,
             temperature=temperature,
             max_tokens=max_tokens,
             tools=tools,
             **kwargs
         )
 
-        choice = response.choices[0]
-        return ChatCompletionResponse(
-            content=choice.message.content or "",
-            model=response.model,
-            tokens_used={
-                "input_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "output_tokens": response.usage.completion_tokens if response.usage else 0,
-                "total_tokens": response.usage.total_tokens if response.usage else 0
-            },
-            finish_reason=choice.finish_reason
-        )
 
-    async def list_models(self) -> List[ModelInfo]:
-        return [
-            ModelInfo(
-                code="spark-4.0",
-                name="讯飞星火 4.0",
-                description="讯飞星火认知大模型V4.0",
-                context_length=128000,
-                is_free=False,
-                input_price=0.018,
-                output_price=0.018,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=4096
-            ),
-            ModelInfo(
-                code="spark-3.5",
-                name="讯飞星火 3.5",
-                description="讯飞星火认知大模型V3.5",
-                context_length=28000,
-                is_free=False,
-                input_price=0.009,
-                output_price=0.009,
-                supports_function_calling=True,
-                supports_vision=False,
-                max_tokens=4096
-            ),
-            ModelInfo(
-                code="spark-lite",
-                name="讯飞星火 Lite",
-                description="讯飞星火轻量版",
-                context_length=8000,
-                is_free=True,
-                input_price=0,
-                output_price=0,
-                supports_function_calling=False,
-                supports_vision=False,
-                max_tokens=2048
-            )
-        ]
+# 静态模型注册表: provider_code -> 模型列表（及预构建的响应字典），查询模型无需创建Provider
+PROVIDER_MODELS: Dict[str, Tuple[ModelInfo, ...]] = {
+    provider_class.provider_code: provider_class._MODELS
+    for provider_class in BaseAIProvider.__subclasses__()
+}
+PROVIDER_MODELS_JSON: Dict[str, Tuple[Dict[str, Any], ...]] = {
+    provider_class.provider_code: provider_class._MODELS_JSON
+    for provider_class in BaseAIProvider.__subclasses__()
+}
+
+# 模型单价表: (provider_code, model_code) -> (输入单价, 输出单价)，单位: 元/千tokens
+PRICES: Dict[Tuple[str, str], Tuple[float, float]] = {
+    (provider_code, m.code): (float(m.input_price), float(m.output_price))
+    for provider_code, models in PROVIDER_MODELS.items()
+    for m in models
+}
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""AI使用统计后台写入
+
+聊天请求只把使用记录放入队列即返回，由后台协程每隔一段时间批量取出，
+按 用户+提供商+模型+日期 合并后用一条多行 UPSERT 写入数据库。
+"""
+
+from typing import Dict, List, Optional, Tuple
+from datetime import date
+import asyncio
+import logging
+
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+from app.database import AsyncSessionLocal
+from app.models import AIUsageStats
+from app.services.ai.providers import PRICES, TokenUsage
+
+logger = logging.getLogger(__name__)
+
+# 单批最多处理的记录数
+BATCH_SIZE = 500
+# 批量写入间隔（秒）
+FLUSH_INTERVAL = 0.5
+
+UsageKey = Tuple[str, str, str, date]
+
+
+def build_usage_upsert(rows: List[dict]):
+    """构建多行 INSERT ... ON DUPLICATE KEY UPDATE（依赖唯一键 uk_user_model_date）"""
+    stmt = mysql_insert(AIUsageStats).values(rows)
+    return stmt.on_duplicate_key_update(
+        request_count=AIUsageStats.request_count + stmt.inserted.request_count,
+        input_tokens=AIUsageStats.input_tokens + stmt.inserted.input_tokens,
+        output_tokens=AIUsageStats.output_tokens + stmt.inserted.output_tokens,
+        total_tokens=AIUsageStats.total_tokens + stmt.inserted.total_tokens,
+        estimated_cost=AIUsageStats.estimated_cost + stmt.inserted.estimated_cost
+    )
+
+
+class UsageRecorder:
+    """使用统计批量写入器"""
+
+    def __init__(self, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """启动后台写入协程（需在事件循环中调用）"""
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止后台协程并写入剩余记录"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None and not self._queue.empty():
+            await self._flush(self._drain())
+
+    def record(
+        self,
+        user_id: str,
+        provider_code: str,
+        model_code: str,
+        tokens_used: TokenUsage
+    ):
+        """记录一次调用（不等待数据库写入）"""
+        input_tokens = tokens_used.input_tokens
+        output_tokens = tokens_used.output_tokens
+        input_price, output_price = PRICES.get((provider_code, model_code), (0.0, 0.0))
+
+        self.start()
+        self._queue.put_nowait((
+            (user_id, provider_code, model_code, date.today()),
+            input_tokens,
+            output_tokens,
+            tokens_used.total_tokens,
+            (input_price * input_tokens + output_price * output_tokens) / 1000,
+        ))
+
+    def _drain(self) -> List[tuple]:
+        """取出队列中已有的记录（最多一批）"""
+        items = []
+        while len(items) < self.batch_size and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _run(self):
+        """后台循环：等待首条记录，攒一个间隔后批量写入"""
+        while True:
+            first = await self._queue.get()
+            try:
+                await asyncio.sleep(self.flush_interval)
+            finally:
+                # 停止时已取出的记录也要写入
+                await self._flush([first] + self._drain())
+
+    async def _flush(self, items: List[tuple]):
+        """合并同键记录并写入数据库"""
+        merged: Dict[UsageKey, list] = {}
+        for key, input_tokens, output_tokens, total_tokens, cost in items:
+            counters = merged.setdefault(key, [0, 0, 0, 0, 0.0])
+            counters[0] += 1
+            counters[1] += input_tokens
+            counters[2] += output_tokens
+            counters[3] += total_tokens
+            counters[4] += cost
+
+        rows = [
+            {
+                "user_id": user_id,
+                "provider_code": provider_code,
+                "model_code": model_code,
+                "date": day,
+                "request_count": request_count,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": total_tokens,
+                "estimated_cost": round(cost, 4)
+            }
+            for (user_id, provider_code, model_code, day), (request_count, input_tokens, output_tokens, total_tokens, cost)
+            in merged.items()
+        ]
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(build_usage_upsert(rows))
+                await session.commit()
+        except Exception as e:
+            # 统计写入失败不影响业务请求
+            logger.error(f"写入AI使用统计失败: {e}")
+
+
+# 全局写入器实例
+usage_recorder = UsageRecorder()
+
+
+def get_usage_recorder() -> UsageRecorder:
+    """获取使用统计写入器"""
+    return usage_recorder
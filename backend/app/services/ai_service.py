@@ -1,15 +1,68 @@
 # -*- coding: utf-8 -*-
 """AI服务统一入口"""
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select
+from sqlalchemy.orm import undefer
 from datetime import date, datetime
+from dataclasses import asdict
+import logging
+import time
 
-from app.models import AIProvider, AIModel, AIUsageStats, User
+from app.models import AIProvider, AIModel, User
 from app.services.ai.factory import AIProviderFactory
-from app.services.ai.providers import BaseAIProvider, Message, ChatCompletionResponse
+from app.services.ai.providers import (
+    ApiMessage, BaseAIProvider, ChatCompletionResponse, PROVIDER_MODELS_JSON, TokenUsage
+)
+from app.services.ai.cache import get_llm_cache, get_semantic_cache
+from app.services.ai.usage_recorder import get_usage_recorder
+from app.core.config import settings
 from app.core.security import decrypt_api_key
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+# 用户默认Provider实例缓存: user_id -> (过期时间, Provider实例（持有解密后的Key和共享客户端）)
+DEFAULT_PROVIDER_CACHE_TTL = 300
+DEFAULT_PROVIDER_CACHE_MAXSIZE = 10000
+_default_provider_cache: Dict[str, Tuple[float, BaseAIProvider]] = {}
+
+# 快速路径适用的最大消息数
+FAST_PATH_MAX_MESSAGES = 8
+
+# 多实例部署时通过Redis广播缓存失效
+PROVIDER_INVALIDATE_CHANNEL = "ai:provider:invalidate"
+
+
+async def invalidate_default_provider_cache(user_id: str):
+    """用户的Provider配置变更后清除缓存（并通知其他实例）"""
+    _default_provider_cache.pop(user_id, None)
+    client = get_redis()
+    if client is not None:
+        try:
+            await client.publish(PROVIDER_INVALIDATE_CHANNEL, user_id)
+        except Exception as e:
+            logger.warning(f"广播Provider缓存失效失败: {e}")
+
+
+async def listen_provider_invalidations():
+    """订阅其他实例的Provider缓存失效通知（应用启动时作为后台任务运行）"""
+    client = get_redis()
+    if client is None:
+        return
+    pubsub = client.pubsub()
+    await pubsub.subscribe(PROVIDER_INVALIDATE_CHANNEL)
+    try:
+        async for message in pubsub.listen():
+            if message.get("type") == "message":
+                user_id = message["data"]
+                if isinstance(user_id, bytes):
+                    user_id = user_id.decode("utf-8")
+                _default_provider_cache.pop(user_id, None)
+    finally:
+        await pubsub.close()
 
 
 class AIService:
@@ -20,9 +73,15 @@ class AIService:
 
     async def get_user_default_provider(self, user_id: str) -> BaseAIProvider:
         """获取用户的默认AI Provider"""
+        cached = _default_provider_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
         # 查询用户配置的默认Provider
         result = await self.db.execute(
-            select(AIProvider).where(
+            select(AIProvider)
+            .options(undefer(AIProvider.api_key_encrypted))
+            .where(
                 AIProvider.user_id == user_id,
                 AIProvider.is_enabled == True,
                 AIProvider.is_default == True
@@ -34,6 +93,7 @@ class AIService:
             # 如果没有设置默认，返回第一个启用的
             result = await self.db.execute(
                 select(AIProvider)
+                .options(undefer(AIProvider.api_key_encrypted))
                 .where(
                     AIProvider.user_id == user_id,
                     AIProvider.is_enabled == True
@@ -46,17 +106,25 @@ class AIService:
         if not provider_config:
             raise ValueError("未配置可用的AI Provider，请先在设置中添加")
 
-        # 创建Provider实例
-        return AIProviderFactory.create_provider(
+        provider = AIProviderFactory.create_provider(
             provider_code=provider_config.provider_code,
             api_key=decrypt_api_key(provider_config.api_key_encrypted),
-            base_url=provider_config.base_url
+            base_url=provider_config.base_url,
+            # 限流配置（为空时使用默认值）
+            rate_limit_rps=float(provider_config.rate_limit_rps) if provider_config.rate_limit_rps else None,
+            rate_limit_burst=provider_config.rate_limit_burst,
+            max_concurrency=provider_config.max_concurrency,
+            fast_path=settings.LLM_FAST_PATH
         )
+        if len(_default_provider_cache) >= DEFAULT_PROVIDER_CACHE_MAXSIZE:
+            _default_provider_cache.clear()
+        _default_provider_cache[user_id] = (time.monotonic() + DEFAULT_PROVIDER_CACHE_TTL, provider)
+        return provider
 
     async def chat_completion(
         self,
         user_id: str,
-        messages: List[Message],
+        messages: Sequence[ApiMessage],
         model: str = None,
         temperature: float = 0.7,
         tools: List[dict] = None,
@@ -64,22 +132,69 @@ class AIService:
     ) -> ChatCompletionResponse:
         """聊天补全"""
         provider = await self.get_user_default_provider(user_id)
+        # 快速路径开关：请求参数优先，否则使用Provider配置
+        fast_path = kwargs.pop("fast_path", provider.fast_path)
 
         # 如果未指定模型，使用默认模型
         if not model:
             model = "glm-4-flash"
 
-        # 调用Provider
-        response = await provider.chat_completion(
-            messages=messages,
+        # 确定性请求先查响应缓存，命中则跳过上游调用
+        cache = get_llm_cache()
+        cache_key = cache.make_key(
+            provider_code=provider.provider_code,
             model=model,
+            messages=messages,
             temperature=temperature,
             tools=tools,
             **kwargs
         )
+        semantic_vector = None
+        if cache_key:
+            cached = await cache.get(cache_key)
+            if cached:
+                return ChatCompletionResponse.from_dict(cached)
+
+            # 精确缓存未命中，再查语义缓存（需Provider支持向量模型）
+            if provider.embedding_model:
+                cached, semantic_vector = await get_semantic_cache().get(
+                    (provider.provider_code, model),
+                    provider.create_embedding,
+                    messages
+                )
+                if cached:
+                    return ChatCompletionResponse.from_dict(cached)
+
+        # 调用Provider（开启fast_path时，无工具的短对话走快速路径，跳过SDK的完整响应模型校验）
+        if (
+            fast_path
+            and not tools
+            and not kwargs.get("stream")
+            and len(messages) <= FAST_PATH_MAX_MESSAGES
+        ):
+            response = await provider.chat_completion_fast(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                **kwargs
+            )
+        else:
+            response = await provider.chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                tools=tools,
+                **kwargs
+            )
+
+        if cache_key:
+            response_dict = asdict(response)
+            await cache.set(cache_key, response_dict)
+            if semantic_vector:
+                get_semantic_cache().set((provider.provider_code, model), semantic_vector, response_dict)
 
         # 记录使用统计
-        await self._record_usage(
+        self._record_usage(
             user_id=user_id,
             provider_code=provider.provider_code,
             model_code=model,
@@ -94,54 +209,21 @@ class AIService:
         provider_code: str = None
     ) -> List[dict]:
         """列出可用模型"""
-        # 获取用户启用的Providers
-        result = await self.db.execute(
-            select(AIProvider).where(
-                AIProvider.user_id == user_id,
-                AIProvider.is_enabled == True
-            )
+        # 获取用户启用且已配置API Key的Providers（只需提供商代码）
+        query = select(AIProvider.provider_code).where(
+            AIProvider.user_id == user_id,
+            AIProvider.is_enabled == True,
+            AIProvider.api_key_encrypted.isnot(None)
         )
-        user_providers = result.scalars().all()
-
-        if not user_providers:
-            # 返回系统默认的免费模型
-            return await self._get_free_models()
+        if provider_code:
+            query = query.where(AIProvider.provider_code == provider_code)
+        result = await self.db.execute(query)
+        provider_codes = result.scalars().all()
 
+        # 从静态模型注册表读取（不创建客户端、不解密Key）
         models = []
-        for provider_config in user_providers:
-            if provider_code and provider_config.provider_code != provider_code:
-                continue
-
-            # 跳过没有配置API Key的provider
-            if not provider_config.api_key_encrypted:
-                continue
-
-            try:
-                provider = AIProviderFactory.create_provider(
-                    provider_code=provider_config.provider_code,
-                    api_key=decrypt_api_key(provider_config.api_key_encrypted),
-                    base_url=provider_config.base_url
-                )
-
-                provider_models = await provider.list_models()
-                models.extend([
-                    {
-                        "code": m.code,
-                        "name": m.name,
-                        "description": m.description,
-                        "context_length": m.context_length,
-                        "is_free": m.is_free,
-                        "input_price": float(m.input_price) if m.input_price else 0,
-                        "output_price": float(m.output_price) if m.output_price else 0,
-                        "supports_function_calling": m.supports_function_calling,
-                        "supports_vision": m.supports_vision,
-                        "max_tokens": m.max_tokens
-                    }
-                    for m in provider_models
-                ])
-            except Exception as e:
-                # 跳过初始化失败的provider
-                continue
+        for code in provider_codes:
+            models.extend(PROVIDER_MODELS_JSON.get(code, ()))
 
         # 如果没有可用的模型，返回默认免费模型
         if not models:
@@ -149,57 +231,21 @@ class AIService:
 
         return models
 
-    async def _record_usage(
+    def _record_usage(
         self,
         user_id: str,
         provider_code: str,
         model_code: str,
-        tokens_used: dict
+        tokens_used: TokenUsage
     ):
-        """记录使用统计"""
-        from sqlalchemy.dialects.mysql import insert
-
-        stmt = insert(AIUsageStats).values(
+        """记录使用统计（放入后台队列批量UPSERT，不阻塞响应返回）"""
+        get_usage_recorder().record(
             user_id=user_id,
             provider_code=provider_code,
             model_code=model_code,
-            date=date.today(),
-            request_count=1,
-            input_tokens=tokens_used.get("input_tokens", 0),
-            output_tokens=tokens_used.get("output_tokens", 0),
-            total_tokens=tokens_used.get("total_tokens", 0),
-            estimated_cost=0.0  # TODO: 根据价格计算
+            tokens_used=tokens_used
         )
 
-        # MySQL的ON DUPLICATE KEY UPDATE语法
-        stmt = stmt.prefix_with("IGNORE")
-        await self.db.execute(stmt)
-
-        # 更新统计数据
-        result = await self.db.execute(
-            select(AIUsageStats).where(
-                AIUsageStats.user_id == user_id,
-                AIUsageStats.provider_code == provider_code,
-                AIUsageStats.model_code == model_code,
-                AIUsageStats.date == date.today()
-            )
-        )
-        stats = result.scalar_one_or_none()
-
-        if stats:
-            await self.db.execute(
-                update(AIUsageStats)
-                .where(AIUsageStats.id == stats.id)
-                .values(
-                    request_count=stats.request_count + 1,
-                    input_tokens=stats.input_tokens + tokens_used.get("input_tokens", 0),
-                    output_tokens=stats.output_tokens + tokens_used.get("output_tokens", 0),
-                    total_tokens=stats.total_tokens + tokens_used.get("total_tokens", 0)
-                )
-            )
-
-        await self.db.commit()
-
     async def _get_free_models(self) -> List[dict]:
         """获取免费模型列表"""
         return [
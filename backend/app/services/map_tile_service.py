@@ -3,19 +3,70 @@
 提供街道地图瓦片数据，用于Cesium显示真实街道地图
 """
 
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
+from string import Formatter
+from urllib.parse import quote_plus
+import hashlib
 import logging
 import httpx
+import orjson
 import os
 
+from app.core.cache import AsyncTTLCache
+from app.services.mcp.http import UPSTREAM_ERRORS, amap_get, get_shared_http_client
+from app.services.mcp.geocoding_client import parse_pois
+
 logger = logging.getLogger(__name__)
 
+# 与地理编码MCP客户端使用同一个高德REST服务地址
+AMAP_REST_URL = os.getenv("AMAP_ENDPOINT", "https://restapi.amap.com/v3")
+
+# 逆地理编码结果缓存（坐标保留5位小数，约1米精度）
+_regeo_cache = AsyncTTLCache(maxsize=4096, ttl=24 * 3600)
+# 周边搜索结果缓存
+_poi_cache = AsyncTTLCache(maxsize=4096, ttl=300)
+
+
+TileUrlBuilder = Callable[[int, int, int], str]
+
+
+def _is_success(result: Dict[str, Any]) -> bool:
+    """只缓存成功的结果"""
+    return result.get("status") == "success"
+
+
+def _compile_tile_template(template: str) -> TileUrlBuilder:
+    """
+    将 {x}/{y}/{z} 形式的瓦片URL模板预先切分为字面量和占位符，
+    生成URL时只做字符串拼接，不再逐次解析格式串
+
+    模板中出现其他占位符或格式说明时退回 str.format
+    """
+    parts = list(Formatter().parse(template))
+    if not all(
+        name is None or (name in ("x", "y", "z") and not conversion and not spec)
+        for _, name, spec, conversion in parts
+    ):
+        return lambda x, y, z: template.format(x=x, y=y, z=z)
+
+    segments = [(literal, name) for literal, name, _, _ in parts]
+
+    def build(x: int, y: int, z: int) -> str:
+        values = {"x": x, "y": y, "z": z}
+        return "".join(
+            literal if name is None else f"{literal}{values[name]}"
+            for literal, name in segments
+        )
+
+    return build
+
 
 class AmapTileClient:
     """高德地图瓦片客户端"""
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.api_key = os.getenv("AMAP_API_KEY")
+        self._http_client = http_client
         self.tile_url = os.getenv(
             "AMAP_TILE_URL",
             "https://webrd02.is.autonavi.com/appmaptile?style=7&x={x}&y={y}&z={z}&scale=1"
@@ -24,19 +75,27 @@ class AmapTileClient:
             "AMAP_SATELLITE_URL",
             "https://webst02.is.autonavi.com/appmaptile?style=6&x={x}&y={y}&z={z}&scale=1"
         )
-        self.client = None
+        self._tile_url_builder = _compile_tile_template(self.tile_url)
+        self._satellite_url_builder = _compile_tile_template(self.satellite_url)
 
-    async def get_client(self):
-        """获取HTTP客户端"""
-        if self.client is None:
-            self.client = httpx.AsyncClient(timeout=30.0)
-        return self.client
+        # 瓦片配置只取决于环境变量，进程内不变，ETag预先计算
+        self.provider_info_etag = '"{}"'.format(
+            hashlib.sha1(f"{self.tile_url}|{self.satellite_url}".encode("utf-8")).hexdigest()[:16]
+        )
+
+        # 固定的查询参数预先编码，请求时只拼接可变部分
+        key = quote_plus(self.api_key or "")
+        self._regeo_url = f"{AMAP_REST_URL}/geocode/regeo?key={key}&extensions=base&location="
+        # 周边搜索只返回基础字段，不下发用不到的 biz_ext/photos 等扩展信息
+        self._around_url = f"{AMAP_REST_URL}/place/around?key={key}&output=json&extensions=base&location="
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """获取HTTP客户端（未注入时使用与MCP客户端共享的连接池）"""
+        return self._http_client or get_shared_http_client()
 
     async def close(self):
-        """关闭客户端"""
-        if self.client:
-            await self.client.aclose()
-            self.client = None
+        """关闭客户端（共享连接池由MCPManager统一关闭）"""
+        pass
 
     def get_tile_url(
         self,
@@ -58,9 +117,9 @@ class AmapTileClient:
             瓦片URL
         """
         if style == "satellite":
-            return self.satellite_url.format(x=x, y=y, z=z)
+            return self._satellite_url_builder(x, y, z)
         else:
-            return self.tile_url.format(x=x, y=y, z=z)
+            return self._tile_url_builder(x, y, z)
 
     def get_tile_provider_info(self) -> Dict[str, Any]:
         """
@@ -97,19 +156,22 @@ class AmapTileClient:
                 "address": f"位置: {latitude}, {longitude}"
             }
 
+        return await _regeo_cache.get_or_fetch(
+            (round(longitude, 5), round(latitude, 5)),
+            lambda: self._fetch_reverse_geocode(longitude, latitude),
+            _is_success
+        )
+
+    async def _fetch_reverse_geocode(self, longitude: float, latitude: float) -> Dict[str, Any]:
+        """请求高德逆地理编码接口"""
         try:
             client = await self.get_client()
 
-            url = "https://restapi.amap.com/v3/geocode/regeo"
-            params = {
-                "key": self.api_key,
-                "location": f"{longitude},{latitude}",
-                "extensions": "base"
-            }
+            url = f"{self._regeo_url}{longitude},{latitude}"
 
-            response = await client.get(url, params=params)
+            response = await amap_get(client, url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if data.get("status") == "1" and data.get("regeocode"):
                 regeocode = data["regeocode"]
@@ -128,8 +190,8 @@ class AmapTileClient:
                     "address": f"位置: {latitude}, {longitude}"
                 }
 
-        except Exception as e:
-            logger.error(f"逆地理编码失败: {e}")
+        except UPSTREAM_ERRORS as e:
+            logger.warning(f"逆地理编码失败: {e}")
             return {
                 "error": str(e),
                 "address": f"位置: {latitude}, {longitude}"
@@ -160,34 +222,31 @@ class AmapTileClient:
                 "pois": []
             }
 
+        return await _poi_cache.get_or_fetch(
+            (round(longitude, 5), round(latitude, 5), keywords, radius),
+            lambda: self._fetch_nearby(longitude, latitude, keywords, radius),
+            _is_success
+        )
+
+    async def _fetch_nearby(
+        self,
+        longitude: float,
+        latitude: float,
+        keywords: str,
+        radius: int
+    ) -> Dict[str, Any]:
+        """请求高德周边搜索接口"""
         try:
             client = await self.get_client()
 
-            url = "https://restapi.amap.com/v3/place/around"
-            params = {
-                "key": self.api_key,
-                "location": f"{longitude},{latitude}",
-                "keywords": keywords,
-                "radius": str(radius),
-                "output": "json"
-            }
+            url = f"{self._around_url}{longitude},{latitude}&keywords={quote_plus(keywords or '')}&radius={radius}"
 
-            response = await client.get(url, params=params)
+            response = await amap_get(client, url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if data.get("status") == "1":
-                pois = []
-                for poi in data.get("pois", []):
-                    location = poi.get("location", "").split(",")
-                    pois.append({
-                        "name": poi.get("name"),
-                        "type": poi.get("type"),
-                        "address": poi.get("address"),
-                        "longitude": float(location[0]) if len(location) > 0 else None,
-                        "latitude": float(location[1]) if len(location) > 1 else None,
-                        "distance": poi.get("distance"),
-                    })
+                pois = parse_pois(data.get("pois", []))
 
                 return {
                     "status": "success",
@@ -200,18 +259,22 @@ class AmapTileClient:
                     "pois": []
                 }
 
-        except Exception as e:
-            logger.error(f"周边搜索失败: {e}")
+        except UPSTREAM_ERRORS as e:
+            logger.warning(f"周边搜索失败: {e}")
             return {
                 "error": str(e),
                 "pois": []
             }
 
 
-# 单例实例
-amap_tile_client = AmapTileClient()
+# 单例实例（首次使用时创建）
+_amap_tile_client: Optional[AmapTileClient] = None
 
 
 async def get_amap_tile_client() -> AmapTileClient:
     """获取高德地图瓦片客户端"""
-    return amap_tile_client
+    global _amap_tile_client
+    # 检查与创建之间没有await，协程间不会重复创建
+    if _amap_tile_client is None:
+        _amap_tile_client = AmapTileClient()
+    return _amap_tile_client
@@ -3,9 +3,13 @@ MCP服务层
 提供统一的MCP客户端管理和调用接口
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Dict, List, Optional, Any, TypeVar
+import asyncio
 import logging
+import os
 from .config import MCPConfig, MCPServerConfig
+from .http import get_shared_http_client, close_shared_http_client
+from .result_cache import TOOL_CACHE_TTLS, tool_cache_key, get_cached_result, set_cached_result
 from .base_client import MCPClientBase, HTTPMCPClient, BuiltinMCPClient
 from .geocoding_client import AmapGeocodingClient
 from .search_client import DataEnhancementClient
@@ -13,19 +17,38 @@ from .weather_client import OpenWeatherMapClient
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# MCP上游调用的全局并发上限
+MCP_MAX_CONCURRENCY = int(os.getenv("MCP_MAX_CONCURRENCY", "32"))
+
 
 class MCPManager:
     """MCP管理器，统一管理所有MCP客户端"""
 
     def __init__(self):
         self.clients: Dict[str, MCPClientBase] = {}
+        self._sem: Optional[asyncio.Semaphore] = None
+        MCPConfig.from_env()
         self._initialize_builtin_clients()
 
+    async def _guarded(self, coro: Awaitable[T]) -> T:
+        """在全局并发上限内执行上游调用"""
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(MCP_MAX_CONCURRENCY)
+        async with self._sem:
+            return await coro
+
+    @property
+    def http_client(self):
+        """所有MCP客户端共享的HTTP连接池"""
+        return get_shared_http_client()
+
     def _initialize_builtin_clients(self):
         """初始化内置MCP客户端"""
         for config in MCPConfig.list_servers():
             if config.endpoint.startswith("builtin://"):
-                self.clients[config.name] = BuiltinMCPClient(config)
+                self.clients[config.name] = BuiltinMCPClient(config, self.http_client)
 
     def get_client(self, name: str) -> Optional[MCPClientBase]:
         """获取指定MCP客户端"""
@@ -56,7 +79,19 @@ class MCPManager:
         if not client:
             return {"error": f"MCP服务器未找到: {server_name}"}
 
-        return await client.call_tool(tool_name, parameters)
+        # 可缓存的工具先查Redis共享缓存
+        ttl = TOOL_CACHE_TTLS.get(tool_name)
+        if ttl is None:
+            return await self._guarded(client.call_tool(tool_name, parameters))
+
+        key = tool_cache_key(server_name, tool_name, parameters)
+        cached = await get_cached_result(key)
+        if cached is not None:
+            return cached
+
+        result = await self._guarded(client.call_tool(tool_name, parameters))
+        await set_cached_result(key, result, ttl)
+        return result
 
     async def list_all_tools(self) -> Dict[str, List[Dict[str, Any]]]:
         """
@@ -65,14 +100,18 @@ class MCPManager:
         Returns:
             按服务器分组的工具列表
         """
+        names = list(self.clients)
+        results = await asyncio.gather(
+            *(self._guarded(client.list_tools()) for client in self.clients.values()),
+            return_exceptions=True
+        )
+
         all_tools = {}
-        for name, client in self.clients.items():
-            try:
-                tools = await client.list_tools()
-                all_tools[name] = tools
-            except Exception as e:
-                logger.warning(f"获取 {name} 的工具列表失败: {e}")
-                all_tools[name] = []
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"获取 {name} 的工具列表失败: {result}")
+                result = []
+            all_tools[name] = result
 
         return all_tools
 
@@ -83,21 +122,31 @@ class MCPManager:
         Returns:
             每个服务器的健康状态
         """
+        names = list(self.clients)
+        results = await asyncio.gather(
+            *(self._guarded(client.health_check()) for client in self.clients.values()),
+            return_exceptions=True
+        )
+
         health_status = {}
-        for name, client in self.clients.items():
-            try:
-                health_status[name] = await client.health_check()
-            except Exception as e:
-                logger.warning(f"检查 {name} 健康状态失败: {e}")
-                health_status[name] = False
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"检查 {name} 健康状态失败: {result}")
+                result = False
+            health_status[name] = result
 
         return health_status
 
     async def close_all(self):
-        """关闭所有客户端连接"""
-        for client in self.clients.values():
-            if hasattr(client, 'close'):
-                await client.close()
+        """关闭所有客户端连接（并行关闭，单个客户端失败不影响其他客户端）"""
+        results = await asyncio.gather(
+            *(client.close() for client in self.clients.values() if hasattr(client, 'close')),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"关闭MCP客户端失败: {result}")
+        await close_shared_http_client()
 
 
 # 全局MCP管理器实例
@@ -112,6 +161,8 @@ async def get_mcp_manager() -> MCPManager:
 __all__ = [
     'MCPManager',
     'get_mcp_manager',
+    'get_shared_http_client',
+    'close_shared_http_client',
     'MCPConfig',
     'MCPServerConfig',
     'MCPClientBase',
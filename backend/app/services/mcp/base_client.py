@@ -4,13 +4,70 @@ MCP客户端基类
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Mapping, Optional, Any
+from collections import OrderedDict
+from types import MappingProxyType
 import logging
 import httpx
 from .config import MCPServerConfig
+from .http import get_shared_http_client
 
 logger = logging.getLogger(__name__)
 
+# 内置记忆服务最多保存的条目数（超出后淘汰最久未使用的）
+MEMORY_MAX_ENTRIES = 10_000
+
+# 内置工具定义（静态只读，所有实例共享）
+FETCH_TOOLS = MappingProxyType({
+    "fetch_webpage": {
+        "name": "fetch_webpage",
+        "description": "获取网页内容",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "url": {
+                    "type": "string",
+                    "description": "网页URL"
+                }
+            },
+            "required": ["url"]
+        }
+    }
+})
+
+MEMORY_TOOLS = MappingProxyType({
+    "store_memory": {
+        "name": "store_memory",
+        "description": "存储记忆",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "key": {"type": "string"},
+                "value": {"type": "string"}
+            },
+            "required": ["key", "value"]
+        }
+    },
+    "retrieve_memory": {
+        "name": "retrieve_memory",
+        "description": "检索记忆",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "key": {"type": "string"}
+            },
+            "required": ["key"]
+        }
+    }
+})
+
+BUILTIN_TOOLS = {
+    "@modelcontextprotocol/server-fetch": FETCH_TOOLS,
+    "@modelcontextprotocol/server-memory": MEMORY_TOOLS,
+}
+
+_NO_TOOLS: Mapping[str, Any] = MappingProxyType({})
+
 
 class MCPClientBase(ABC):
     """MCP客户端基类"""
@@ -66,12 +123,11 @@ class MCPClientBase(ABC):
 class HTTPMCPClient(MCPClientBase):
     """基于HTTP的MCP客户端"""
 
-    def __init__(self, config: MCPServerConfig):
+    def __init__(self, config: MCPServerConfig, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(config)
-        self.client = httpx.AsyncClient(
-            timeout=self.timeout,
-            headers=self._build_headers()
-        )
+        # 复用共享连接池，鉴权信息放在每次请求的请求头中
+        self.client = http_client or get_shared_http_client()
+        self.headers = self._build_headers()
 
     def _build_headers(self) -> Dict[str, str]:
         """构建HTTP请求头"""
@@ -90,7 +146,7 @@ class HTTPMCPClient(MCPClientBase):
         """通过HTTP调用MCP工具"""
         try:
             url = f"{self.config.endpoint}/tools/{tool_name}"
-            response = await self.client.post(url, json=parameters)
+            response = await self.client.post(url, json=parameters, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except httpx.HTTPError as e:
@@ -101,7 +157,7 @@ class HTTPMCPClient(MCPClientBase):
         """列出HTTP MCP服务提供的工具"""
         try:
             url = f"{self.config.endpoint}/tools"
-            response = await self.client.get(url)
+            response = await self.client.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             return data.get("tools", [])
@@ -110,64 +166,23 @@ class HTTPMCPClient(MCPClientBase):
             return []
 
     async def close(self):
-        """关闭客户端连接"""
-        if self.client:
-            await self.client.aclose()
+        """关闭客户端连接（共享连接池由MCPManager统一关闭）"""
+        pass
 
 
 class BuiltinMCPClient(MCPClientBase):
     """内置MCP客户端（模拟实现）"""
 
-    def __init__(self, config: MCPServerConfig):
+    def __init__(self, config: MCPServerConfig, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(config)
+        self.client = http_client or get_shared_http_client()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
         self._tools = self._initialize_tools()
+        self._tool_list = list(self._tools.values())
 
-    def _initialize_tools(self) -> Dict[str, Any]:
+    def _initialize_tools(self) -> Mapping[str, Any]:
         """初始化内置工具"""
-        if self.config.name == "@modelcontextprotocol/server-fetch":
-            return {
-                "fetch_webpage": {
-                    "name": "fetch_webpage",
-                    "description": "获取网页内容",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "url": {
-                                "type": "string",
-                                "description": "网页URL"
-                            }
-                        },
-                        "required": ["url"]
-                    }
-                }
-            }
-        elif self.config.name == "@modelcontextprotocol/server-memory":
-            return {
-                "store_memory": {
-                    "name": "store_memory",
-                    "description": "存储记忆",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "key": {"type": "string"},
-                            "value": {"type": "string"}
-                        },
-                        "required": ["key", "value"]
-                    }
-                },
-                "retrieve_memory": {
-                    "name": "retrieve_memory",
-                    "description": "检索记忆",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "key": {"type": "string"}
-                        },
-                        "required": ["key"]
-                    }
-                }
-            }
-        return {}
+        return BUILTIN_TOOLS.get(self.config.name, _NO_TOOLS)
 
     async def call_tool(
         self,
@@ -189,20 +204,19 @@ class BuiltinMCPClient(MCPClientBase):
             return {"error": str(e)}
 
     async def list_tools(self) -> List[Dict[str, Any]]:
-        """列出内置工具"""
-        return list(self._tools.values())
+        """列出内置工具（返回共享列表，调用方不应修改）"""
+        return self._tool_list
 
     async def _fetch_webpage(self, url: str) -> Dict[str, Any]:
         """获取网页内容（简化实现）"""
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return {
-                    "url": url,
-                    "content": response.text[:10000],  # 限制长度
-                    "status": "success"
-                }
+            response = await self.client.get(url, timeout=30)
+            response.raise_for_status()
+            return {
+                "url": url,
+                "content": response.text[:10000],  # 限制长度
+                "status": "success"
+            }
         except Exception as e:
             return {
                 "url": url,
@@ -211,17 +225,18 @@ class BuiltinMCPClient(MCPClientBase):
             }
 
     async def _store_memory(self, key: str, value: str) -> Dict[str, Any]:
-        """存储记忆（简化实现，使用内存字典）"""
-        if not hasattr(self, '_memory'):
-            self._memory = {}
+        """存储记忆（简化实现，使用内存LRU）"""
         self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > MEMORY_MAX_ENTRIES:
+            self._memory.popitem(last=False)
         return {"status": "stored", "key": key}
 
     async def _retrieve_memory(self, key: str) -> Dict[str, Any]:
         """检索记忆"""
-        if not hasattr(self, '_memory'):
-            self._memory = {}
         value = self._memory.get(key)
+        if value is not None:
+            self._memory.move_to_end(key)
         return {
             "key": key,
             "value": value,
@@ -42,43 +42,60 @@ class MCPConfig:
     # 自定义MCP服务配置
     CUSTOM_SERVERS: Dict[str, MCPServerConfig] = {}
 
+    # 合并后的查找表和启用列表（配置变更时重建）
+    _by_name: Optional[Dict[str, MCPServerConfig]] = None
+    _all_enabled: Optional[List[MCPServerConfig]] = None
+    # 是否已从环境变量加载
+    _loaded: bool = False
+
+    @classmethod
+    def _rebuild(cls) -> None:
+        """重建合并视图（内置配置优先）"""
+        cls.from_env()
+        cls._by_name = {**cls.CUSTOM_SERVERS, **cls.BUILTIN_SERVERS}
+        cls._all_enabled = [
+            server
+            for servers in (cls.BUILTIN_SERVERS, cls.CUSTOM_SERVERS)
+            for server in servers.values()
+            if server.enabled
+        ]
+
     @classmethod
     def get_server(cls, name: str) -> Optional[MCPServerConfig]:
         """获取指定服务器配置"""
-        if name in cls.BUILTIN_SERVERS:
-            return cls.BUILTIN_SERVERS[name]
-        if name in cls.CUSTOM_SERVERS:
-            return cls.CUSTOM_SERVERS[name]
-        return None
+        if cls._by_name is None:
+            cls._rebuild()
+        return cls._by_name.get(name)
 
     @classmethod
     def list_servers(cls) -> List[MCPServerConfig]:
-        """列出所有可用的MCP服务器"""
-        servers = []
-        for server in cls.BUILTIN_SERVERS.values():
-            if server.enabled:
-                servers.append(server)
-        for server in cls.CUSTOM_SERVERS.values():
-            if server.enabled:
-                servers.append(server)
-        return servers
+        """列出所有可用的MCP服务器（返回共享列表，调用方不应修改）"""
+        if cls._all_enabled is None:
+            cls._rebuild()
+        return cls._all_enabled
 
     @classmethod
     def add_custom_server(cls, config: MCPServerConfig) -> None:
         """添加自定义MCP服务器"""
         cls.CUSTOM_SERVERS[config.name] = config
+        cls._by_name = cls._all_enabled = None
 
     @classmethod
     def remove_server(cls, name: str) -> bool:
         """移除MCP服务器"""
         if name in cls.CUSTOM_SERVERS:
             del cls.CUSTOM_SERVERS[name]
+            cls._by_name = cls._all_enabled = None
             return True
         return False
 
     @classmethod
-    def from_env(cls) -> None:
-        """从环境变量加载配置"""
+    def from_env(cls, force: bool = False) -> None:
+        """从环境变量加载配置（只加载一次，force=True时重新读取）"""
+        if cls._loaded and not force:
+            return
+        cls._loaded = True
+
         # 高德地图API配置（用于地理编码MCP）
         amap_api_key = os.getenv("AMAP_API_KEY")
         if amap_api_key:
@@ -102,7 +119,3 @@ class MCPConfig:
                 api_key=weather_api_key,
                 description="OpenWeatherMap天气服务"
             ))
-
-
-# 初始化时从环境变量加载
-MCPConfig.from_env()
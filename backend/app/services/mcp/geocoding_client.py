@@ -3,23 +3,228 @@
 基于高德地图API提供位置解析服务
 """
 
-from typing import Dict, Any, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import quote, quote_plus
+import asyncio
 import logging
 import httpx
+import orjson
+from app.core.cache import AsyncTTLCache
 from .base_client import MCPClientBase
 from .config import MCPServerConfig
+from .http import UPSTREAM_ERRORS, amap_get, get_shared_http_client
 
 logger = logging.getLogger(__name__)
 
+# 地理编码/逆地理编码结果缓存（地址与坐标的对应关系基本不变）
+_geocode_cache = AsyncTTLCache(maxsize=4096, ttl=24 * 3600)
+_regeo_cache = AsyncTTLCache(maxsize=4096, ttl=24 * 3600)
+# 周边搜索结果缓存
+_poi_cache = AsyncTTLCache(maxsize=4096, ttl=300)
+
+
+# 高德批量接口单次最多10个地址/坐标
+AMAP_BATCH_SIZE = 10
+# 攒批的最长等待时间（秒）
+AMAP_BATCH_WAIT = 0.02
+
+
+# 地理编码工具定义（静态，所有实例共享）
+GEOCODING_TOOLS = [
+    {
+        "name": "geocode",
+        "description": "地址转坐标（地理编码）",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "address": {
+                    "type": "string",
+                    "description": "地址描述"
+                }
+            },
+            "required": ["address"]
+        }
+    },
+    {
+        "name": "reverse_geocode",
+        "description": "坐标转地址（逆地理编码）",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "longitude": {"type": "number"},
+                "latitude": {"type": "number"}
+            },
+            "required": ["longitude", "latitude"]
+        }
+    },
+    {
+        "name": "search_around",
+        "description": "周边搜索",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "longitude": {"type": "number"},
+                "latitude": {"type": "number"},
+                "keywords": {"type": "string"},
+                "radius": {"type": "number", "default": 1000}
+            },
+            "required": ["longitude", "latitude", "keywords"]
+        }
+    }
+]
+
+
+def _is_success(result: Dict[str, Any]) -> bool:
+    """只缓存成功的结果"""
+    return result.get("status") == "success"
+
+
+def _parse_location(location: Any) -> Tuple[Optional[float], Optional[float]]:
+    """解析高德 "经度,纬度" 坐标串（为空或格式错误时返回 (None, None)）"""
+    try:
+        longitude, latitude = location.split(",", 1)
+        return float(longitude), float(latitude)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+def _invalid_address(address: Any) -> Optional[str]:
+    """校验地址，返回错误信息（合法时返回None）
+
+    批量请求以 | 拼接地址，空地址或含 | 的地址会使整批失败或错位，不能进入批次
+    """
+    if not isinstance(address, str) or not address.strip():
+        return "地址不能为空"
+    if "|" in address:
+        return "地址不能包含字符 |"
+    return None
+
+
+def _invalid_coordinate(longitude: Any, latitude: Any) -> Optional[str]:
+    """校验经纬度，返回错误信息（合法时返回None）"""
+    for value in (longitude, latitude):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "经纬度必须为数字"
+    if not (-180 <= longitude <= 180 and -90 <= latitude <= 90):
+        return "经纬度超出范围"
+    return None
+
+
+def parse_pois(raw_pois: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """将高德POI列表转换为统一格式"""
+    return [
+        {
+            "name": poi.get("name"),
+            "type": poi.get("type"),
+            "address": poi.get("address"),
+            "longitude": longitude,
+            "latitude": latitude,
+            "distance": poi.get("distance"),
+        }
+        for poi in raw_pois
+        for longitude, latitude in (_parse_location(poi.get("location")),)
+    ]
+
+
+class _MicroBatcher:
+    """微批处理器
+
+    单项请求放入队列后等待结果，后台协程每次取出最多 max_batch 项
+    （或等待 max_wait 秒后取出已有的项），用一次批量调用完成并按顺序分发结果。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = AMAP_BATCH_SIZE,
+        max_wait: float = AMAP_BATCH_WAIT
+    ):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """提交一项请求并等待其结果"""
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _run(self):
+        """后台循环：攒批后异步分发，不阻塞下一批的收集"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def close(self):
+        """取消后台协程和进行中的批量调用，尚未完成的请求以取消结束"""
+        tasks = [task for task in (self._task, *self._pending) if task is not None and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """执行批量调用并把结果交给各自的等待方"""
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
 
 class AmapGeocodingClient(MCPClientBase):
     """高德地图地理编码客户端"""
 
-    def __init__(self, config: MCPServerConfig):
+    def __init__(self, config: MCPServerConfig, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(config)
         self.api_key = config.api_key
         self.base_url = config.endpoint
-        self.client = httpx.AsyncClient(timeout=10)
+        self.client = http_client or get_shared_http_client()
+
+        # 固定的查询参数预先编码，请求时只拼接可变部分
+        key = quote_plus(self.api_key or "")
+        self._geocode_url = f"{self.base_url}/geocode/geo?key={key}&batch=true&address="
+        self._regeo_url = f"{self.base_url}/geocode/regeo?key={key}&batch=true&location="
+        # 周边搜索只返回基础字段，不下发用不到的 biz_ext/photos 等扩展信息
+        self._around_url = f"{self.base_url}/place/around?key={key}&output=json&extensions=base&location="
+
+        self._geocode_batcher = _MicroBatcher(self._fetch_geocode_batch)
+        self._regeo_batcher = _MicroBatcher(self._fetch_reverse_geocode_batch)
 
     async def call_tool(
         self,
@@ -45,53 +250,12 @@ class AmapGeocodingClient(MCPClientBase):
             else:
                 return {"error": f"Unknown tool: {tool_name}"}
         except Exception as e:
-            logger.error(f"地理编码调用失败: {e}")
+            logger.exception(f"地理编码调用失败: {e}")
             return {"error": str(e)}
 
     async def list_tools(self) -> list:
-        """列出可用的地理编码工具"""
-        return [
-            {
-                "name": "geocode",
-                "description": "地址转坐标（地理编码）",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "address": {
-                            "type": "string",
-                            "description": "地址描述"
-                        }
-                    },
-                    "required": ["address"]
-                }
-            },
-            {
-                "name": "reverse_geocode",
-                "description": "坐标转地址（逆地理编码）",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "longitude": {"type": "number"},
-                        "latitude": {"type": "number"}
-                    },
-                    "required": ["longitude", "latitude"]
-                }
-            },
-            {
-                "name": "search_around",
-                "description": "周边搜索",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "longitude": {"type": "number"},
-                        "latitude": {"type": "number"},
-                        "keywords": {"type": "string"},
-                        "radius": {"type": "number", "default": 1000}
-                    },
-                    "required": ["longitude", "latitude", "keywords"]
-                }
-            }
-        ]
+        """列出可用的地理编码工具（返回共享列表，调用方不应修改）"""
+        return GEOCODING_TOOLS
 
     async def geocode(self, address: str) -> Dict[str, Any]:
         """
@@ -103,43 +267,60 @@ class AmapGeocodingClient(MCPClientBase):
         Returns:
             包含经纬度的结果
         """
+        error = _invalid_address(address)
+        if error:
+            return {"status": "error", "address": address, "error": error}
+
+        return await _geocode_cache.get_or_fetch(
+            address,
+            lambda: self._geocode_batcher.submit(address),
+            _is_success
+        )
+
+    async def _fetch_geocode_batch(self, addresses: List[str]) -> List[Dict[str, Any]]:
+        """批量请求高德地理编码接口（地址以 | 分隔，结果与输入顺序一致）"""
         try:
-            url = f"{self.base_url}/geocode/geo"
-            params = {
-                "key": self.api_key,
-                "address": address
-            }
+            url = self._geocode_url + quote("|".join(addresses), safe="")
 
-            response = await self.client.get(url, params=params)
+            response = await amap_get(self.client, url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
-            if data.get("status") == "1" and data.get("geocodes"):
-                geocode = data["geocodes"][0]
-                location = geocode.get("location", "").split(",")
-                return {
-                    "status": "success",
-                    "address": address,
-                    "formatted_address": geocode.get("formatted_address"),
-                    "longitude": float(location[0]) if len(location) > 0 else None,
-                    "latitude": float(location[1]) if len(location) > 1 else None,
-                    "level": geocode.get("level"),
-                    "confidence": geocode.get("confidence")
-                }
-            else:
-                return {
-                    "status": "error",
-                    "address": address,
-                    "error": "无法解析该地址"
-                }
-        except Exception as e:
-            logger.error(f"地理编码失败: {e}")
+            if data.get("status") != "1":
+                error = data.get("info", "无法解析该地址")
+                return [{"status": "error", "address": address, "error": error} for address in addresses]
+
+            geocodes = data.get("geocodes") or []
+            return [
+                self._parse_geocode(address, geocodes[i] if i < len(geocodes) else None)
+                for i, address in enumerate(addresses)
+            ]
+        except UPSTREAM_ERRORS as e:
+            logger.warning(f"地理编码失败: {e}")
+            return [{"status": "error", "address": address, "error": str(e)} for address in addresses]
+
+    @staticmethod
+    def _parse_geocode(address: str, geocode: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """解析单个地理编码结果（批量模式下无法解析的地址location为空）"""
+        location = geocode.get("location") if geocode else None
+        if not location or not isinstance(location, str):
             return {
                 "status": "error",
                 "address": address,
-                "error": str(e)
+                "error": "无法解析该地址"
             }
 
+        location = location.split(",")
+        return {
+            "status": "success",
+            "address": address,
+            "formatted_address": geocode.get("formatted_address"),
+            "longitude": float(location[0]) if len(location) > 0 else None,
+            "latitude": float(location[1]) if len(location) > 1 else None,
+            "level": geocode.get("level"),
+            "confidence": geocode.get("confidence")
+        }
+
     async def reverse_geocode(
         self,
         longitude: float,
@@ -155,42 +336,63 @@ class AmapGeocodingClient(MCPClientBase):
         Returns:
             包含地址信息的结果
         """
+        error = _invalid_coordinate(longitude, latitude)
+        if error:
+            return {"status": "error", "longitude": longitude, "latitude": latitude, "error": error}
+
+        return await _regeo_cache.get_or_fetch(
+            (round(longitude, 5), round(latitude, 5)),
+            lambda: self._regeo_batcher.submit((longitude, latitude)),
+            _is_success
+        )
+
+    async def _fetch_reverse_geocode_batch(
+        self,
+        locations: List[Tuple[float, float]]
+    ) -> List[Dict[str, Any]]:
+        """批量请求高德逆地理编码接口（坐标以 | 分隔，结果与输入顺序一致）"""
         try:
-            url = f"{self.base_url}/geocode/regeo"
-            params = {
-                "key": self.api_key,
-                "location": f"{longitude},{latitude}"
-            }
+            url = self._regeo_url + quote(
+                "|".join(f"{longitude},{latitude}" for longitude, latitude in locations),
+                safe=","
+            )
 
-            response = await self.client.get(url, params=params)
+            response = await amap_get(self.client, url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
-            if data.get("status") == "1" and data.get("regeocode"):
-                regeocode = data["regeocode"]
-                return {
-                    "status": "success",
-                    "longitude": longitude,
-                    "latitude": latitude,
-                    "formatted_address": regeocode.get("formatted_address"),
-                    "addressComponent": regeocode.get("addressComponent", {}),
-                    "pois": regeocode.get("pois", [])
-                }
-            else:
-                return {
+            regeocodes = (data.get("regeocodes") or []) if data.get("status") == "1" else []
+            results = []
+            for i, (longitude, latitude) in enumerate(locations):
+                regeocode = regeocodes[i] if i < len(regeocodes) else None
+                if regeocode:
+                    results.append({
+                        "status": "success",
+                        "longitude": longitude,
+                        "latitude": latitude,
+                        "formatted_address": regeocode.get("formatted_address"),
+                        "addressComponent": regeocode.get("addressComponent", {}),
+                        "pois": regeocode.get("pois", [])
+                    })
+                else:
+                    results.append({
+                        "status": "error",
+                        "longitude": longitude,
+                        "latitude": latitude,
+                        "error": "无法解析该坐标"
+                    })
+            return results
+        except UPSTREAM_ERRORS as e:
+            logger.warning(f"逆地理编码失败: {e}")
+            return [
+                {
                     "status": "error",
                     "longitude": longitude,
                     "latitude": latitude,
-                    "error": "无法解析该坐标"
+                    "error": str(e)
                 }
-        except Exception as e:
-            logger.error(f"逆地理编码失败: {e}")
-            return {
-                "status": "error",
-                "longitude": longitude,
-                "latitude": latitude,
-                "error": str(e)
-            }
+                for longitude, latitude in locations
+            ]
 
     async def search_around(
         self,
@@ -211,32 +413,29 @@ class AmapGeocodingClient(MCPClientBase):
         Returns:
             周边POI列表
         """
+        return await _poi_cache.get_or_fetch(
+            (round(longitude, 5), round(latitude, 5), keywords, radius),
+            lambda: self._fetch_around(longitude, latitude, keywords, radius),
+            _is_success
+        )
+
+    async def _fetch_around(
+        self,
+        longitude: float,
+        latitude: float,
+        keywords: str,
+        radius: int
+    ) -> Dict[str, Any]:
+        """请求高德周边搜索接口"""
         try:
-            url = f"{self.base_url}/place/around"
-            params = {
-                "key": self.api_key,
-                "location": f"{longitude},{latitude}",
-                "keywords": keywords,
-                "radius": radius,
-                "output": "json"
-            }
+            url = f"{self._around_url}{longitude},{latitude}&keywords={quote_plus(keywords or '')}&radius={radius}"
 
-            response = await self.client.get(url, params=params)
+            response = await amap_get(self.client, url)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if data.get("status") == "1":
-                pois = []
-                for poi in data.get("pois", []):
-                    location = poi.get("location", "").split(",")
-                    pois.append({
-                        "name": poi.get("name"),
-                        "type": poi.get("type"),
-                        "address": poi.get("address"),
-                        "longitude": float(location[0]) if len(location) > 0 else None,
-                        "latitude": float(location[1]) if len(location) > 1 else None,
-                        "distance": poi.get("distance"),
-                    })
+                pois = parse_pois(data.get("pois", []))
 
                 return {
                     "status": "success",
@@ -252,8 +451,8 @@ class AmapGeocodingClient(MCPClientBase):
                     "keywords": keywords,
                     "error": data.get("info", "搜索失败")
                 }
-        except Exception as e:
-            logger.error(f"周边搜索失败: {e}")
+        except UPSTREAM_ERRORS as e:
+            logger.warning(f"周边搜索失败: {e}")
             return {
                 "status": "error",
                 "keywords": keywords,
@@ -261,6 +460,6 @@ class AmapGeocodingClient(MCPClientBase):
             }
 
     async def close(self):
-        """关闭客户端"""
-        if self.client:
-            await self.client.aclose()
+        """停止微批处理协程（共享连接池由MCPManager统一关闭）"""
+        await self._geocode_batcher.close()
+        await self._regeo_batcher.close()
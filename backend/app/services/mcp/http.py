@@ -0,0 +1,97 @@
+"""
+MCP/高德共享HTTP客户端
+所有MCP客户端和高德地图客户端复用同一个连接池（HTTP/2 + keep-alive），
+鉴权信息放在每次请求的参数或请求头中
+"""
+
+from typing import Optional
+import asyncio
+import os
+import random
+import httpx
+
+DEFAULT_LIMITS = httpx.Limits(
+    max_keepalive_connections=64,
+    max_connections=128,
+    keepalive_expiry=300
+)
+DEFAULT_TIMEOUT = httpx.Timeout(10, connect=3)
+
+# 上游请求的预期失败（网络/HTTP状态错误、响应无法解析），其余异常向上抛出
+UPSTREAM_ERRORS = (httpx.HTTPError, ValueError, KeyError)
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+# 高德API并发上限（同一Key的QPS有限，突发请求会被拒绝）
+AMAP_MAX_CONCURRENCY = int(os.getenv("AMAP_MAX_CONCURRENCY", "16"))
+_amap_semaphore: Optional[asyncio.Semaphore] = None
+
+# 高德请求重试：最多尝试次数、可重试的HTTP状态码、Retry-After最长等待（秒）
+AMAP_MAX_ATTEMPTS = 3
+RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+MAX_RETRY_AFTER = 5.0
+
+
+def get_shared_http_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端（关闭后再次获取会重新创建）"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            http2=True,
+            limits=DEFAULT_LIMITS,
+            timeout=DEFAULT_TIMEOUT
+        )
+    return _shared_client
+
+
+async def close_shared_http_client():
+    """关闭共享的HTTP客户端"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
+
+def get_amap_semaphore() -> asyncio.Semaphore:
+    """获取高德API调用的并发信号量（所有高德客户端共享，首次使用时创建）"""
+    global _amap_semaphore
+    if _amap_semaphore is None:
+        _amap_semaphore = asyncio.Semaphore(AMAP_MAX_CONCURRENCY)
+    return _amap_semaphore
+
+
+def _backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """计算重试等待时间：优先使用Retry-After，否则指数退避 + 全抖动"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return random.uniform(0, 2 ** attempt * 0.1)
+
+
+async def amap_get(
+    client: httpx.AsyncClient,
+    url: str,
+    max_attempts: int = AMAP_MAX_ATTEMPTS
+) -> httpx.Response:
+    """
+    发起高德GET请求
+
+    每次尝试都在高德并发信号量内进行（退避等待时不占用名额），
+    超时、连接失败和429/5xx网关错误按指数退避重试，最后一次的结果或异常原样返回给调用方
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with get_amap_semaphore():
+                response = await client.get(url)
+        except (httpx.TimeoutException, httpx.ConnectError):
+            if attempt >= max_attempts:
+                raise
+            delay = _backoff_delay(attempt)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= max_attempts:
+                return response
+            delay = _backoff_delay(attempt, response)
+        await asyncio.sleep(delay)
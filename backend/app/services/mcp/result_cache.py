@@ -0,0 +1,86 @@
+"""
+MCP工具结果缓存（Redis）
+
+多个worker/实例共享同一份工具结果缓存，按 (服务器, 工具, 参数) 做精确匹配。
+未配置 REDIS_URL 时不做跨进程缓存，各客户端仍使用各自的进程内缓存。
+"""
+
+from typing import Any, Dict, Optional
+import hashlib
+import logging
+import orjson
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# 可缓存工具及缓存时长（秒），未列出的工具不缓存
+TOOL_CACHE_TTLS = {
+    "get_statistics": 300,
+    "get_current_weather": 600,
+    "get_weather_by_coordinates": 600,
+    "search_buildings": 60,
+    "semantic_search": 60,
+}
+
+# 参数固定的工具：按固定字段顺序拼接参数值生成键，不必序列化整个参数字典
+TOOL_KEY_FIELDS = {
+    "search_buildings": (
+        "city", "district", "min_height", "max_height",
+        "category", "risk_level", "keyword", "limit"
+    ),
+}
+
+
+def tool_cache_key(server_name: str, tool_name: str, parameters: Dict[str, Any]) -> str:
+    """
+    生成缓存键：参数顺序不同的相同请求共享同一个键
+
+    TOOL_KEY_FIELDS中的工具按固定字段取值拼接（其余参数不影响结果），
+    其他工具将参数按键排序后序列化
+    """
+    fields = TOOL_KEY_FIELDS.get(tool_name)
+    if fields is not None:
+        packed = "\x1f".join(
+            "" if parameters.get(field) is None else str(parameters[field])
+            for field in fields
+        ).encode("utf-8")
+    else:
+        packed = orjson.dumps(parameters, option=orjson.OPT_SORT_KEYS)
+    digest = hashlib.blake2b(packed, digest_size=16).hexdigest()
+    return f"mcp:{server_name}:{tool_name}:{digest}"
+
+
+def _cacheable(result: Dict[str, Any]) -> bool:
+    """只缓存成功结果（错误结果和模拟数据不缓存）"""
+    return (
+        isinstance(result, dict)
+        and "error" not in result
+        and result.get("status") != "error"
+        and not result.get("mock")
+    )
+
+
+async def get_cached_result(key: str) -> Optional[Dict[str, Any]]:
+    """读取缓存结果（Redis不可用时视为未命中）"""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        data = await client.get(key)
+    except Exception as e:
+        logger.warning(f"读取MCP结果缓存失败: {e}")
+        return None
+    return orjson.loads(data) if data else None
+
+
+async def set_cached_result(key: str, result: Dict[str, Any], ttl: int) -> None:
+    """写入缓存结果（失败时只记录日志）"""
+    client = get_redis()
+    if client is None or not _cacheable(result):
+        return
+    try:
+        # 统计结果按 risk_level 等分组时键不是字符串（或为None）
+        await client.set(key, orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS), ex=ttl)
+    except Exception as e:
+        logger.warning(f"写入MCP结果缓存失败: {e}")
@@ -3,15 +3,198 @@
 提供本地数据库和外部数据源的统一检索接口
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+import math
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
+from sqlalchemy import select, case, func, literal_column, or_
+from sqlalchemy.dialects.mysql import match
 import logging
+import orjson
+from app.core.cache import AsyncTTLCache
+from app.models import Building
 from .base_client import MCPClientBase
 from .config import MCPServerConfig
 
 logger = logging.getLogger(__name__)
 
+# 语义搜索结果缓存（按归一化后的关键词，短TTL以反映数据变化）
+_semantic_cache = AsyncTTLCache(maxsize=1024, ttl=60)
+
+# 建筑高度统计区间（按顺序输出）
+HEIGHT_BUCKETS = ("0-50m", "50-100m", "100-200m", "200m+")
+
+# 建筑检索返回的列（只查询需要的列，不构造ORM实例）
+BUILDING_SEARCH_COLUMNS = (
+    Building.id,
+    Building.name,
+    Building.category,
+    Building.height,
+    Building.longitude,
+    Building.latitude,
+    Building.address,
+    Building.district,
+    Building.city,
+    Building.risk_level,
+    Building.floors,
+    Building.area,
+)
+
+
+# 建筑坐标的空间列（由经纬度生成的 POINT SRID 4326，带SPATIAL索引，模型中不映射）
+BUILDING_GEOM = literal_column("tb_buildings.geom")
+# 每纬度对应的米数
+METERS_PER_DEGREE = 111_320
+
+
+def _bounding_box(longitude: float, latitude: float, radius: float):
+    """圆形范围的外接矩形（供空间索引粗筛）"""
+    d_lat = radius / METERS_PER_DEGREE
+    d_lon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    min_lon, max_lon = longitude - d_lon, longitude + d_lon
+    min_lat, max_lat = max(latitude - d_lat, -90), min(latitude + d_lat, 90)
+    wkt = (
+        f"POLYGON(({min_lon} {min_lat}, {max_lon} {min_lat}, {max_lon} {max_lat}, "
+        f"{min_lon} {max_lat}, {min_lon} {min_lat}))"
+    )
+    return func.ST_GeomFromText(wkt, 4326, "axis-order=long-lat")
+
+
+# ngram全文索引的分词长度（MySQL默认 ngram_token_size=2）
+NGRAM_TOKEN_SIZE = 2
+
+
+def _keyword_condition(keyword: str):
+    """
+    关键词条件：能用全文索引时按短语匹配 name/address/description，
+    关键词短于分词长度时退回 LIKE 子串匹配
+
+    Returns:
+        (过滤条件, 相关度表达式)，LIKE匹配时相关度为None
+    """
+    if len(keyword) < NGRAM_TOKEN_SIZE:
+        return or_(
+            Building.name.contains(keyword),
+            Building.address.contains(keyword),
+            Building.description.contains(keyword)
+        ), None
+    phrase = keyword.replace('"', " ")
+    relevance = match(
+        Building.name, Building.address, Building.description,
+        against=f'"{phrase}"'
+    ).in_boolean_mode()
+    # MATCH 在 WHERE 中作为过滤条件，在 ORDER BY 中返回相关度得分（同一表达式只计算一次）
+    return relevance, relevance
+
+
+# 数据增强工具定义（静态，所有实例共享）
+SEARCH_TOOLS = [
+    {
+        "name": "search_buildings",
+        "description": "智能建筑检索，支持多维度筛选",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "city": {"type": "string"},
+                "district": {"type": "string"},
+                "min_height": {"type": "number"},
+                "max_height": {"type": "number"},
+                "category": {"type": "string"},
+                "risk_level": {"type": "number"},
+                "keyword": {"type": "string"},
+                "limit": {"type": "number", "default": 20}
+            }
+        }
+    },
+    {
+        "name": "search_poi",
+        "description": "周边检索，查找指定坐标半径范围内的建筑",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "longitude": {"type": "number"},
+                "latitude": {"type": "number"},
+                "radius": {"type": "number", "default": 1000},
+                "poi_type": {"type": "string"}
+            }
+        }
+    },
+    {
+        "name": "get_statistics",
+        "description": "获取建筑统计数据",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "city": {"type": "string"},
+                "group_by": {"type": "string", "enum": ["category", "height", "risk_level"]}
+            }
+        }
+    },
+    {
+        "name": "semantic_search",
+        "description": "语义搜索（结合AI理解）",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string"},
+                "limit": {"type": "number", "default": 10}
+            }
+        }
+    }
+]
+SEARCH_TOOLS_JSON = orjson.dumps(SEARCH_TOOLS)
+
+
+def _building_query(params: Dict[str, Any]):
+    """根据检索参数构建建筑查询（全文检索时按相关度排序）"""
+    conditions = []
+
+    city = params.get("city")
+    if city:
+        conditions.append(Building.city == city)
+
+    district = params.get("district")
+    if district:
+        conditions.append(Building.district == district)
+
+    min_height = params.get("min_height")
+    if min_height is not None:
+        conditions.append(Building.height >= min_height)
+
+    max_height = params.get("max_height")
+    if max_height is not None:
+        conditions.append(Building.height <= max_height)
+
+    category = params.get("category")
+    if category:
+        conditions.append(Building.category == category)
+
+    risk_level = params.get("risk_level")
+    if risk_level is not None:
+        conditions.append(Building.risk_level >= risk_level)
+
+    relevance = None
+    keyword = params.get("keyword")
+    if keyword:
+        condition, relevance = _keyword_condition(keyword)
+        conditions.append(condition)
+
+    limit = params.get("limit", 20)
+    stmt = select(*BUILDING_SEARCH_COLUMNS).where(*conditions).limit(limit)
+    if relevance is not None:
+        stmt = stmt.order_by(relevance.desc())
+    return stmt
+
+
+def _format_building(row) -> Dict[str, Any]:
+    """格式化一行建筑检索结果"""
+    return {
+        **row,
+        "height": float(row["height"]) if row["height"] else None,
+        "longitude": float(row["longitude"]),
+        "latitude": float(row["latitude"]),
+        "area": float(row["area"]) if row["area"] else None,
+    }
+
 
 class DataEnhancementClient(MCPClientBase):
     """数据增强检索客户端"""
@@ -42,61 +225,12 @@ class DataEnhancementClient(MCPClientBase):
             return {"error": str(e)}
 
     async def list_tools(self) -> List[Dict[str, Any]]:
-        """列出具可用的数据增强工具"""
-        return [
-            {
-                "name": "search_buildings",
-                "description": "智能建筑检索，支持多维度筛选",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {"type": "string"},
-                        "district": {"type": "string"},
-                        "min_height": {"type": "number"},
-                        "max_height": {"type": "number"},
-                        "category": {"type": "string"},
-                        "risk_level": {"type": "number"},
-                        "keyword": {"type": "string"},
-                        "limit": {"type": "number", "default": 20}
-                    }
-                }
-            },
-            {
-                "name": "search_poi",
-                "description": "兴趣点(POI)搜索",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "longitude": {"type": "number"},
-                        "latitude": {"type": "number"},
-                        "radius": {"type": "number", "default": 1000},
-                        "poi_type": {"type": "string"}
-                    }
-                }
-            },
-            {
-                "name": "get_statistics",
-                "description": "获取建筑统计数据",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {"type": "string"},
-                        "group_by": {"type": "string", "enum": ["category", "height", "risk_level"]}
-                    }
-                }
-            },
-            {
-                "name": "semantic_search",
-                "description": "语义搜索（结合AI理解）",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "query": {"type": "string"},
-                        "limit": {"type": "number", "default": 10}
-                    }
-                }
-            }
-        ]
+        """列出具可用的数据增强工具（返回共享列表，调用方不应修改）"""
+        return SEARCH_TOOLS
+
+    def list_tools_json_bytes(self) -> bytes:
+        """工具列表的JSON序列化结果（预先序列化，直接复用）"""
+        return SEARCH_TOOLS_JSON
 
     async def _search_buildings(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -112,67 +246,9 @@ class DataEnhancementClient(MCPClientBase):
             return {"error": "数据库连接不可用"}
 
         try:
-            from app.models import Building
+            rows = (await self.db.execute(_building_query(params))).mappings().all()
 
-            # 构建查询条件
-            conditions = []
-
-            city = params.get("city")
-            if city:
-                conditions.append(Building.city == city)
-
-            district = params.get("district")
-            if district:
-                conditions.append(Building.district == district)
-
-            min_height = params.get("min_height")
-            if min_height is not None:
-                conditions.append(Building.height >= min_height)
-
-            max_height = params.get("max_height")
-            if max_height is not None:
-                conditions.append(Building.height <= max_height)
-
-            category = params.get("category")
-            if category:
-                conditions.append(Building.category == category)
-
-            risk_level = params.get("risk_level")
-            if risk_level is not None:
-                conditions.append(Building.risk_level >= risk_level)
-
-            keyword = params.get("keyword")
-            if keyword:
-                conditions.append(
-                    or_(
-                        Building.name.contains(keyword),
-                        Building.address.contains(keyword),
-                        Building.description.contains(keyword)
-                    )
-                )
-
-            # 执行查询
-            query = self.db.query(Building).filter(and_(*conditions))
-            limit = params.get("limit", 20)
-            buildings = query.limit(limit).all()
-
-            # 格式化结果
-            results = []
-            for b in buildings:
-                results.append({
-                    "id": b.id,
-                    "name": b.name,
-                    "category": b.category,
-                    "height": float(b.height) if b.height else None,
-                    "longitude": float(b.longitude),
-                    "latitude": float(b.latitude),
-                    "address": b.address,
-                    "district": b.district,
-                    "city": b.city,
-                    "risk_level": b.risk_level,
-                    "floors": b.floors,
-                    "area": float(b.area) if b.area else None,
-                })
+            results = [_format_building(row) for row in rows]
 
             return {
                 "status": "success",
@@ -188,23 +264,91 @@ class DataEnhancementClient(MCPClientBase):
                 "error": str(e)
             }
 
+    async def stream_buildings(self, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式建筑检索：使用服务端游标逐行读取并产出结果，不在内存中累积整个列表
+
+        需要列表的调用方可使用 [b async for b in client.stream_buildings(params)]
+        """
+        result = await self.db.stream(_building_query(params))
+        try:
+            async for row in result.mappings():
+                yield _format_building(row)
+        finally:
+            await result.close()
+
     async def _search_poi(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
-        POI搜索（简化实现）
+        周边检索：查找指定坐标半径范围内的建筑
+        先用外接矩形走空间索引粗筛，再按球面距离精确过滤并排序
 
         Args:
             params: 搜索参数
 
         Returns:
-            POI列表
+            按距离排序的建筑列表
         """
-        # 这里可以集成高德地图POI搜索API
-        # 暂时返回模拟数据
-        return {
-            "status": "success",
-            "message": "POI搜索功能需要配置高德地图API",
-            "params": params
-        }
+        if not self.db:
+            return {"error": "数据库连接不可用"}
+
+        longitude = params.get("longitude")
+        latitude = params.get("latitude")
+        if longitude is None or latitude is None:
+            return {"status": "error", "error": "缺少经纬度参数"}
+
+        try:
+            longitude, latitude = float(longitude), float(latitude)
+            radius = float(params.get("radius", 1000))
+            limit = params.get("limit", 50)
+
+            # 与geom列及外接矩形一致，按经度在前的轴顺序构造中心点
+            center = func.ST_PointFromText(
+                f"POINT({longitude} {latitude})", 4326, "axis-order=long-lat"
+            )
+            distance = func.ST_Distance_Sphere(BUILDING_GEOM, center)
+
+            conditions = [
+                func.MBRContains(_bounding_box(longitude, latitude, radius), BUILDING_GEOM),
+                distance <= radius,
+            ]
+            poi_type = params.get("poi_type")
+            if poi_type:
+                conditions.append(Building.category == poi_type)
+
+            stmt = (
+                select(*BUILDING_SEARCH_COLUMNS, distance.label("distance"))
+                .where(*conditions)
+                .order_by("distance")
+                .limit(limit)
+            )
+            rows = (await self.db.execute(stmt)).mappings().all()
+
+            results = [
+                {
+                    **row,
+                    "height": float(row["height"]) if row["height"] else None,
+                    "longitude": float(row["longitude"]),
+                    "latitude": float(row["latitude"]),
+                    "area": float(row["area"]) if row["area"] else None,
+                    "distance": round(float(row["distance"]), 1),
+                }
+                for row in rows
+            ]
+
+            return {
+                "status": "success",
+                "center": {"longitude": longitude, "latitude": latitude},
+                "radius": radius,
+                "total": len(results),
+                "buildings": results
+            }
+
+        except Exception as e:
+            logger.error(f"周边检索失败: {e}")
+            return {
+                "status": "error",
+                "error": str(e)
+            }
 
     async def _get_statistics(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -220,65 +364,49 @@ class DataEnhancementClient(MCPClientBase):
             return {"error": "数据库连接不可用"}
 
         try:
-            from app.models import Building
-            from sqlalchemy import func
-
             city = params.get("city")
             group_by = params.get("group_by", "category")
 
-            # 基础查询
-            query = self.db.query(Building)
-            if city:
-                query = query.filter(Building.city == city)
+            # 基础条件
+            conditions = [Building.city == city] if city else []
 
-            total = query.count()
-
-            # 分组统计
+            # 分组统计（一条 GROUP BY 查询，总数由各分组求和得到）
             if group_by == "category":
-                stats = self.db.query(
-                    Building.category,
-                    func.count(Building.id)
-                ).group_by(Building.category).all()
-
-                return {
-                    "status": "success",
-                    "total": total,
-                    "group_by": "category",
-                    "statistics": {cat: count for cat, count in stats}
-                }
+                group_key = Building.category
             elif group_by == "height":
-                stats = {
-                    "0-50m": query.filter(Building.height < 50).count(),
-                    "50-100m": query.filter(
-                        and_(Building.height >= 50, Building.height < 100)
-                    ).count(),
-                    "100-200m": query.filter(
-                        and_(Building.height >= 100, Building.height < 200)
-                    ).count(),
-                    "200m+": query.filter(Building.height >= 200).count(),
-                }
-
-                return {
-                    "status": "success",
-                    "total": total,
-                    "group_by": "height",
-                    "statistics": stats
-                }
+                # 高度为空的建筑落入NULL分组：计入总数但不计入任何区间
+                group_key = case(
+                    (Building.height < 50, "0-50m"),
+                    (Building.height < 100, "50-100m"),
+                    (Building.height < 200, "100-200m"),
+                    (Building.height >= 200, "200m+"),
+                )
             elif group_by == "risk_level":
-                stats = self.db.query(
-                    Building.risk_level,
-                    func.count(Building.id)
-                ).group_by(Building.risk_level).all()
-
-                return {
-                    "status": "success",
-                    "total": total,
-                    "group_by": "risk_level",
-                    "statistics": {risk: count for risk, count in stats}
-                }
+                group_key = Building.risk_level
             else:
                 return {"error": f"Unsupported group_by: {group_by}"}
 
+            bucket = group_key.label("bucket")
+            rows = (await self.db.execute(
+                select(bucket, func.count())
+                .where(*conditions)
+                .group_by(bucket)
+            )).all()
+            total = sum(count for _, count in rows)
+
+            if group_by == "height":
+                stats = dict.fromkeys(HEIGHT_BUCKETS, 0)
+                stats.update((label, count) for label, count in rows if label is not None)
+            else:
+                stats = {key: count for key, count in rows}
+
+            return {
+                "status": "success",
+                "total": total,
+                "group_by": group_by,
+                "statistics": stats
+            }
+
         except Exception as e:
             logger.error(f"统计查询失败: {e}")
             return {
@@ -302,13 +430,14 @@ class DataEnhancementClient(MCPClientBase):
         limit = params.get("limit", 10)
 
         # 简单的关键词提取
-        keywords = query.split()
-
-        # 使用建筑检索
-        return await self._search_buildings({
-            "keyword": " ".join(keywords[:3]),  # 取前3个关键词
-            "limit": limit
-        })
+        keyword = " ".join(query.split()[:3])  # 取前3个关键词
+
+        # 使用建筑检索（措辞只差大小写/空白的查询共享缓存结果）
+        return await _semantic_cache.get_or_fetch(
+            (keyword.lower(), limit),
+            lambda: self._search_buildings({"keyword": keyword, "limit": limit}),
+            lambda result: result.get("status") == "success"
+        )
 
     def set_db(self, db: AsyncSession):
         """设置数据库连接"""
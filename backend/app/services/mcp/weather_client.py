@@ -3,24 +3,102 @@
 获取实时天气数据，用于驱动Cesium场景的天气效果
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional
+from types import MappingProxyType
 import logging
+import orjson
+import random
 import httpx
-from datetime import datetime
+from datetime import datetime, timedelta
+from app.core.cache import AsyncTTLCache, SingleFlight
 from .base_client import MCPClientBase
 from .config import MCPServerConfig
+from .http import get_shared_http_client
 
 logger = logging.getLogger(__name__)
 
+# 缺失字段的只读默认值（避免每次查找分配空字典）
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# OpenWeatherMap天气状况 → Cesium支持的天气条件
+_CONDITION_MAP = MappingProxyType({
+    "Clear": "clear",
+    "Clouds": "cloudy",
+    "Rain": "rain",
+    "Drizzle": "rain",
+    "Thunderstorm": "rain",
+    "Snow": "snow",
+    "Mist": "fog",
+    "Fog": "fog",
+    "Haze": "fog",
+    "Smoke": "fog",
+    "Dust": "fog",
+    "Sand": "fog",
+    "Ash": "fog",
+    "Squall": "rain",
+    "Tornado": "rain"
+})
+
+# 实时天气缓存：按城市或坐标（保留2位小数，约1公里）缓存10分钟
+_weather_cache = AsyncTTLCache(maxsize=2048, ttl=600)
+# 天气预报请求合并：同一城市/坐标的并发预报请求共享一次上游调用
+_forecast_inflight = SingleFlight()
+
+
+# 天气工具定义（静态，所有实例共享）
+WEATHER_TOOLS = [
+    {
+        "name": "get_current_weather",
+        "description": "获取指定城市的当前天气",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "city": {
+                    "type": "string",
+                    "description": "城市名称（如：Beijing, Shanghai, London）"
+                },
+                "latitude": {"type": "number", "description": "纬度（与city二选一）"},
+                "longitude": {"type": "number", "description": "经度（与city二选一）"}
+            }
+        }
+    },
+    {
+        "name": "get_weather_by_coordinates",
+        "description": "根据坐标获取天气",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "latitude": {"type": "number"},
+                "longitude": {"type": "number"}
+            },
+            "required": ["latitude", "longitude"]
+        }
+    },
+    {
+        "name": "get_weather_forecast",
+        "description": "获取天气预报",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "city": {"type": "string"},
+                "latitude": {"type": "number"},
+                "longitude": {"type": "number"},
+                "days": {"type": "number", "default": 1}
+            }
+        }
+    }
+]
+WEATHER_TOOLS_JSON = orjson.dumps(WEATHER_TOOLS)
+
 
 class OpenWeatherMapClient(MCPClientBase):
     """OpenWeatherMap天气客户端"""
 
-    def __init__(self, config: MCPServerConfig):
+    def __init__(self, config: MCPServerConfig, http_client: Optional[httpx.AsyncClient] = None):
         super().__init__(config)
         self.api_key = config.api_key
         self.base_url = config.endpoint or "https://api.openweathermap.org/data/2.5"
-        self.client = httpx.AsyncClient(timeout=10)
+        self.client = http_client or get_shared_http_client()
 
     async def call_tool(
         self,
@@ -54,49 +132,12 @@ class OpenWeatherMapClient(MCPClientBase):
             return {"error": str(e)}
 
     async def list_tools(self) -> list:
-        """列出可用的天气工具"""
-        return [
-            {
-                "name": "get_current_weather",
-                "description": "获取指定城市的当前天气",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {
-                            "type": "string",
-                            "description": "城市名称（如：Beijing, Shanghai, London）"
-                        },
-                        "latitude": {"type": "number", "description": "纬度（与city二选一）"},
-                        "longitude": {"type": "number", "description": "经度（与city二选一）"}
-                    }
-                }
-            },
-            {
-                "name": "get_weather_by_coordinates",
-                "description": "根据坐标获取天气",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "latitude": {"type": "number"},
-                        "longitude": {"type": "number"}
-                    },
-                    "required": ["latitude", "longitude"]
-                }
-            },
-            {
-                "name": "get_weather_forecast",
-                "description": "获取天气预报",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "city": {"type": "string"},
-                        "latitude": {"type": "number"},
-                        "longitude": {"type": "number"},
-                        "days": {"type": "number", "default": 1}
-                    }
-                }
-            }
-        ]
+        """列出可用的天气工具（返回共享列表，调用方不应修改）"""
+        return WEATHER_TOOLS
+
+    def list_tools_json_bytes(self) -> bytes:
+        """工具列表的JSON序列化结果（预先序列化，直接复用）"""
+        return WEATHER_TOOLS_JSON
 
     async def get_current_weather(
         self,
@@ -115,36 +156,22 @@ class OpenWeatherMapClient(MCPClientBase):
         Returns:
             天气数据
         """
-        try:
-            # 如果没有提供API key，返回模拟数据
-            if not self.api_key:
-                return self._get_mock_weather(city, latitude, longitude)
-
-            # 构建请求参数
-            params = {
-                "appid": self.api_key,
-                "units": "metric"
-            }
-
-            if city:
-                params["q"] = city
-            elif latitude and longitude:
-                params["lat"] = latitude
-                params["lon"] = longitude
-            else:
-                return {"error": "请提供城市名称或坐标"}
-
-            # 发送请求
-            url = f"{self.base_url}/weather"
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        # 如果没有提供API key，返回模拟数据
+        if not self.api_key:
+            return self._get_mock_weather(city, latitude, longitude)
 
-            # 解析并转换为我们需要的格式
-            weather_data = self._parse_weather_data(data)
+        if city:
+            cache_key = ("city", city.strip().lower())
+        elif latitude and longitude:
+            cache_key = ("coord", round(latitude, 2), round(longitude, 2))
+        else:
+            return {"error": "请提供城市名称或坐标"}
 
-            logger.info(f"✅ 获取天气数据成功: {weather_data.get('city')}")
-            return weather_data
+        try:
+            return await _weather_cache.get_or_fetch(
+                cache_key,
+                lambda: self._fetch_current_weather(city, latitude, longitude)
+            )
 
         except httpx.HTTPError as e:
             logger.warning(f"⚠️ 天气API请求失败: {e}，使用模拟数据")
@@ -156,6 +183,37 @@ class OpenWeatherMapClient(MCPClientBase):
                 "fallback": self._get_mock_weather(city, latitude, longitude)
             }
 
+    async def _fetch_current_weather(
+        self,
+        city: Optional[str],
+        latitude: Optional[float],
+        longitude: Optional[float]
+    ) -> Dict[str, Any]:
+        """请求OpenWeatherMap实时天气接口"""
+        # 构建请求参数
+        params = {
+            "appid": self.api_key,
+            "units": "metric"
+        }
+
+        if city:
+            params["q"] = city
+        else:
+            params["lat"] = latitude
+            params["lon"] = longitude
+
+        # 发送请求
+        url = f"{self.base_url}/weather"
+        response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+        # 解析并转换为我们需要的格式
+        weather_data = self._parse_weather_data(data)
+
+        logger.info(f"✅ 获取天气数据成功: {weather_data.get('city')}")
+        return weather_data
+
     async def get_weather_by_coordinates(
         self,
         latitude: float,
@@ -172,59 +230,73 @@ class OpenWeatherMapClient(MCPClientBase):
         days: int = 1
     ) -> Dict[str, Any]:
         """获取天气预报"""
-        try:
-            if not self.api_key:
-                return self._get_mock_forecast(city, latitude, longitude, days)
-
-            params = {
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": days * 8  # 每天8次预报（3小时间隔）
-            }
+        if not self.api_key:
+            return self._get_mock_forecast(city, latitude, longitude, days)
 
-            if city:
-                params["q"] = city
-            elif latitude and longitude:
-                params["lat"] = latitude
-                params["lon"] = longitude
-            else:
-                return {"error": "请提供城市名称或坐标"}
-
-            url = f"{self.base_url}/forecast"
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            # 解析预报数据
-            forecast_data = []
-            for item in data.get("list", []):
-                forecast_data.append({
-                    "datetime": datetime.fromtimestamp(item.get("dt", 0)).isoformat(),
-                    "temp": item["main"].get("temp"),
-                    "feels_like": item["main"].get("feels_like"),
-                    "condition": item["weather"][0].get("main") if item.get("weather") else "Clear",
-                    "description": item["weather"][0].get("description") if item.get("weather") else "",
-                    "humidity": item["main"].get("humidity"),
-                    "wind_speed": item.get("wind", {}).get("speed"),
-                })
+        params = {
+            "appid": self.api_key,
+            "units": "metric",
+            "cnt": days * 8  # 每天8次预报（3小时间隔）
+        }
 
-            return {
-                "status": "success",
-                "city": data.get("city", {}).get("name"),
-                "country": data.get("city", {}).get("country"),
-                "forecast": forecast_data
-            }
+        if city:
+            params["q"] = city
+            key = ("city", city.strip().lower(), days)
+        elif latitude and longitude:
+            params["lat"] = latitude
+            params["lon"] = longitude
+            key = ("coord", round(latitude, 2), round(longitude, 2), days)
+        else:
+            return {"error": "请提供城市名称或坐标"}
 
+        try:
+            return await _forecast_inflight.do(key, lambda: self._fetch_forecast(params))
         except Exception as e:
             logger.error(f"获取天气预报失败: {e}")
             return self._get_mock_forecast(city, latitude, longitude, days)
 
+    async def _fetch_forecast(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """请求OpenWeatherMap天气预报接口"""
+        url = f"{self.base_url}/forecast"
+        response = await self.client.get(url, params=params)
+        response.raise_for_status()
+        data = orjson.loads(response.content)
+
+        # 解析预报数据（每个嵌套字典只查找一次）
+        fromtimestamp = datetime.fromtimestamp
+        forecast_data = [
+            {
+                "datetime": fromtimestamp(item.get("dt", 0)).isoformat(),
+                "temp": main.get("temp"),
+                "feels_like": main.get("feels_like"),
+                "condition": weather.get("main", "Clear"),
+                "description": weather.get("description", ""),
+                "humidity": main.get("humidity"),
+                "wind_speed": (item.get("wind") or _EMPTY).get("speed"),
+            }
+            for item in data.get("list") or ()
+            for main, weather in ((
+                item.get("main") or _EMPTY,
+                (item.get("weather") or (_EMPTY,))[0],
+            ),)
+        ]
+
+        city_info = data.get("city") or _EMPTY
+        return {
+            "status": "success",
+            "city": city_info.get("name"),
+            "country": city_info.get("country"),
+            "forecast": forecast_data
+        }
+
     def _parse_weather_data(self, data: dict) -> Dict[str, Any]:
         """解析天气API返回的数据"""
-        weather_info = data.get("weather", [{}])[0]
-        main_data = data.get("main", {})
-        wind_data = data.get("wind", {})
-        sys_data = data.get("sys", {})
+        weather_info = (data.get("weather") or [{}])[0]
+        main_data = data.get("main") or {}
+        wind_data = data.get("wind") or {}
+        sys_data = data.get("sys") or {}
+        coord = data.get("coord") or {}
+        now = datetime.now()
 
         # 映射天气状况到我们的标准类型
         condition = weather_info.get("main", "Clear")
@@ -234,8 +306,8 @@ class OpenWeatherMapClient(MCPClientBase):
             "status": "success",
             "city": data.get("name"),
             "country": sys_data.get("country"),
-            "latitude": data.get("coord", {}).get("lat"),
-            "longitude": data.get("coord", {}).get("lon"),
+            "latitude": coord.get("lat"),
+            "longitude": coord.get("lon"),
             "temperature": main_data.get("temp"),
             "feels_like": main_data.get("feels_like"),
             "humidity": main_data.get("humidity"),
@@ -246,53 +318,37 @@ class OpenWeatherMapClient(MCPClientBase):
             "wind_speed": wind_data.get("speed"),
             "wind_direction": wind_data.get("deg"),
             "visibility": data.get("visibility", 10000),
-            "clouds": data.get("clouds", {}).get("all"),
+            "clouds": (data.get("clouds") or {}).get("all"),
             "is_day": self._is_daytime(
-                data.get("coord", {}).get("lat"),
-                data.get("coord", {}).get("lon"),
+                coord.get("lat"),
+                coord.get("lon"),
                 sys_data.get("sunrise"),
-                sys_data.get("sunset")
+                sys_data.get("sunset"),
+                now
             ),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
 
     def _map_to_cesium_condition(self, condition: str) -> str:
         """将天气API的condition映射到Cesium支持的条件"""
-        condition_map = {
-            "Clear": "clear",
-            "Clouds": "cloudy",
-            "Rain": "rain",
-            "Drizzle": "rain",
-            "Thunderstorm": "rain",
-            "Snow": "snow",
-            "Mist": "fog",
-            "Fog": "fog",
-            "Haze": "fog",
-            "Smoke": "fog",
-            "Dust": "fog",
-            "Sand": "fog",
-            "Ash": "fog",
-            "Squall": "rain",
-            "Tornado": "rain"
-        }
-        return condition_map.get(condition, "clear")
+        return _CONDITION_MAP.get(condition, "clear")
 
     def _is_daytime(
         self,
         lat: Optional[float],
         lon: Optional[float],
         sunrise: Optional[int],
-        sunset: Optional[int]
+        sunset: Optional[int],
+        now: Optional[datetime] = None
     ) -> bool:
-        """判断是否是白天"""
+        """判断是否是白天（now为调用方已获取的当前时间，避免重复取时）"""
         if not lat or not lon:
             # 简单判断：当前时间是否在6-18点
-            current_hour = datetime.now().hour
+            current_hour = (now or datetime.now()).hour
             return 6 <= current_hour < 18
 
         if sunrise and sunset:
-            current_time = datetime.now().timestamp()
-            return sunrise <= current_time < sunset
+            return sunrise <= (now or datetime.now()).timestamp() < sunset
 
         return True
 
@@ -303,10 +359,8 @@ class OpenWeatherMapClient(MCPClientBase):
         longitude: Optional[float] = None
     ) -> Dict[str, Any]:
         """生成模拟天气数据（用于演示或API不可用时）"""
-        import random
-
-        current_hour = datetime.now().hour
-        is_day = 6 <= current_hour < 18
+        now = datetime.now()
+        is_day = 6 <= now.hour < 18
 
         # 根据时间生成天气
         conditions = ["Clear", "Clouds", "Rain", "Snow", "Fog"]
@@ -332,7 +386,8 @@ class OpenWeatherMapClient(MCPClientBase):
             "visibility": random.uniform(5000, 10000),
             "clouds": random.uniform(0, 100),
             "is_day": is_day,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
+            "mock": True,
             "note": "这是模拟数据，请配置OpenWeatherMap API Key获取真实天气"
         }
 
@@ -344,32 +399,32 @@ class OpenWeatherMapClient(MCPClientBase):
         days: int = 1
     ) -> Dict[str, Any]:
         """生成模拟预报数据"""
-        forecast = []
-        for i in range(days * 8):
-            import random
-            from datetime import timedelta
-
-            future_time = datetime.now() + timedelta(hours=i * 3)
-            condition = random.choice(["Clear", "Clouds", "Rain", "Snow"])
-
-            forecast.append({
-                "datetime": future_time.isoformat(),
-                "temp": random.uniform(15, 30),
-                "feels_like": random.uniform(15, 30),
+        count = days * 8
+        now = datetime.now()
+        uniform = random.uniform
+        conditions = random.choices(["Clear", "Clouds", "Rain", "Snow"], k=count)
+
+        forecast = [
+            {
+                "datetime": (now + timedelta(hours=i * 3)).isoformat(),
+                "temp": uniform(15, 30),
+                "feels_like": uniform(15, 30),
                 "condition": condition,
                 "description": condition.lower(),
-                "humidity": random.uniform(40, 90),
-                "wind_speed": random.uniform(0, 10),
-            })
+                "humidity": uniform(40, 90),
+                "wind_speed": uniform(0, 10),
+            }
+            for i, condition in enumerate(conditions)
+        ]
 
         return {
             "status": "success",
             "city": city or "Unknown",
             "forecast": forecast,
+            "mock": True,
             "note": "这是模拟预报数据"
         }
 
     async def close(self):
-        """关闭客户端"""
-        if self.client:
-            await self.client.aclose()
+        """关闭客户端（共享连接池由MCPManager统一关闭）"""
+        pass
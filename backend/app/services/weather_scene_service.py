@@ -3,11 +3,55 @@
 当用户查询城市天气时，自动执行：飞行 → 获取天气 → 应用效果
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Mapping, Optional
+from types import MappingProxyType
 import logging
+import re
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# 城市坐标映射（只读）
+_CITY_COORDS = MappingProxyType({
+    '北京': {'longitude': 116.4074, 'latitude': 39.9042},
+    '上海': {'longitude': 121.4737, 'latitude': 31.2304},
+    '广州': {'longitude': 113.2644, 'latitude': 23.1291},
+    '深圳': {'longitude': 114.0579, 'latitude': 22.5431},
+    '香港': {'longitude': 114.1694, 'latitude': 22.3193},
+    '西安': {'longitude': 108.9398, 'latitude': 34.3416},
+    '成都': {'longitude': 104.0668, 'latitude': 30.5728},
+    '杭州': {'longitude': 120.1551, 'latitude': 30.2741},
+    '武汉': {'longitude': 114.3055, 'latitude': 30.5928},
+    '南京': {'longitude': 118.7969, 'latitude': 32.0603},
+    'Beijing': {'longitude': 116.4074, 'latitude': 39.9042},
+    'Shanghai': {'longitude': 121.4737, 'latitude': 31.2304},
+    'Guangzhou': {'longitude': 113.2644, 'latitude': 23.1291},
+    'Shenzhen': {'longitude': 114.0579, 'latitude': 22.5431},
+    'Hong Kong': {'longitude': 114.1694, 'latitude': 22.3193},
+    "Xi'an": {'longitude': 108.9398, 'latitude': 34.3416},
+    'Chengdu': {'longitude': 104.0668, 'latitude': 30.5728},
+    'Hangzhou': {'longitude': 120.1551, 'latitude': 30.2741},
+})
+# 小写城市名 → (原城市名, 坐标)，用于忽略大小写匹配和模糊匹配
+_CITY_COORDS_LOWER = MappingProxyType({
+    key.lower(): (key, value) for key, value in _CITY_COORDS.items()
+})
+# 所有城市名的预编译多模式匹配（长名优先），一次扫描找出查询文本中包含的城市名
+_CITY_PATTERN = re.compile(
+    "|".join(re.escape(key) for key in sorted(_CITY_COORDS_LOWER, key=len, reverse=True))
+)
+
+
+def _match_city(city_lower: str) -> Optional[tuple]:
+    """模糊匹配城市：查询文本包含城市名（如“北京市”），或查询文本是城市名的一部分（如“hang”）"""
+    match = _CITY_PATTERN.search(city_lower)
+    if match:
+        return _CITY_COORDS_LOWER[match.group()]
+    for key_lower, entry in _CITY_COORDS_LOWER.items():
+        if city_lower in key_lower:
+            return entry
+    return None
+
 
 async def execute_weather_scene_action(
     city: str,
@@ -32,40 +76,19 @@ async def execute_weather_scene_action(
     """
     logger.info(f"🎬 生成天气场景动作: city={city}")
 
-    # 城市坐标映射
-    city_coords = {
-        '北京': {'longitude': 116.4074, 'latitude': 39.9042},
-        '上海': {'longitude': 121.4737, 'latitude': 31.2304},
-        '广州': {'longitude': 113.2644, 'latitude': 23.1291},
-        '深圳': {'longitude': 114.0579, 'latitude': 22.5431},
-        '香港': {'longitude': 114.1694, 'latitude': 22.3193},
-        '西安': {'longitude': 108.9398, 'latitude': 34.3416},
-        '成都': {'longitude': 104.0668, 'latitude': 30.5728},
-        '杭州': {'longitude': 120.1551, 'latitude': 30.2741},
-        '武汉': {'longitude': 114.3055, 'latitude': 30.5928},
-        '南京': {'longitude': 118.7969, 'latitude': 32.0603},
-        'Beijing': {'longitude': 116.4074, 'latitude': 39.9042},
-        'Shanghai': {'longitude': 121.4737, 'latitude': 31.2304},
-        'Guangzhou': {'longitude': 113.2644, 'latitude': 23.1291},
-        'Shenzhen': {'longitude': 114.0579, 'latitude': 22.5431},
-        'Hong Kong': {'longitude': 114.1694, 'latitude': 22.3193},
-        "Xi'an": {'longitude': 108.9398, 'latitude': 34.3416},
-        'Chengdu': {'longitude': 104.0668, 'latitude': 30.5728},
-        'Hangzhou': {'longitude': 120.1551, 'latitude': 30.2741},
-    }
-
-    # 获取坐标
-    coords = city_coords.get(city)
+    # 获取坐标：精确匹配 → 忽略大小写匹配 → 模糊匹配
+    coords = _CITY_COORDS.get(city)
+    if not coords:
+        entry = _CITY_COORDS_LOWER.get(city.lower())
+        if entry:
+            city, coords = entry
     if not coords and not (latitude and longitude):
-        # 尝试模糊匹配
-        for key, value in city_coords.items():
-            if city.lower() in key.lower() or key.lower() in city.lower():
-                coords = value
-                city = key
-                break
+        entry = _match_city(city.lower())
+        if entry:
+            city, coords = entry
 
-    if not coords:
-        coords = {'longitude': longitude, 'latitude': latitude}
+    # 返回副本，避免调用方修改共享的坐标表
+    coords = dict(coords) if coords else {'longitude': longitude, 'latitude': latitude}
 
     if not coords.get('longitude') or not coords.get('latitude'):
         return {
@@ -110,8 +133,8 @@ async def execute_weather_scene_action(
     }
 
 
-# 预定义的天气场景
-WEATHER_SCENES = {
+# 预定义的天气场景（只读）
+WEATHER_SCENES = MappingProxyType({
     "雨天": {
         "condition": "rain",
         "intensity": 0.7,
@@ -142,9 +165,21 @@ WEATHER_SCENES = {
         "is_day": False,
         "description": "雷雨夜场景"
     }
-}
+})
+
+
+# 天气场景的JSON序列化结果（导入时生成，直接用于响应）
+_WEATHER_SCENES_JSON = MappingProxyType({
+    name: orjson.dumps(scene) for name, scene in WEATHER_SCENES.items()
+})
+
+
+def get_weather_scene(scene_name: str) -> Optional[Mapping[str, Any]]:
+    """获取预定义的天气场景（只读）"""
+    scene = WEATHER_SCENES.get(scene_name)
+    return MappingProxyType(scene) if scene is not None else None
 
 
-def get_weather_scene(scene_name: str) -> Optional[Dict[str, Any]]:
-    """获取预定义的天气场景"""
-    return WEATHER_SCENES.get(scene_name)
+def get_weather_scene_bytes(scene_name: str) -> Optional[bytes]:
+    """获取预定义天气场景的JSON字节串"""
+    return _WEATHER_SCENES_JSON.get(scene_name)
@@ -4,15 +4,290 @@
 不依赖MCP包，直接调用OpenWeatherMap API
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+from types import MappingProxyType
+import asyncio
 import logging
 import httpx
+import orjson
 from datetime import datetime, timedelta
+import itertools
 import os
 import random
+import time
+
+from app.core.cache import AsyncTTLCache, SingleFlight
+from app.core.redis import get_redis
+from app.services.ai.limiter import RateLimitConfig, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
+# 缺失字段时使用的只读空字典（避免每次分配）
+_EMPTY = MappingProxyType({})
+
+# OpenWeatherMap天气状况 → Cesium支持的天气条件
+_CONDITION_MAP = MappingProxyType({
+    "Clear": "clear",
+    "Clouds": "cloudy",
+    "Rain": "rain",
+    "Drizzle": "rain",
+    "Thunderstorm": "rain",
+    "Snow": "snow",
+    "Mist": "fog",
+    "Fog": "fog",
+    "Haze": "fog",
+    "Smoke": "fog",
+    "Dust": "fog",
+    "Sand": "fog",
+    "Ash": "fog",
+    "Squall": "rain",
+    "Tornado": "rain"
+})
+
+# 模拟天气的天气状况及权重
+_MOCK_CONDITIONS = ("Clear", "Clouds", "Rain", "Snow", "Fog")
+_MOCK_WEIGHTS = (0.3, 0.3, 0.2, 0.1, 0.1)
+
+# 天气缓存时长（秒）：实时天气、预报、上游错误（短TTL，避免故障时反复请求上游）
+CURRENT_WEATHER_TTL = 300
+FORECAST_TTL = 3600
+UPSTREAM_ERROR_TTL = 30
+# 过期数据的保留时长（秒），上游不可用时作为兜底返回
+STALE_RETENTION = 86400
+
+# OpenWeatherMap连接池：HTTP/2多路复用 + 长keep-alive，突发轮询时复用已建立的TLS连接
+HTTP_TIMEOUT = httpx.Timeout(10.0)
+HTTP_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=300
+)
+_http_client: Optional[httpx.AsyncClient] = None
+
+# OpenWeatherMap限流（免费版60次/分钟，留出余量），配置了Redis时多实例共享配额
+OWM_RATE_LIMIT = RateLimitConfig(requests_per_second=50 / 60, burst=10, max_concurrency=10)
+# 仍然返回429时的最多尝试次数
+OWM_MAX_ATTEMPTS = 3
+
+# 未配置Redis时使用的进程内缓存
+_local_cache = AsyncTTLCache(maxsize=1024, ttl=STALE_RETENTION)
+# 缓存未命中时，同一缓存键的并发请求合并为一次上游调用
+_inflight = SingleFlight()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享的HTTP客户端（关闭后再次获取会重新创建）"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """关闭共享的HTTP客户端"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _cache_key(
+    kind: str,
+    city: Optional[str],
+    latitude: Optional[float],
+    longitude: Optional[float]
+) -> str:
+    """天气缓存键（坐标保留两位小数，约1km内的请求共享缓存）"""
+    lat = round(latitude, 2) if latitude else ""
+    lon = round(longitude, 2) if longitude else ""
+    return f"owm:{kind}:{city or ''}:{lat}:{lon}"
+
+
+async def _cache_entry(key: str) -> Optional[Tuple[float, Dict[str, Any], str, str]]:
+    """
+    读取缓存条目 (stale_after, body, etag, last_modified)（Redis不可用时视为未命中）
+
+    etag/last_modified 为上游响应的校验头，用于条件请求，没有时为空字符串
+    """
+    client = get_redis()
+    if client is None:
+        return _local_cache.get(key)
+    try:
+        body, stale_after, etag, last_modified = await client.hmget(
+            key, "body", "stale_after", "etag", "last_modified"
+        )
+    except Exception as e:
+        logger.warning(f"读取天气缓存失败: {e}")
+        return None
+    if body is None:
+        return None
+    return (
+        float(stale_after or 0),
+        orjson.loads(body),
+        (etag or b"").decode(),
+        (last_modified or b"").decode()
+    )
+
+
+async def _cache_get(key: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    读取缓存数据
+
+    超过 stale_after 视为未命中；allow_stale 为真时忽略 stale_after，用于上游故障时的兜底
+    """
+    entry = await _cache_entry(key)
+    if entry is None:
+        return None
+    stale_after, body, _, _ = entry
+    if not allow_stale and stale_after < time.time():
+        return None
+    return body
+
+
+async def _cache_set(
+    key: str,
+    value: Dict[str, Any],
+    ttl: int,
+    etag: str = "",
+    last_modified: str = ""
+) -> None:
+    """写入缓存：ttl秒后变为过期数据，过期数据再保留STALE_RETENTION秒（失败时只记录日志）"""
+    stale_after = time.time() + ttl
+    client = get_redis()
+    if client is None:
+        _local_cache.set(key, (stale_after, value, etag, last_modified), ttl + STALE_RETENTION)
+        return
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={
+                "body": orjson.dumps(value),
+                "stale_after": stale_after,
+                "etag": etag,
+                "last_modified": last_modified
+            })
+            pipe.expire(key, ttl + STALE_RETENTION)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"写入天气缓存失败: {e}")
+
+
+async def _conditional_get(
+    client: httpx.AsyncClient,
+    key: str,
+    url: str,
+    params: Dict[str, Any],
+    ttl: int
+) -> Tuple[Optional[httpx.Response], Optional[Dict[str, Any]]]:
+    """
+    带缓存校验头的条件GET（在OpenWeatherMap限流器内发起，429时退避重试）
+
+    缓存中有ETag/Last-Modified时附带If-None-Match/If-Modified-Since；
+    上游返回304时延长缓存有效期并返回 (None, 缓存数据)，否则返回 (响应, None)
+    """
+    entry = await _cache_entry(key)
+    headers = {}
+    if entry is not None:
+        _, _, etag, last_modified = entry
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    limiter = get_rate_limiter("openweathermap", params["appid"], OWM_RATE_LIMIT)
+    attempt = 0
+    while True:
+        attempt += 1
+        async with limiter.acquire():
+            response = await client.get(url, params=params, headers=headers or None)
+        if response.status_code != 429 or attempt >= OWM_MAX_ATTEMPTS:
+            break
+        # 指数退避 + 抖动
+        await asyncio.sleep(2 ** (attempt - 1) + random.random())
+
+    if response.status_code == 304 and entry is not None:
+        _, body, etag, last_modified = entry
+        await _cache_set(key, body, ttl, etag, last_modified)
+        return None, body
+    response.raise_for_status()
+    return response, None
+
+
+def _validators(response: httpx.Response) -> Tuple[str, str]:
+    """响应的缓存校验头 (ETag, Last-Modified)"""
+    return response.headers.get("ETag", ""), response.headers.get("Last-Modified", "")
+
+
+async def _mark_upstream_error(key: str, status_code: int) -> None:
+    """记录上游错误，短时间内不再请求上游"""
+    client = get_redis()
+    if client is None:
+        _local_cache.set(f"{key}:err", status_code, UPSTREAM_ERROR_TTL)
+        return
+    try:
+        await client.set(f"{key}:err", status_code, ex=UPSTREAM_ERROR_TTL)
+    except Exception as e:
+        logger.warning(f"写入天气缓存失败: {e}")
+
+
+async def _upstream_error(key: str) -> bool:
+    """上游近期是否返回过错误"""
+    client = get_redis()
+    if client is None:
+        return _local_cache.get(f"{key}:err") is not None
+    try:
+        return bool(await client.exists(f"{key}:err"))
+    except Exception:
+        return False
+
+
+async def _stale_fallback(key: str) -> Optional[Dict[str, Any]]:
+    """上游不可用时返回最近一次的缓存数据（标记stale），没有时返回None"""
+    body = await _cache_get(key, allow_stale=True)
+    return {**body, "stale": True} if body is not None else None
+
+
+# 预生成的模拟天气数据池（按顺序轮流使用），每次调用只需复制并填入城市、坐标和时间
+MOCK_POOL_SIZE = 256
+
+
+def _build_mock_weather() -> Dict[str, Any]:
+    """随机生成一条模拟天气（city/latitude/longitude/is_day/timestamp在调用时填入）"""
+    condition = random.choices(_MOCK_CONDITIONS, weights=_MOCK_WEIGHTS)[0]
+
+    return {
+        "status": "success",
+        "city": None,
+        "country": "CN",
+        "latitude": None,
+        "longitude": None,
+        "temperature": round(random.uniform(15, 30), 1),
+        "feels_like": round(random.uniform(15, 30), 1),
+        "humidity": round(random.uniform(40, 90), 1),
+        "pressure": 1013,
+        "condition": condition,
+        "description": f"模拟天气数据: {condition.lower()}",
+        "cesium_condition": _CONDITION_MAP.get(condition, "clear"),
+        "wind_speed": round(random.uniform(0, 10), 1),
+        "wind_direction": round(random.uniform(0, 360), 1),
+        "visibility": round(random.uniform(5000, 10000), 1),
+        "clouds": round(random.uniform(0, 100), 1),
+        "is_day": None,
+        "timestamp": None,
+        "note": "这是模拟数据，请配置OPENWEATHER_API_KEY环境变量获取真实天气"
+    }
+
+
+_MOCK_POOL = tuple(_build_mock_weather() for _ in range(MOCK_POOL_SIZE))
+_mock_index = itertools.count()
+
+# 模拟数据短时缓存：同一位置10秒内的重复请求返回同一份数据，不再重新生成
+MOCK_CACHE_TTL = 10
+_mock_cache = AsyncTTLCache(maxsize=64, ttl=MOCK_CACHE_TTL)
+
 
 class WeatherService:
     """天气服务类 - 直接API调用版本"""
@@ -23,19 +298,14 @@ class WeatherService:
             "OPENWEATHER_ENDPOINT",
             "https://api.openweathermap.org/data/2.5"
         )
-        self.client = None
 
-    async def get_client(self):
-        """获取HTTP客户端"""
-        if self.client is None:
-            self.client = httpx.AsyncClient(timeout=10.0)
-        return self.client
+    async def get_client(self) -> httpx.AsyncClient:
+        """获取HTTP客户端（模块级共享连接池）"""
+        return get_http_client()
 
     async def close(self):
         """关闭客户端"""
-        if self.client:
-            await self.client.aclose()
-            self.client = None
+        await close_http_client()
 
     async def get_current_weather(
         self,
@@ -59,36 +329,104 @@ class WeatherService:
             logger.info("未配置OPENWEATHER_API_KEY，使用模拟天气数据")
             return self._get_mock_weather(city, latitude, longitude)
 
-        try:
-            client = await self.get_client()
+        # 构建请求参数
+        params = {
+            "appid": self.api_key,
+            "units": "metric"
+        }
 
-            # 构建请求参数
-            params = {
-                "appid": self.api_key,
-                "units": "metric"
-            }
+        if city:
+            params["q"] = city
+        elif latitude and longitude:
+            params["lat"] = latitude
+            params["lon"] = longitude
+        else:
+            return {"error": "请提供城市名称或坐标"}
+
+        # 缓存的是解析后的结果，命中时无需再次解析
+        key = _cache_key("cur", city, latitude, longitude)
+        cached = await _cache_get(key)
+        if cached is not None:
+            return cached
+        if await _upstream_error(key):
+            logger.info("天气API近期请求失败，使用缓存或模拟数据")
+            return await _stale_fallback(key) or self._get_mock_weather(city, latitude, longitude)
+
+        return await _inflight.do(
+            key,
+            lambda: self._fetch_current_weather(key, params, city, latitude, longitude)
+        )
+
+    async def get_weather_forecast(
+        self,
+        city: Optional[str] = None,
+        latitude: Optional[float] = None,
+        longitude: Optional[float] = None,
+        days: int = 1
+    ) -> Dict[str, Any]:
+        """获取天气预报"""
+        if not self.api_key:
+            return self._get_mock_forecast(city, latitude, longitude, days)
 
-            if city:
-                params["q"] = city
-            elif latitude and longitude:
-                params["lat"] = latitude
-                params["lon"] = longitude
-            else:
-                return {"error": "请提供城市名称或坐标"}
+        params = {
+            "appid": self.api_key,
+            "units": "metric",
+            "cnt": days * 8  # 每天8次预报（3小时间隔）
+        }
+
+        if city:
+            params["q"] = city
+        elif latitude and longitude:
+            params["lat"] = latitude
+            params["lon"] = longitude
+        else:
+            return {"error": "请提供城市名称或坐标"}
+
+        key = _cache_key(f"fc{days}", city, latitude, longitude)
+        cached = await _cache_get(key)
+        if cached is not None:
+            return cached
+        if await _upstream_error(key):
+            return await _stale_fallback(key) or self._get_mock_forecast(city, latitude, longitude, days)
+
+        return await _inflight.do(
+            key,
+            lambda: self._fetch_forecast(key, params, city, latitude, longitude, days)
+        )
 
-            # 发送请求
+    async def _fetch_current_weather(
+        self,
+        key: str,
+        params: Dict[str, Any],
+        city: Optional[str],
+        latitude: Optional[float],
+        longitude: Optional[float]
+    ) -> Dict[str, Any]:
+        """请求实时天气并写入缓存，上游失败时返回缓存或模拟数据"""
+        try:
+            client = await self.get_client()
+
+            # 发送请求（304时直接使用缓存，无需传输和解析响应体）
             url = f"{self.base_url}/weather"
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            response, cached = await _conditional_get(client, key, url, params, CURRENT_WEATHER_TTL)
+            if cached is not None:
+                return cached
+            data = orjson.loads(response.content)
 
             # 解析天气数据
             weather_data = self._parse_weather_data(data)
+            await _cache_set(key, weather_data, CURRENT_WEATHER_TTL, *_validators(response))
 
             logger.info(f"✅ 获取天气数据成功: {weather_data.get('city')}")
             return weather_data
 
         except httpx.HTTPError as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                await _mark_upstream_error(key, e.response.status_code)
+            stale = await _stale_fallback(key)
+            if stale is not None:
+                logger.warning(f"⚠️ 天气API请求失败: {e}，使用缓存数据")
+                return stale
             logger.warning(f"⚠️ 天气API请求失败: {e}，使用模拟数据")
             return self._get_mock_weather(city, latitude, longitude)
         except Exception as e:
@@ -98,59 +436,59 @@ class WeatherService:
                 "fallback": self._get_mock_weather(city, latitude, longitude)
             }
 
-    async def get_weather_forecast(
+    async def _fetch_forecast(
         self,
-        city: Optional[str] = None,
-        latitude: Optional[float] = None,
-        longitude: Optional[float] = None,
-        days: int = 1
+        key: str,
+        params: Dict[str, Any],
+        city: Optional[str],
+        latitude: Optional[float],
+        longitude: Optional[float],
+        days: int
     ) -> Dict[str, Any]:
-        """获取天气预报"""
-        if not self.api_key:
-            return self._get_mock_forecast(city, latitude, longitude, days)
-
+        """请求天气预报并写入缓存，上游失败时返回缓存或模拟数据"""
         try:
             client = await self.get_client()
 
-            params = {
-                "appid": self.api_key,
-                "units": "metric",
-                "cnt": days * 8  # 每天8次预报（3小时间隔）
-            }
-
-            if city:
-                params["q"] = city
-            elif latitude and longitude:
-                params["lat"] = latitude
-                params["lon"] = longitude
-            else:
-                return {"error": "请提供城市名称或坐标"}
-
             url = f"{self.base_url}/forecast"
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-            # 解析预报数据
-            forecast_data = []
-            for item in data.get("list", []):
-                forecast_data.append({
-                    "datetime": datetime.fromtimestamp(item.get("dt", 0)).isoformat(),
-                    "temp": item["main"].get("temp"),
-                    "feels_like": item["main"].get("feels_like"),
-                    "condition": item["weather"][0].get("main") if item.get("weather") else "Clear",
-                    "description": item["weather"][0].get("description") if item.get("weather") else "",
-                    "humidity": item["main"].get("humidity"),
-                    "wind_speed": item.get("wind", {}).get("speed"),
-                })
-
-            return {
+            response, cached = await _conditional_get(client, key, url, params, FORECAST_TTL)
+            if cached is not None:
+                return cached
+            data = orjson.loads(response.content)
+
+            # 解析预报数据（每个嵌套字典只查找一次）
+            fromtimestamp = datetime.fromtimestamp
+            forecast_data = [
+                {
+                    "datetime": fromtimestamp(item.get("dt", 0)).isoformat(),
+                    "temp": main.get("temp"),
+                    "feels_like": main.get("feels_like"),
+                    "condition": weather.get("main", "Clear"),
+                    "description": weather.get("description", ""),
+                    "humidity": main.get("humidity"),
+                    "wind_speed": (item.get("wind") or _EMPTY).get("speed"),
+                }
+                for item in data.get("list") or ()
+                for main, weather in ((
+                    item.get("main") or _EMPTY,
+                    (item.get("weather") or (_EMPTY,))[0],
+                ),)
+            ]
+
+            city_info = data.get("city") or _EMPTY
+            result = {
                 "status": "success",
-                "city": data.get("city", {}).get("name"),
-                "country": data.get("city", {}).get("country"),
+                "city": city_info.get("name"),
+                "country": city_info.get("country"),
                 "forecast": forecast_data
             }
+            await _cache_set(key, result, FORECAST_TTL, *_validators(response))
+            return result
 
+        except httpx.HTTPError as e:
+            if isinstance(e, httpx.HTTPStatusError):
+                await _mark_upstream_error(key, e.response.status_code)
+            logger.error(f"获取天气预报失败: {e}")
+            return await _stale_fallback(key) or self._get_mock_forecast(city, latitude, longitude, days)
         except Exception as e:
             logger.error(f"获取天气预报失败: {e}")
             return self._get_mock_forecast(city, latitude, longitude, days)
@@ -161,6 +499,8 @@ class WeatherService:
         main_data = data.get("main", {})
         wind_data = data.get("wind", {})
         sys_data = data.get("sys", {})
+        coord = data.get("coord") or _EMPTY
+        now = datetime.now()
 
         # 映射天气状况到我们的标准类型
         condition = weather_info.get("main", "Clear")
@@ -170,8 +510,8 @@ class WeatherService:
             "status": "success",
             "city": data.get("name"),
             "country": sys_data.get("country"),
-            "latitude": data.get("coord", {}).get("lat"),
-            "longitude": data.get("coord", {}).get("lon"),
+            "latitude": coord.get("lat"),
+            "longitude": coord.get("lon"),
             "temperature": main_data.get("temp"),
             "feels_like": main_data.get("feels_like"),
             "humidity": main_data.get("humidity"),
@@ -184,51 +524,35 @@ class WeatherService:
             "visibility": data.get("visibility", 10000),
             "clouds": data.get("clouds", {}).get("all"),
             "is_day": self._is_daytime(
-                data.get("coord", {}).get("lat"),
-                data.get("coord", {}).get("lon"),
+                coord.get("lat"),
+                coord.get("lon"),
                 sys_data.get("sunrise"),
-                sys_data.get("sunset")
+                sys_data.get("sunset"),
+                now
             ),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": now.isoformat()
         }
 
     def _map_to_cesium_condition(self, condition: str) -> str:
         """将天气API的condition映射到Cesium支持的条件"""
-        condition_map = {
-            "Clear": "clear",
-            "Clouds": "cloudy",
-            "Rain": "rain",
-            "Drizzle": "rain",
-            "Thunderstorm": "rain",
-            "Snow": "snow",
-            "Mist": "fog",
-            "Fog": "fog",
-            "Haze": "fog",
-            "Smoke": "fog",
-            "Dust": "fog",
-            "Sand": "fog",
-            "Ash": "fog",
-            "Squall": "rain",
-            "Tornado": "rain"
-        }
-        return condition_map.get(condition, "clear")
+        return _CONDITION_MAP.get(condition, "clear")
 
     def _is_daytime(
         self,
         lat: Optional[float],
         lon: Optional[float],
         sunrise: Optional[int],
-        sunset: Optional[int]
+        sunset: Optional[int],
+        now: Optional[datetime] = None
     ) -> bool:
-        """判断是否是白天"""
+        """判断是否是白天（now为调用方已获取的当前时间，避免重复取时）"""
         if not lat or not lon:
             # 简单判断：当前时间是否在6-18点
-            current_hour = datetime.now().hour
+            current_hour = (now or datetime.now()).hour
             return 6 <= current_hour < 18
 
         if sunrise and sunset:
-            current_time = datetime.now().timestamp()
-            return sunrise <= current_time < sunset
+            return sunrise <= (now or datetime.now()).timestamp() < sunset
 
         return True
 
@@ -238,36 +562,21 @@ class WeatherService:
         latitude: Optional[float] = None,
         longitude: Optional[float] = None
     ) -> Dict[str, Any]:
-        """生成模拟天气数据"""
-        current_hour = datetime.now().hour
-        is_day = 6 <= current_hour < 18
-
-        # 根据时间生成天气
-        conditions = ["Clear", "Clouds", "Rain", "Snow", "Fog"]
-        weights = [0.3, 0.3, 0.2, 0.1, 0.1]
-        condition = random.choices(conditions, weights=weights)[0]
-
-        return {
-            "status": "success",
-            "city": city or "北京",
-            "country": "CN",
-            "latitude": latitude or 39.9042,
-            "longitude": longitude or 116.4074,
-            "temperature": round(random.uniform(15, 30), 1),
-            "feels_like": round(random.uniform(15, 30), 1),
-            "humidity": round(random.uniform(40, 90), 1),
-            "pressure": 1013,
-            "condition": condition,
-            "description": f"模拟天气数据: {condition.lower()}",
-            "cesium_condition": self._map_to_cesium_condition(condition),
-            "wind_speed": round(random.uniform(0, 10), 1),
-            "wind_direction": round(random.uniform(0, 360), 1),
-            "visibility": round(random.uniform(5000, 10000), 1),
-            "clouds": round(random.uniform(0, 100), 1),
-            "is_day": is_day,
-            "timestamp": datetime.now().isoformat(),
-            "note": "这是模拟数据，请配置OPENWEATHER_API_KEY环境变量获取真实天气"
-        }
+        """生成模拟天气数据（从预生成的数据池中轮流取一条）"""
+        key = _cache_key("mock", city, latitude, longitude)
+        weather = _mock_cache.get(key)
+        if weather is not None:
+            return weather
+
+        now = datetime.now()
+        weather = _MOCK_POOL[next(_mock_index) % MOCK_POOL_SIZE].copy()
+        weather["city"] = city or "北京"
+        weather["latitude"] = latitude or 39.9042
+        weather["longitude"] = longitude or 116.4074
+        weather["is_day"] = 6 <= now.hour < 18
+        weather["timestamp"] = now.isoformat()
+        _mock_cache.set(key, weather)
+        return weather
 
     def _get_mock_forecast(
         self,
@@ -277,27 +586,38 @@ class WeatherService:
         days: int = 1
     ) -> Dict[str, Any]:
         """生成模拟预报数据"""
-        forecast = []
-        for i in range(days * 8):
-            future_time = datetime.now() + timedelta(hours=i * 3)
-            condition = random.choice(["Clear", "Clouds", "Rain", "Snow"])
-
-            forecast.append({
-                "datetime": future_time.isoformat(),
-                "temp": round(random.uniform(15, 30), 1),
-                "feels_like": round(random.uniform(15, 30), 1),
+        key = _cache_key(f"mockfc{days}", city, latitude, longitude)
+        result = _mock_cache.get(key)
+        if result is not None:
+            return result
+
+        count = days * 8
+        now = datetime.now()
+        uniform = random.uniform
+        step = timedelta(hours=3)
+        conditions = random.choices(("Clear", "Clouds", "Rain", "Snow"), k=count)
+
+        forecast = [
+            {
+                "datetime": (now + step * i).isoformat(),
+                "temp": round(uniform(15, 30), 1),
+                "feels_like": round(uniform(15, 30), 1),
                 "condition": condition,
                 "description": condition.lower(),
-                "humidity": round(random.uniform(40, 90), 1),
-                "wind_speed": round(random.uniform(0, 10), 1),
-            })
+                "humidity": round(uniform(40, 90), 1),
+                "wind_speed": round(uniform(0, 10), 1),
+            }
+            for i, condition in enumerate(conditions)
+        ]
 
-        return {
+        result = {
             "status": "success",
             "city": city or "Unknown",
             "forecast": forecast,
             "note": "这是模拟预报数据"
         }
+        _mock_cache.set(key, result)
+        return result
 
 
 # 单例实例
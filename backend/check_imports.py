@@ -5,56 +5,41 @@
 检查所有 API 模块的导入是否正确
 """
 
+import importlib
 import sys
+import traceback
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
 backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
-def check_imports():
-    """检查所有导入"""
-    print("检查 API 模块导入...")
-
-    try:
-        print("✓ 检查 app.api.buildings...")
-        from app.api import buildings
-        print("  ✓ buildings 导入成功")
-
-        print("✓ 检查 app.api.simulation...")
-        from app.api import simulation
-        print("  ✓ simulation 导入成功")
-
-        print("✓ 检查 app.api.execution...")
-        from app.api import execution
-        print("  ✓ execution 导入成功")
+# 需要检查的 API 模块
+API_MODULES = ["buildings", "simulation", "execution", "auth", "users", "ai", "chat"]
 
-        print("✓ 检查 app.api.auth...")
-        from app.api import auth
-        print("  ✓ auth 导入成功")
 
-        print("✓ 检查 app.api.users...")
-        from app.api import users
-        print("  ✓ users 导入成功")
-
-        print("✓ 检查 app.api.ai...")
-        from app.api import ai
-        print("  ✓ ai 导入成功")
-
-        print("✓ 检查 app.api.chat...")
-        from app.api import chat
-        print("  ✓ chat 导入成功")
+def check_imports():
+    """检查所有导入（逐个模块检查，单个模块失败不影响其余模块的检查）"""
+    print("检查 API 模块导入...")
 
-        print("\n" + "="*50)
+    failed = []
+    for name in API_MODULES:
+        print(f"✓ 检查 app.api.{name}...")
+        try:
+            importlib.import_module(f"app.api.{name}")
+            print(f"  ✓ {name} 导入成功")
+        except Exception as e:
+            print(f"\n❌ {name} 导入失败: {e}")
+            traceback.print_exc()
+            failed.append(name)
+
+    print("\n" + "="*50)
+    if failed:
+        print(f"❌ {len(failed)} 个模块导入失败: {', '.join(failed)}")
+    else:
         print("✅ 所有 API 模块导入成功！")
-        print("="*50)
-        return True
-
-    except Exception as e:
-        print(f"\n❌ 导入失败: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    print("="*50)
+    return not failed
 
 if __name__ == "__main__":
     success = check_imports()
@@ -2,8 +2,11 @@
 中国主要省会城市3D模型数据配置
 基于开源数据源：CMAB、GABLE、Open3Dhk等
 """
+import functools
+import io
 import sys
 from pathlib import Path
+from types import MappingProxyType
 
 backend_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_dir))
@@ -202,46 +205,66 @@ DATA_PRIORITY = [
     "5. 国内地图API - 百度/高德/腾讯（需申请key）"
 ]
 
+# 城市名索引：英文键 + 中文名，查询时一次字典查找即可命中
+_CITY_INDEX = {
+    **{config["name_zh"]: config for config in CHINA_3D_DATA_SOURCES.values()},
+    **CHINA_3D_DATA_SOURCES,
+}
+
 # ============ 使用示例 ============
 
+@functools.lru_cache(maxsize=512)
 def get_city_data_config(city_name: str):
-    """获取城市数据配置"""
-    city_key = city_name.replace("市", "").replace("省", "")
-    return CHINA_3D_DATA_SOURCES.get(city_key, {
+    """获取城市数据配置（数据源配置是静态的，结果可以缓存；返回值为共享对象，不应修改）"""
+    config = _CITY_INDEX.get(city_name)
+    if config is None:
+        config = _CITY_INDEX.get(city_name.replace("市", "").replace("省", ""))
+    return config or MappingProxyType({
         "name_en": city_name,
         "name_zh": city_name,
         "source": "CMAB",
-        "center": [0, 0],
+        "center": (0, 0),
         "description": "请配置该城市的数据源"
     })
 
-def print_all_sources():
-    """打印所有可用的数据源"""
-    print("="*70)
-    print("中国城市3D模型数据源列表")
-    print("="*70)
-    print()
+def _render_all_sources() -> str:
+    """渲染所有可用数据源的说明文本"""
+    out = io.StringIO()
+    print("="*70, file=out)
+    print("中国城市3D模型数据源列表", file=out)
+    print("="*70, file=out)
+    print(file=out)
 
     for city_key, config in CHINA_3D_DATA_SOURCES.items():
-        print(f"🏙️  {config['name_zh']} ({config['name_en']})")
-        print(f"   数据源: {config['source']}")
-        print(f"   中心坐标: {config['center']}")
-        print(f"   说明: {config['description']}")
+        print(f"🏙️  {config['name_zh']} ({config['name_en']})", file=out)
+        print(f"   数据源: {config['source']}", file=out)
+        print(f"   中心坐标: {config['center']}", file=out)
+        print(f"   说明: {config['description']}", file=out)
         if 'url' in config:
-            print(f"   数据地址: {config['url']}")
-        print()
-
-    print("="*70)
-    print("数据转换工具推荐")
-    print("="*70)
-    print()
-    print("🔧 Py3DTiles - https://github.com/Oslandia/py3dtilers")
-    print("   支持格式: OBJ, GeoJSON, IFC, CityGML → 3D Tiles")
-    print("   命令: pip install py3dtiles")
-    print()
-    print("🔧 Cesium 3D Tiles Tools - https://github.com/CesiumGS/3d-tiles-tools")
-    print("   官方工具集，用于3D Tiles处理")
-    print()
+            print(f"   数据地址: {config['url']}", file=out)
+        print(file=out)
+
+    print("="*70, file=out)
+    print("数据转换工具推荐", file=out)
+    print("="*70, file=out)
+    print(file=out)
+    print("🔧 Py3DTiles - https://github.com/Oslandia/py3dtilers", file=out)
+    print("   支持格式: OBJ, GeoJSON, IFC, CityGML → 3D Tiles", file=out)
+    print("   命令: pip install py3dtiles", file=out)
+    print(file=out)
+    print("🔧 Cesium 3D Tiles Tools - https://github.com/CesiumGS/3d-tiles-tools", file=out)
+    print("   官方工具集，用于3D Tiles处理", file=out)
+    print(file=out)
+    return out.getvalue()
+
+
+# 数据源配置是静态的，说明文本在导入时渲染一次
+_ALL_SOURCES_TEXT = _render_all_sources()
+
+
+def print_all_sources():
+    """打印所有可用的数据源"""
+    sys.stdout.write(_ALL_SOURCES_TEXT)
 
 if __name__ == "__main__":
     print_all_sources()
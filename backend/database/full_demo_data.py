@@ -31,6 +31,26 @@ for env_path in [backend_dir / '.env', Path(__file__).parent / '.env']:
 
 pwd = os.getenv('DB_PASSWORD', 'password')
 
+# 批量插入的每批行数
+BATCH_SIZE = 500
+
+
+def insert_batch(cursor, conn, sql, rows, label):
+    """用executemany批量插入并提交，返回成功插入的行数（失败时回滚该批并跳过）"""
+    if not rows:
+        return 0
+    try:
+        cursor.executemany(sql, rows)
+        conn.commit()
+        return len(rows)
+    except pymysql.Error as e:
+        conn.rollback()
+        print(f"   ⚠️  批量插入{label}失败: {e}")
+        return 0
+    finally:
+        rows.clear()
+
+
 print("="*70)
 print("智慧城市系统 - 完整Demo数据生成器")
 print("="*70)
@@ -118,7 +138,17 @@ try:
     }
 
     buildings_added = 0
+    buildings_inserted = 0
     start_id = buildings_count
+    now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    building_sql = """
+        INSERT INTO tb_buildings
+        (id, name, category, height, longitude, latitude, address,
+         district, city, status, risk_level, floors, build_year,
+         area, description, is_deleted, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    building_rows = []
 
     for city_info in cities:
         if buildings_count + buildings_added >= BUILDINGS_TARGET:
@@ -137,8 +167,6 @@ try:
 
                 try:
                     bid = str(uuid.uuid4())
-                    now = datetime.now()
-                    now_str = now.strftime('%Y-%m-%d %H:%M:%S')
 
                     category = random.choice(categories)
                     prefix = random.choice(building_prefix_map.get(category, ["建筑"]))
@@ -156,32 +184,24 @@ try:
                     area = random.uniform(1000, 100000)
                     risk_level = random.choices([0, 1, 2, 3, 4], weights=[70, 15, 10, 4, 1])[0]
 
-                    sql = f"""
-                        INSERT INTO tb_buildings
-                        (id, name, category, height, longitude, latitude, address,
-                         district, city, status, risk_level, floors, build_year,
-                         area, description, is_deleted, created_at, updated_at)
-                        VALUES (
-                            '{bid}', '{building_name}', '{category}', {height:.2f},
-                            {lon:.8f}, {lat:.8f}, '{city_info['name']}{district}某街道{random.randint(1, 999)}号',
-                            '{district}', '{city_info['name']}', 'normal', {risk_level}, {floors}, {build_year},
-                            {area:.2f}, '位于{city_info['name']}{district}的{category}建筑，建于{build_year}年', 0, '{now_str}', '{now_str}'
-                        )
-                    """
-
-                    cursor.execute(sql)
+                    building_rows.append((
+                        bid, building_name, category, round(height, 2),
+                        round(lon, 8), round(lat, 8), f"{city_info['name']}{district}某街道{random.randint(1, 999)}号",
+                        district, city_info['name'], 'normal', risk_level, floors, build_year,
+                        round(area, 2), f"位于{city_info['name']}{district}的{category}建筑，建于{build_year}年", 0, now_str, now_str
+                    ))
                     buildings_added += 1
 
-                    if buildings_added % 100 == 0:
-                        conn.commit()
+                    if len(building_rows) >= BATCH_SIZE:
+                        buildings_inserted += insert_batch(cursor, conn, building_sql, building_rows, "建筑")
                         print(f"   进度: {buildings_count + buildings_added}/{BUILDINGS_TARGET}")
 
                 except Exception as e:
                     print(f"   ⚠️  插入建筑失败: {e}")
                     continue
 
-    conn.commit()
-    print(f"   ✅ 建筑数据生成完成！本次添加 {buildings_added} 条\n")
+    buildings_inserted += insert_batch(cursor, conn, building_sql, building_rows, "建筑")
+    print(f"   ✅ 建筑数据生成完成！本次添加 {buildings_inserted} 条\n")
 
     # ========== 生成城市事件 ==========
     print(f"5. 生成城市事件数据 (目标: {EVENTS_TARGET} 条)...")
@@ -197,7 +217,35 @@ try:
         "emergency": ["突发事故", "公共安全事件", "紧急疏散"],
     }
 
+    # 检查表是否存在，如果不存在则创建
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tb_city_events (
+            id VARCHAR(36) PRIMARY KEY,
+            event_name VARCHAR(200) NOT NULL,
+            event_type VARCHAR(50),
+            event_date DATETIME,
+            longitude FLOAT,
+            latitude FLOAT,
+            radius INT,
+            severity INT,
+            status VARCHAR(20),
+            description TEXT,
+            affected_areas TEXT,
+            response_actions TEXT,
+            created_at DATETIME
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
     events_added = 0
+    now = datetime.now()
+    now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+    event_sql = """
+        INSERT INTO tb_city_events
+        (id, event_name, event_type, event_date, longitude, latitude, radius,
+         severity, status, description, affected_areas, response_actions, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    event_rows = []
 
     for i in range(EVENTS_TARGET):
         try:
@@ -206,11 +254,9 @@ try:
             event_name = random.choice(event_names_map[event_type])
 
             # 事件时间（过去30天内）
-            event_date = datetime.now() - timedelta(days=random.randint(0, 30))
+            event_date = now - timedelta(days=random.randint(0, 30))
 
             eid = str(uuid.uuid4())
-            now = datetime.now()
-            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
             event_date_str = event_date.strftime('%Y-%m-%d %H:%M:%S')
 
             # 位置
@@ -235,48 +281,17 @@ try:
                 "traffic_control": random.choice([True, False])
             }, ensure_ascii=False)
 
-            # 检查表是否存在，如果不存在则创建
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tb_city_events (
-                    id VARCHAR(36) PRIMARY KEY,
-                    event_name VARCHAR(200) NOT NULL,
-                    event_type VARCHAR(50),
-                    event_date DATETIME,
-                    longitude FLOAT,
-                    latitude FLOAT,
-                    radius INT,
-                    severity INT,
-                    status VARCHAR(20),
-                    description TEXT,
-                    affected_areas TEXT,
-                    response_actions TEXT,
-                    created_at DATETIME
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-
-            sql = f"""
-                INSERT INTO tb_city_events
-                (id, event_name, event_type, event_date, longitude, latitude, radius,
-                 severity, status, description, affected_areas, response_actions, created_at)
-                VALUES (
-                    '{eid}', '{city_info['name']}{event_name}', '{event_type}', '{event_date_str}',
-                    {lon:.8f}, {lat:.8f}, {radius}, {severity}, '{status}',
-                    '{event_name}，影响半径{radius}米', '{affected_areas}', '{response_actions}', '{now_str}'
-                )
-            """
-
-            cursor.execute(sql)
-            events_added += 1
-
-            if events_added % 20 == 0:
-                conn.commit()
-                print(f"   进度: {events_added}/{EVENTS_TARGET}")
+            event_rows.append((
+                eid, f"{city_info['name']}{event_name}", event_type, event_date_str,
+                round(lon, 8), round(lat, 8), radius, severity, status,
+                f"{event_name}，影响半径{radius}米", affected_areas, response_actions, now_str
+            ))
 
         except Exception as e:
-            print(f"   ⚠️  插入事件失败: {e}")
+            print(f"   ⚠️  生成事件失败: {e}")
             continue
 
-    conn.commit()
+    events_added = insert_batch(cursor, conn, event_sql, event_rows, "事件")
     print(f"   ✅ 城市事件生成完成！共 {events_added} 条\n")
 
     # ========== 生成分析报告 ==========
@@ -298,7 +313,32 @@ try:
         "urban_planning": "{}城市规划建议",
     }
 
+    # 检查表是否存在
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tb_analysis_reports (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36),
+            report_type VARCHAR(50),
+            title VARCHAR(200),
+            content TEXT,
+            summary TEXT,
+            visualization_config TEXT,
+            ai_model VARCHAR(50),
+            generated_at DATETIME,
+            created_at DATETIME
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
     reports_added = 0
+    now = datetime.now()
+    now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+    report_sql = """
+        INSERT INTO tb_analysis_reports
+        (id, user_id, report_type, title, content, summary, visualization_config,
+         ai_model, generated_at, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    report_rows = []
 
     for i in range(REPORTS_TARGET):
         try:
@@ -310,7 +350,7 @@ try:
             content = f"""# {title}
 
 ## 分析时间
-{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+{now_str}
 
 ## 分析范围
 城市: {city_info['name']}
@@ -334,8 +374,6 @@ try:
 """
 
             rid = str(uuid.uuid4())
-            now = datetime.now()
-            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
             generated_at_str = (now - timedelta(days=random.randint(0, 30))).strftime('%Y-%m-%d %H:%M:%S')
 
             # summary JSON
@@ -356,45 +394,17 @@ try:
 
             ai_model = random.choice(["glm-4-flash", "glm-4-plus", "glm-4-air", "qwen-turbo"])
 
-            # 检查表是否存在
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tb_analysis_reports (
-                    id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36),
-                    report_type VARCHAR(50),
-                    title VARCHAR(200),
-                    content TEXT,
-                    summary TEXT,
-                    visualization_config TEXT,
-                    ai_model VARCHAR(50),
-                    generated_at DATETIME,
-                    created_at DATETIME
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-
-            sql = f"""
-                INSERT INTO tb_analysis_reports
-                (id, user_id, report_type, title, content, summary, visualization_config,
-                 ai_model, generated_at, created_at)
-                VALUES (
-                    '{rid}', '{admin_user_id}', '{report_type}', '{title}',
-                    '{content.replace(chr(10), chr(32)).replace(chr(13), '')}', '{summary}', '{viz_config}',
-                    '{ai_model}', '{generated_at_str}', '{now_str}'
-                )
-            """
-
-            cursor.execute(sql)
-            reports_added += 1
-
-            if reports_added % 20 == 0:
-                conn.commit()
-                print(f"   进度: {reports_added}/{REPORTS_TARGET}")
+            report_rows.append((
+                rid, admin_user_id, report_type, title,
+                content, summary, viz_config,
+                ai_model, generated_at_str, now_str
+            ))
 
         except Exception as e:
-            print(f"   ⚠️  插入报告失败: {e}")
+            print(f"   ⚠️  生成报告失败: {e}")
             continue
 
-    conn.commit()
+    reports_added = insert_batch(cursor, conn, report_sql, report_rows, "报告")
     print(f"   ✅ 分析报告生成完成！共 {reports_added} 条\n")
 
     # ========== 生成模拟记录 ==========
@@ -403,7 +413,33 @@ try:
     simulation_types = ["circle", "polygon", "buffer", "viewshed"]
     hazard_types = ["fire", "flood", "earthquake", "typhoon", "traffic"]
 
+    # 检查表是否存在
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tb_simulation_records (
+            id VARCHAR(36) PRIMARY KEY,
+            user_id VARCHAR(36),
+            simulation_type VARCHAR(50),
+            center_lon FLOAT,
+            center_lat FLOAT,
+            radius INT,
+            affected_building_ids TEXT,
+            impact_summary TEXT,
+            status VARCHAR(20),
+            created_at DATETIME,
+            updated_at DATETIME
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
     simulations_added = 0
+    now = datetime.now()
+    now_str = now.strftime('%Y-%m-%d %H:%M:%S')
+    simulation_sql = """
+        INSERT INTO tb_simulation_records
+        (id, user_id, simulation_type, center_lon, center_lat, radius,
+         affected_building_ids, impact_summary, status, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    simulation_rows = []
 
     for i in range(SIMULATIONS_TARGET):
         try:
@@ -420,8 +456,6 @@ try:
             affected_ids_json = json.dumps(affected_ids)
 
             sid = str(uuid.uuid4())
-            now = datetime.now()
-            now_str = now.strftime('%Y-%m-%d %H:%M:%S')
             created_at_str = (now - timedelta(days=random.randint(0, 60))).strftime('%Y-%m-%d %H:%M:%S')
 
             # impact_summary JSON
@@ -442,45 +476,16 @@ try:
 
             status = random.choice(["completed", "pending", "failed"])
 
-            # 检查表是否存在
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tb_simulation_records (
-                    id VARCHAR(36) PRIMARY KEY,
-                    user_id VARCHAR(36),
-                    simulation_type VARCHAR(50),
-                    center_lon FLOAT,
-                    center_lat FLOAT,
-                    radius INT,
-                    affected_building_ids TEXT,
-                    impact_summary TEXT,
-                    status VARCHAR(20),
-                    created_at DATETIME,
-                    updated_at DATETIME
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-            """)
-
-            sql = f"""
-                INSERT INTO tb_simulation_records
-                (id, user_id, simulation_type, center_lon, center_lat, radius,
-                 affected_building_ids, impact_summary, status, created_at, updated_at)
-                VALUES (
-                    '{sid}', '{admin_user_id}', '{sim_type}', {center_lon:.8f}, {center_lat:.8f}, {random.randint(100, 5000)},
-                    '{affected_ids_json}', '{impact_summary}', '{status}', '{created_at_str}', '{now_str}'
-                )
-            """
-
-            cursor.execute(sql)
-            simulations_added += 1
-
-            if simulations_added % 20 == 0:
-                conn.commit()
-                print(f"   进度: {simulations_added}/{SIMULATIONS_TARGET}")
+            simulation_rows.append((
+                sid, admin_user_id, sim_type, round(center_lon, 8), round(center_lat, 8), random.randint(100, 5000),
+                affected_ids_json, impact_summary, status, created_at_str, now_str
+            ))
 
         except Exception as e:
-            print(f"   ⚠️  插入模拟记录失败: {e}")
+            print(f"   ⚠️  生成模拟记录失败: {e}")
             continue
 
-    conn.commit()
+    simulations_added = insert_batch(cursor, conn, simulation_sql, simulation_rows, "模拟记录")
     print(f"   ✅ 空间模拟记录生成完成！共 {simulations_added} 条\n")
 
     # ========== 最终验证 ==========
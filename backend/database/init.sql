@@ -29,7 +29,7 @@ CREATE TABLE IF NOT EXISTS tb_user_configs (
     user_id VARCHAR(36) UNIQUE NOT NULL COMMENT '用户ID',
     provider VARCHAR(50) DEFAULT 'zhipu' COMMENT 'AI提供商',
     model_name VARCHAR(50) DEFAULT 'glm-4-flash' COMMENT 'AI模型名称',
-    persona VARCHAR(20) DEFAULT 'admin' COMMENT '角色',
+    persona ENUM('admin', 'planner', 'geek') DEFAULT 'admin' COMMENT '角色',
     temperature DECIMAL(3,2) DEFAULT 0.7 COMMENT '温度参数',
     top_p DECIMAL(3,2) DEFAULT 0.9 COMMENT 'Top-P参数',
     auto_execute BOOLEAN DEFAULT FALSE COMMENT '是否自动执行指令',
@@ -49,10 +49,14 @@ CREATE TABLE IF NOT EXISTS tb_ai_providers (
     provider_name VARCHAR(100) NOT NULL COMMENT '提供商名称',
     api_key_encrypted TEXT COMMENT '加密的API Key',
     api_secret_encrypted TEXT COMMENT '加密的API Secret',
+    api_key_masked VARCHAR(12) AS (CONCAT(LEFT(api_key_encrypted, 4), '****', RIGHT(api_key_encrypted, 4))) STORED COMMENT 'API Key掩码',
     base_url VARCHAR(500) COMMENT '自定义API地址',
     is_enabled BOOLEAN DEFAULT TRUE COMMENT '是否启用',
     is_default BOOLEAN DEFAULT FALSE COMMENT '是否为默认提供商',
     priority INT DEFAULT 0 COMMENT '优先级',
+    rate_limit_rps DECIMAL(8,2) COMMENT '每秒请求数上限（为空使用默认值）',
+    rate_limit_burst INT COMMENT '突发请求数上限',
+    max_concurrency INT COMMENT '最大并发请求数',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
     FOREIGN KEY (user_id) REFERENCES tb_users(id) ON DELETE CASCADE,
@@ -96,7 +100,7 @@ CREATE TABLE IF NOT EXISTS tb_buildings (
     address VARCHAR(500) COMMENT '详细地址',
     district VARCHAR(100) COMMENT '所属区县',
     city VARCHAR(50) COMMENT '所属城市',
-    status VARCHAR(20) DEFAULT 'normal' COMMENT '状态',
+    status ENUM('normal', 'abnormal', 'high_risk') DEFAULT 'normal' COMMENT '状态',
     risk_level INT DEFAULT 0 COMMENT '风险等级',
     floors INT COMMENT '楼层数',
     build_year INT COMMENT '建成年份',
@@ -105,44 +109,109 @@ CREATE TABLE IF NOT EXISTS tb_buildings (
     is_deleted TINYINT(1) DEFAULT 0 COMMENT '是否删除',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+    geom POINT SRID 4326 GENERATED ALWAYS AS (ST_PointFromText(CONCAT('POINT(', longitude, ' ', latitude, ')'), 4326, 'axis-order=long-lat')) STORED NOT NULL COMMENT '坐标点(空间索引)',
     INDEX idx_category (category),
     INDEX idx_status (status),
-    INDEX idx_city_district (city, district),
-    INDEX idx_height (height)
+    SPATIAL INDEX idx_geom (geom),
+    INDEX idx_city_district_category_height (city, district, category, height),
+    INDEX idx_height (height),
+    FULLTEXT INDEX ft_building_text (name, address, description) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='建筑资产表';
 
 -- AI对话记录表
 CREATE TABLE IF NOT EXISTS tb_ai_conversations (
-    id VARCHAR(36) PRIMARY KEY COMMENT '对话ID (UUID)',
+    id VARCHAR(36) NOT NULL COMMENT '对话ID (UUID)',
     user_id VARCHAR(36) NOT NULL COMMENT '用户ID',
     session_id VARCHAR(36) NOT NULL COMMENT '会话ID',
-    role VARCHAR(20) NOT NULL COMMENT '角色',
+    role ENUM('system', 'user', 'assistant') NOT NULL COMMENT '角色',
     content TEXT NOT NULL COMMENT '对话内容',
     model_name VARCHAR(50) COMMENT '使用的模型',
     tokens_used INT COMMENT 'Token消耗量',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-    FOREIGN KEY (user_id) REFERENCES tb_users(id) ON DELETE CASCADE,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    PRIMARY KEY (id, created_at),
     INDEX idx_user_id (user_id),
     INDEX idx_session_id (session_id),
     INDEX idx_created_at (created_at)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='AI对话记录表';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='AI对话记录表'
+-- 按月分区（分区表不支持外键，分区键需包含在主键中）
+-- 与迁移 partition_conversations_and_logs 一致预建到2026-12，之后的数据落入pmax，
+-- 需定期拆分，例如：ALTER TABLE ... REORGANIZE PARTITION pmax INTO (
+--   PARTITION p202701 VALUES LESS THAN (TO_DAYS('2027-02-01')), PARTITION pmax VALUES LESS THAN MAXVALUE);
+PARTITION BY RANGE (TO_DAYS(created_at)) (
+    PARTITION p202501 VALUES LESS THAN (TO_DAYS('2025-02-01')),
+    PARTITION p202502 VALUES LESS THAN (TO_DAYS('2025-03-01')),
+    PARTITION p202503 VALUES LESS THAN (TO_DAYS('2025-04-01')),
+    PARTITION p202504 VALUES LESS THAN (TO_DAYS('2025-05-01')),
+    PARTITION p202505 VALUES LESS THAN (TO_DAYS('2025-06-01')),
+    PARTITION p202506 VALUES LESS THAN (TO_DAYS('2025-07-01')),
+    PARTITION p202507 VALUES LESS THAN (TO_DAYS('2025-08-01')),
+    PARTITION p202508 VALUES LESS THAN (TO_DAYS('2025-09-01')),
+    PARTITION p202509 VALUES LESS THAN (TO_DAYS('2025-10-01')),
+    PARTITION p202510 VALUES LESS THAN (TO_DAYS('2025-11-01')),
+    PARTITION p202511 VALUES LESS THAN (TO_DAYS('2025-12-01')),
+    PARTITION p202512 VALUES LESS THAN (TO_DAYS('2026-01-01')),
+    PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01')),
+    PARTITION p202602 VALUES LESS THAN (TO_DAYS('2026-03-01')),
+    PARTITION p202603 VALUES LESS THAN (TO_DAYS('2026-04-01')),
+    PARTITION p202604 VALUES LESS THAN (TO_DAYS('2026-05-01')),
+    PARTITION p202605 VALUES LESS THAN (TO_DAYS('2026-06-01')),
+    PARTITION p202606 VALUES LESS THAN (TO_DAYS('2026-07-01')),
+    PARTITION p202607 VALUES LESS THAN (TO_DAYS('2026-08-01')),
+    PARTITION p202608 VALUES LESS THAN (TO_DAYS('2026-09-01')),
+    PARTITION p202609 VALUES LESS THAN (TO_DAYS('2026-10-01')),
+    PARTITION p202610 VALUES LESS THAN (TO_DAYS('2026-11-01')),
+    PARTITION p202611 VALUES LESS THAN (TO_DAYS('2026-12-01')),
+    PARTITION p202612 VALUES LESS THAN (TO_DAYS('2027-01-01')),
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
 -- 操作日志表
 CREATE TABLE IF NOT EXISTS tb_operation_logs (
-    id VARCHAR(36) PRIMARY KEY COMMENT '日志ID (UUID)',
+    id VARCHAR(36) NOT NULL COMMENT '日志ID (UUID)',
     user_id VARCHAR(36) COMMENT '用户ID',
     operation_type VARCHAR(50) NOT NULL COMMENT '操作类型',
     operation_data TEXT COMMENT '操作数据(JSON格式)',
     ip_address VARCHAR(50) COMMENT 'IP地址',
     user_agent TEXT COMMENT '用户代理',
-    status VARCHAR(20) DEFAULT 'success' COMMENT '状态',
+    status ENUM('success', 'failed') DEFAULT 'success' COMMENT '状态',
     error_message TEXT COMMENT '错误信息',
-    created_at DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-    FOREIGN KEY (user_id) REFERENCES tb_users(id) ON DELETE SET NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    PRIMARY KEY (id, created_at),
     INDEX idx_user_id (user_id),
     INDEX idx_operation_type (operation_type),
     INDEX idx_created_at (created_at)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='操作日志表';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='操作日志表'
+-- 按月分区（分区表不支持外键，分区键需包含在主键中）
+-- 与迁移 partition_conversations_and_logs 一致预建到2026-12，之后的数据落入pmax，
+-- 需定期拆分，例如：ALTER TABLE ... REORGANIZE PARTITION pmax INTO (
+--   PARTITION p202701 VALUES LESS THAN (TO_DAYS('2027-02-01')), PARTITION pmax VALUES LESS THAN MAXVALUE);
+PARTITION BY RANGE (TO_DAYS(created_at)) (
+    PARTITION p202501 VALUES LESS THAN (TO_DAYS('2025-02-01')),
+    PARTITION p202502 VALUES LESS THAN (TO_DAYS('2025-03-01')),
+    PARTITION p202503 VALUES LESS THAN (TO_DAYS('2025-04-01')),
+    PARTITION p202504 VALUES LESS THAN (TO_DAYS('2025-05-01')),
+    PARTITION p202505 VALUES LESS THAN (TO_DAYS('2025-06-01')),
+    PARTITION p202506 VALUES LESS THAN (TO_DAYS('2025-07-01')),
+    PARTITION p202507 VALUES LESS THAN (TO_DAYS('2025-08-01')),
+    PARTITION p202508 VALUES LESS THAN (TO_DAYS('2025-09-01')),
+    PARTITION p202509 VALUES LESS THAN (TO_DAYS('2025-10-01')),
+    PARTITION p202510 VALUES LESS THAN (TO_DAYS('2025-11-01')),
+    PARTITION p202511 VALUES LESS THAN (TO_DAYS('2025-12-01')),
+    PARTITION p202512 VALUES LESS THAN (TO_DAYS('2026-01-01')),
+    PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01')),
+    PARTITION p202602 VALUES LESS THAN (TO_DAYS('2026-03-01')),
+    PARTITION p202603 VALUES LESS THAN (TO_DAYS('2026-04-01')),
+    PARTITION p202604 VALUES LESS THAN (TO_DAYS('2026-05-01')),
+    PARTITION p202605 VALUES LESS THAN (TO_DAYS('2026-06-01')),
+    PARTITION p202606 VALUES LESS THAN (TO_DAYS('2026-07-01')),
+    PARTITION p202607 VALUES LESS THAN (TO_DAYS('2026-08-01')),
+    PARTITION p202608 VALUES LESS THAN (TO_DAYS('2026-09-01')),
+    PARTITION p202609 VALUES LESS THAN (TO_DAYS('2026-10-01')),
+    PARTITION p202610 VALUES LESS THAN (TO_DAYS('2026-11-01')),
+    PARTITION p202611 VALUES LESS THAN (TO_DAYS('2026-12-01')),
+    PARTITION p202612 VALUES LESS THAN (TO_DAYS('2027-01-01')),
+    PARTITION pmax VALUES LESS THAN MAXVALUE
+);
 
 -- 用户使用统计表
 CREATE TABLE IF NOT EXISTS tb_ai_usage_stats (
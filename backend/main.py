@@ -4,6 +4,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from app.core.config import settings
@@ -18,7 +19,8 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="智慧城市数字孪生系统API",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # 配置CORS
@@ -52,6 +54,44 @@ app.include_router(map_tiles.router)
 app.mount("/static", StaticFiles(directory="uploads"), name="static")
 
 
+@app.on_event("startup")
+async def start_usage_recorder():
+    """启动AI使用统计后台写入"""
+    from app.services.ai.usage_recorder import get_usage_recorder
+    get_usage_recorder().start()
+
+
+@app.on_event("startup")
+async def start_provider_invalidation_listener():
+    """订阅其他实例的Provider缓存失效通知"""
+    import asyncio
+    from app.services.ai_service import listen_provider_invalidations
+    app.state.provider_invalidation_task = asyncio.create_task(listen_provider_invalidations())
+
+
+@app.on_event("shutdown")
+async def stop_usage_recorder():
+    """写入剩余的AI使用统计"""
+    from app.services.ai.usage_recorder import get_usage_recorder
+    await get_usage_recorder().stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    """关闭共享的HTTP客户端连接池"""
+    from app.services.ai.providers import close_shared_http_clients
+    from app.services.ai.aiohttp_transport import close_aiohttp_session
+    from app.core.redis import close_redis
+    from app.services.mcp import get_mcp_manager
+    from app.services.weather_service import close_http_client as close_weather_http_client
+    app.state.provider_invalidation_task.cancel()
+    await close_shared_http_clients()
+    await close_aiohttp_session()
+    await close_weather_http_client()
+    await close_redis()
+    await (await get_mcp_manager()).close_all()
+
+
 @app.get("/")
 async def root():
     """根路径"""
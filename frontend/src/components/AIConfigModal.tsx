@@ -9,7 +9,7 @@ interface Provider {
   id: string
   provider_code: string
   provider_name: string
-  api_key_encrypted: string
+  api_key_masked: string
   is_enabled: boolean
   is_default: boolean
 }
@@ -213,8 +213,7 @@ const AIConfigModal = ({ visible, onCancel }: { visible: boolean; onCancel: () =
                     title={provider.provider_name}
                     description={
                       <span>
-                        代码: {provider.provider_code} | API Key: ****
-                        {provider.api_key_encrypted}
+                        代码: {provider.provider_code} | API Key: {provider.api_key_masked}
                       </span>
                     }
                   />